@@ -1,56 +0,0 @@
-#This file was automatically generated
-# Format: ('Chain', ResNum)
-INTERFACE_LIST = [
-    ('A', 19),  # SER dASA=10.36
-    ('A', 24),  # GLN dASA=53.73
-    ('A', 27),  # THR dASA=67.98
-    ('A', 28),  # PHE dASA=16.28
-    ('A', 30),  # ASP dASA=41.64
-    ('A', 31),  # LYS dASA=90.72
-    ('A', 34),  # HIE dASA=70.98
-    ('A', 35),  # GLU dASA=13.29
-    ('A', 37),  # GLU dASA=13.14
-    ('A', 38),  # ASP dASA=32.81
-    ('A', 41),  # TYR dASA=42.76
-    ('A', 42),  # GLN dASA=46.50
-    ('A', 45),  # LEU dASA=29.05
-    ('A', 79),  # LEU dASA=24.87
-    ('A', 82),  # MET dASA=26.72
-    ('A', 83),  # TYR dASA=36.48
-    ('A', 324),  # THR dASA=2.61
-    ('A', 325),  # GLN dASA=8.14
-    ('A', 326),  # GLY dASA=2.53
-    ('A', 330),  # ASN dASA=29.07
-    ('A', 353),  # LYS dASA=97.16
-    ('A', 354),  # GLY dASA=29.72
-    ('A', 355),  # ASP dASA=12.19
-    ('A', 357),  # ARG dASA=12.65
-    ('A', 386),  # ALA dASA=0.48
-    ('A', 393),  # ARG dASA=11.02
-    ('E', 403),  # ARG dASA=1.56
-    ('E', 417),  # LYS dASA=28.71
-    ('E', 445),  # VAL dASA=7.03
-    ('E', 446),  # GLY dASA=17.40
-    ('E', 449),  # TYR dASA=36.01
-    ('E', 453),  # TYR dASA=23.58
-    ('E', 455),  # LEU dASA=40.94
-    ('E', 456),  # PHE dASA=45.15
-    ('E', 473),  # TYR dASA=6.15
-    ('E', 475),  # ALA dASA=39.16
-    ('E', 476),  # GLY dASA=11.27
-    ('E', 477),  # SER dASA=1.23
-    ('E', 484),  # GLU dASA=13.96
-    ('E', 485),  # GLY dASA=0.43
-    ('E', 486),  # PHE dASA=99.98
-    ('E', 487),  # ASN dASA=36.76
-    ('E', 489),  # TYR dASA=70.79
-    ('E', 490),  # PHE dASA=0.21
-    ('E', 493),  # GLN dASA=52.32
-    ('E', 496),  # GLY dASA=19.28
-    ('E', 498),  # GLN dASA=55.41
-    ('E', 500),  # THR dASA=92.02
-    ('E', 501),  # ASN dASA=29.47
-    ('E', 502),  # GLY dASA=35.19
-    ('E', 503),  # VAL dASA=7.99
-    ('E', 505),  # TYR dASA=87.37
-]
@@ -1,100 +1,107 @@
-import csv
-import matplotlib.pyplot as plt
-import pandas as pd  
-import interface_data
-from interaction_energy import (
-    compute_interaction_energy,
-    compute_interaction_energy_with_ala
-)
+import argparse
+
+from result_cache import cached_wt_energy, cached_alanine_scan
+from scan_runner import scan_rows, write_rows
 
 # load data
 PDBQT_FILE = "6m0j_fixed.pdbqt"
 ASA_COMPLEX = "6m0j_fixed.asa"
 ASA_A = "A.asa"
 ASA_E = "B.asa"
+INPUT_FILES = (PDBQT_FILE, ASA_COMPLEX, ASA_A, ASA_E)
 DDG_THRESHOLD = 1.0  # threshold to consider a residue a "hotspot"
 CSV_FILENAME = "alanine_scanning_results.csv"
 PLOT_FILENAME = "alanine_scanning_plot.png"
+SCAN_METHOD = "incremental"  # or "full" to recompute every mutant
+WORKERS = 1                  # worker processes for the scan (None = all cores)
+CHUNKSIZE = 4                # residues sent to a worker at a time
+
+
+def alanine_scanning(interface_residues, method=SCAN_METHOD, workers=WORKERS, chunksize=CHUNKSIZE):
+    """Prints the WT energy and the ddG of every interface residue; returns the result rows"""
+    # calculate WT energy (energies are read from the result cache when the inputs are unchanged)
+    print("\n1. Calculating WT Energy (Wild Type)")
+    WT_total, WT_lj, WT_elec, WT_solv = cached_wt_energy(INPUT_FILES)
+
+    print(f"WT Total Energy: {WT_total:.4f} kcal/mol")
+
+    # 2. Alanine Scanning
+    print("\n 2. Strarting Alanine Scanning")
+    print(f"{'Residue':<10} {'Total Mut':<12} {'ddG':<12} {'Status'}")
+
+    # Calculate mutant energies (in interface order, whatever the worker count)
+    mutant_energies = cached_alanine_scan(INPUT_FILES, interface_residues, method=method,
+                                         workers=workers, chunksize=chunksize)
+    results = scan_rows(WT_total, interface_residues, [mut[0] for mut in mutant_energies], DDG_THRESHOLD)
+
+    for row in results:
+        # Verify Hotspot
+        status = "HOTSPOT" if row["Is_Hotspot"] else ""
+        print(f"{row['Chain']}:{row['ResNum']:<7} {row['Energy_Mutant']:12.4f} {row['ddG']:+12.4f} {status}")
+    return results
+
+
+def plot_ddg(results, filename=PLOT_FILENAME, show=True):
+    """Bar plot of ddG per residue, hotspots in red"""
+    # the plotting libraries are only loaded when a plot is made
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    # Order DataFrame by ddG
+    df_sorted = pd.DataFrame(results).sort_values("ddG", ascending=False).reset_index(drop=True)
+
+    # Define scores colors
+    colors = ['red' if x > DDG_THRESHOLD else 'skyblue' for x in df_sorted["ddG"]]
+
+    plt.figure(figsize=(14, 7))
+
+    # Index for x-axis
+    plt.bar(df_sorted.index, df_sorted["ddG"], color=colors, edgecolor='black', alpha=0.8)
+    plt.xticks(df_sorted.index, df_sorted["Label"], rotation=90, fontsize=9)
+
+    # Reference lines
+    plt.axhline(y=0, color='black', linewidth=1)
+    plt.axhline(y=DDG_THRESHOLD, color='gray', linestyle='--', linewidth=1, label=f'Threshold ({DDG_THRESHOLD} kcal/mol)')
+
+    plt.ylabel(r'$\Delta\Delta G$ (kcal/mol) - (Positive = Destabilizing)')
+    plt.title('Alanine Scanning In-Silico: Contribution per Residue')
+    plt.legend()
+
+    for i, row in df_sorted.iterrows():
+        if row["ddG"] > DDG_THRESHOLD:
+            plt.text(i, row["ddG"] + 0.1,
+                     row["Label"],
+                     ha='center', va='bottom', fontsize=8, fontweight='bold', color='darkred')
+
+    plt.tight_layout()
+
+    # Save image
+    plt.savefig(filename, dpi=300)
+    if show:
+        plt.show()
+
+
+# alanine scan of the stored interface residues, e.g.
+#   python alanine_scanning_plot.py
+#   python alanine_scanning_plot.py --no-plot      (CSV only, matplotlib/pandas are not loaded)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alanine scanning of the interface residues, with a ddG bar plot")
+    parser.add_argument("--no-plot", action="store_true", help="only write the CSV")
+    parser.add_argument("--no-show", action="store_true", help="save the plot without opening a window")
+    args = parser.parse_args()
+
+    # load interface residues
+    from interface_store import interface_residues as stored_interface
+    interface_residues = stored_interface()
+    print(f"Interface residues: {len(interface_residues)} loaded.")
+
+    results = alanine_scanning(interface_residues)
+
+    # 3. Save results to CSV
+    write_rows(results, CSV_FILENAME)
+    print(f"\nCSV saved to: {CSV_FILENAME}")
 
-# load interface residues
-interface_residues = interface_data.INTERFACE_LIST
-print(f"Interface residues: {len(interface_residues)} loaded.")
-
-# calculate WT energy
-print("\n1. Calculating WT Energy (Wild Type)")
-WT_total, WT_lj, WT_elec, WT_solv = compute_interaction_energy(
-    PDBQT_FILE, ASA_COMPLEX, ASA_A, ASA_E, return_components=True, verbose=False
-)
-
-print(f"WT Total Energy: {WT_total:.4f} kcal/mol")
-
-# 2. Alanine Scanning
-results = []
-print("\n 2. Strarting Alanine Scanning")
-print(f"{'Residue':<10} {'Total Mut':<12} {'ddG':<12} {'Status'}")
-
-for chain, res in interface_residues:
-    # Calculate mutant energy
-    mut_total = compute_interaction_energy_with_ala(
-        PDBQT_FILE, chain, res, ASA_COMPLEX, ASA_A, ASA_E, return_components=False, verbose=False
-    )
-    
-    ddG = mut_total - WT_total
-    
-    # Verify Hotspot
-    status = "HOTSPOT" if ddG > DDG_THRESHOLD else ""
-    print(f"{chain}:{res:<7} {mut_total:12.4f} {ddG:+12.4f} {status}")
-    
-    # Save results
-    results.append({
-        "Chain": chain,
-        "ResNum": res,
-        "Label": f"{chain}:{res}",
-        "Energy_Mutant": mut_total,
-        "ddG": ddG,
-        "Is_Hotspot": ddG > DDG_THRESHOLD
-    })
-
-# 3. Save results to CSV
-# Create DataFrame
-df = pd.DataFrame(results)
-
-# Save to CSV
-df.to_csv(CSV_FILENAME, index=False)
-print(f"\nCSV saved to: {CSV_FILENAME}")
-
-
-# 4. Generate Plot
-print("\n 3. Generating Plot...")
-
-# Order DataFrame by ddG
-df_sorted = df.sort_values("ddG", ascending=False).reset_index(drop=True)
-
-# Define scores colors
-colors = ['red' if x > DDG_THRESHOLD else 'skyblue' for x in df_sorted["ddG"]]
-
-plt.figure(figsize=(14, 7))
-
-# Index for x-axis
-plt.bar(df_sorted.index, df_sorted["ddG"], color=colors, edgecolor='black', alpha=0.8)
-plt.xticks(df_sorted.index, df_sorted["Label"], rotation=90, fontsize=9)
-
-# Reference lines
-plt.axhline(y=0, color='black', linewidth=1)
-plt.axhline(y=DDG_THRESHOLD, color='gray', linestyle='--', linewidth=1, label=f'Threshold ({DDG_THRESHOLD} kcal/mol)')
-
-plt.ylabel('$\Delta\Delta G$ (kcal/mol) - (Positive = Destabilizing)')
-plt.title('Alanine Scanning In-Silico: Contribution per Residue')
-plt.legend()
-
-for i, row in df_sorted.iterrows():
-    if row["ddG"] > DDG_THRESHOLD:
-        plt.text(i, row["ddG"] + 0.1, 
-                 row["Label"], 
-                 ha='center', va='bottom', fontsize=8, fontweight='bold', color='darkred')
-
-plt.tight_layout()
-
-# Save image
-plt.savefig(PLOT_FILENAME, dpi=300)
-plt.show()
+    # 4. Generate Plot
+    if not args.no_plot:
+        print("\n 3. Generating Plot...")
+        plot_ddg(results, PLOT_FILENAME, show=not args.no_show)
@@ -0,0 +1,195 @@
+import argparse
+import csv
+import os
+import time
+
+import numpy as np
+
+from interaction_energy import (
+    ASA_THRESHOLD,
+    VDW_PRM_FILE,
+    compute_interaction_energy,
+    load_paramset,
+    read_atomic_asa,
+    records_table,
+)
+from pdb_io import read_pdbqt
+from result_cache import ResultCache, cache_key
+from sasa import N_POINTS, PROBE_RADIUS, atom_keys, coordinates, heavy_atoms, shrake_rupley
+from scan_runner import map_tasks
+from spatial import close_pairs
+import telemetry
+
+OUTPUT_CSV = "batch_results.csv"
+CSV_FIELDS = ["Complex", "Receptor", "Ligand", "Atoms", "Interface_ASA", "Interface_Distance",
+              "dG", "dG_vdw", "dG_elec", "dG_solv", "ASA_Source", "Seconds"]
+DISTANCE_CUTOFF = 8.0
+# optional manifest columns: NACCESS .asa files of the complex and of each side on its own
+ASA_FIELDS = ("asa_complex", "asa_receptor", "asa_ligand")
+
+
+def parse_chains(text):
+    """Chain ids of a manifest cell: "A", "HL", "H,L" or "H L" """
+    return tuple(c for c in text if c not in ", ;")
+
+
+def read_manifest(filename):
+    """[entry] from a CSV with columns name, structure, receptor, ligand (+ optional ASA_FIELDS).
+
+    structure is a .pdbqt (the charges are needed for the energy); receptor
+    and ligand are the chain ids of each side. Paths are relative to the
+    manifest. Entries with a missing file are skipped with a message.
+    """
+    base = os.path.dirname(filename)
+    entries = []
+    with open(filename, newline="") as f:
+        for row in csv.DictReader(f):
+            entry = {
+                "name": row["name"],
+                "structure": os.path.join(base, row["structure"]),
+                "receptor": parse_chains(row["receptor"]),
+                "ligand": parse_chains(row["ligand"]),
+                "asa": None,
+            }
+            asa = [row.get(k) or "" for k in ASA_FIELDS]
+            if any(asa):
+                if not all(asa):
+                    raise ValueError(f"{row['name']}: give all of {', '.join(ASA_FIELDS)} or none")
+                entry["asa"] = tuple(os.path.join(base, a) for a in asa)
+            missing = [p for p in (entry["structure"],) + (entry["asa"] or ()) if not os.path.exists(p)]
+            if missing:
+                print(f"Skipping {row['name']}: missing {', '.join(missing)}")
+                continue
+            if set(entry["receptor"]) & set(entry["ligand"]):
+                raise ValueError(f"{row['name']}: chain(s) on both sides of the interface")
+            entries.append(entry)
+    return entries
+
+
+def complex_table(structure, receptor, ligand, asa_files=None, prm_file=VDW_PRM_FILE,
+                  probe=PROBE_RADIUS, n_points=N_POINTS):
+    """AtomTable of the receptor and ligand chains of a .pdbqt.
+
+    The atomic ASA comes from the NACCESS files in asa_files (complex,
+    receptor, ligand) when given; otherwise it is computed in-process, the
+    free state being each side on its own (an antibody's heavy and light
+    chains stay together).
+    """
+    ff = load_paramset(prm_file)
+    records = read_pdbqt(structure)
+    records = records[np.isin(records["chain"], receptor + ligand)]
+    for side, chains in (("receptor", receptor), ("ligand", ligand)):
+        if not np.isin(records["chain"], chains).any():
+            raise KeyError(f"{structure}: no atoms in the {side} chain(s) {', '.join(chains)}")
+
+    keys = atom_keys(records)
+    if asa_files:
+        asa_c, asa_r, asa_l = (read_atomic_asa(f) for f in asa_files)
+        asa_bound = np.array([asa_c.get(k, 0.0) for k in keys])
+        asa_free = np.array([asa_r.get(k, 0.0) if k[0] in receptor else asa_l.get(k, 0.0) for k in keys])
+    else:
+        heavy, radii = heavy_atoms(records)
+        side = np.isin(heavy["chain"], receptor)
+        bound, free = shrake_rupley(coordinates(heavy), radii, side, probe, n_points)
+        index = {k: n for n, k in enumerate(atom_keys(heavy))}
+        rows = np.array([index.get(k, -1) for k in keys])
+        asa_bound = np.where(rows >= 0, bound[rows], 0.0)
+        asa_free = np.where(rows >= 0, free[rows], 0.0)
+
+    return records_table(records, ff, asa_bound, asa_free, receptor)
+
+
+def distance_interface_size(table, cutoff=DISTANCE_CUTOFF):
+    """Number of residues with an atom within cutoff of the other side"""
+    atoms = table.atoms
+    is_receptor = np.isin(atoms["chain"], table.receptor)
+    side_1, side_2 = atoms[is_receptor], atoms[~is_receptor]
+    i, j, _ = close_pairs(side_1["xyz"], side_2["xyz"], cutoff)
+    residues = set(zip(side_1["chain"][i].tolist(), side_1["resnum"][i].tolist()))
+    residues |= set(zip(side_2["chain"][j].tolist(), side_2["resnum"][j].tolist()))
+    return len(residues)
+
+
+def evaluate_complex(entry):
+    """Result row of one manifest entry: interface sizes and interaction energy"""
+    start = time.perf_counter()
+    table = complex_table(entry["structure"], entry["receptor"], entry["ligand"], entry["asa"])
+    total, E_vdw, E_elec, E_solv = compute_interaction_energy(table, return_components=True)
+    return {
+        "Complex": entry["name"],
+        "Receptor": "".join(entry["receptor"]),
+        "Ligand": "".join(entry["ligand"]),
+        "Atoms": len(table),
+        "Interface_ASA": len(table.interface()),
+        "Interface_Distance": distance_interface_size(table),
+        "dG": total, "dG_vdw": E_vdw, "dG_elec": E_elec, "dG_solv": E_solv,
+        "ASA_Source": "naccess" if entry["asa"] else "shrake-rupley",
+        "Seconds": time.perf_counter() - start,
+    }
+
+
+def run_batch(entries, workers=1, cache=None):
+    """Result rows (in manifest order) of every entry, evaluated across the worker pool.
+
+    Rows found in the result cache are reused; only the other complexes are
+    sent to the workers. Returns (rows, seconds).
+    """
+    start = time.perf_counter()
+    cache = cache or ResultCache()
+    keys = [cache_key("complex", (e["structure"],) + (e["asa"] or ()), receptor=e["receptor"],
+                      ligand=e["ligand"], cutoff=DISTANCE_CUTOFF, sasa=[PROBE_RADIUS, N_POINTS])
+            for e in entries]
+    # wall-clock times are not cached: a row read back from the cache has no Seconds
+    rows = [cache.get(k) for k in keys]
+    rows = [row if row is None else dict(row, Seconds=None) for row in rows]
+    todo = [n for n, row in enumerate(rows) if row is None]
+    for n, row in zip(todo, map_tasks(evaluate_complex, [entries[n] for n in todo], workers=workers)):
+        rows[n] = row
+        cache.put(keys[n], {k: v for k, v in row.items() if k != "Seconds"})
+    seconds = time.perf_counter() - start
+    telemetry.emit("batch", complexes=len(entries), computed=len(todo), seconds=seconds,
+                   per_minute=60 * len(entries) / seconds if seconds else None)
+    return rows, seconds
+
+
+def write_rows(rows, filename=OUTPUT_CSV):
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# interface and interaction energy of every complex of a manifest, e.g.
+#   python batch_energy.py complexes.csv --workers 8
+# complexes.csv:
+#   name,structure,receptor,ligand,asa_complex,asa_receptor,asa_ligand
+#   6m0j,6m0j_fixed.pdbqt,A,E,6m0j_fixed.asa,A.asa,B.asa
+#   7kmg,7kmg.pdbqt,HL,E,,,
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interface and interaction energy of many complexes")
+    parser.add_argument("manifest", help="CSV with columns name, structure, receptor, ligand "
+                                         f"[, {', '.join(ASA_FIELDS)}]")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (0 = all cores)")
+    parser.add_argument("-o", "--output", default=OUTPUT_CSV)
+    parser.add_argument("--telemetry", help="append JSON-lines stage timings and progress to this file")
+    args = parser.parse_args()
+    if args.telemetry:
+        telemetry.enable(args.telemetry)
+
+    try:
+        entries = read_manifest(args.manifest)
+    except (KeyError, ValueError) as e:
+        parser.error(f"{args.manifest}: {e}")
+    print(f"Complexes: {len(entries)}")
+    rows, seconds = run_batch(entries, workers=args.workers or None)
+
+    print(f"{'Complex':<12} {'Rec':>4} {'Lig':>4} {'ΔASA':>5} {'dist':>5} {'ΔG':>10} "
+          f"{'vdW':>10} {'elec':>10} {'solv':>10}")
+    for row in rows:
+        print(f"{row['Complex']:<12} {row['Receptor']:>4} {row['Ligand']:>4} {row['Interface_ASA']:>5} "
+              f"{row['Interface_Distance']:>5} {row['dG']:10.3f} {row['dG_vdw']:10.3f} "
+              f"{row['dG_elec']:10.3f} {row['dG_solv']:10.3f}")
+    write_rows(rows, args.output)
+    rate = 60 * len(rows) / seconds if seconds else float("inf")
+    print(f"\n{len(rows)} complexes in {seconds:.2f} s ({rate:.1f} complexes/min)")
+    print(f"CSV saved to: {args.output}")
@@ -0,0 +1,289 @@
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+import interaction_energy
+import pdb_io
+from interaction_energy import (
+    PDB_FILE,
+    ASA_COMPLEX,
+    ASA_CHAIN_A,
+    ASA_CHAIN_E,
+    AtomTable,
+    atom_arrays,
+    load_atom_table,
+    pair_energies,
+    solvation_energy,
+    use_elec_table,
+)
+
+OUTPUT_JSON = "benchmark_energy.json"
+SCALES = (1, 10, 25, 50)
+COPY_SPACING = 200.0    # A between replicated complexes, far beyond the 12 A cutoff
+LOOP_MAX_PAIRS = 2_000_000
+READ_FILES = ("6m0j_fixed.pdbqt", "6m0j_fixed.asa", "A.asa", "B.asa", "6m0j_fixed.rsa")
+
+
+def atom_dicts(atoms):
+    return [{"x": x, "y": y, "z": z, "q": q, "eps": eps, "sig": sig}
+            for (x, y, z), q, eps, sig in zip(atoms["xyz"].tolist(), atoms["q"].tolist(),
+                                              atoms["eps"].tolist(), atoms["sig"].tolist())]
+
+
+def loop_pair_energies(atoms_A, atoms_E, ff):
+    """Reference per-pair Python loop over atom dicts (the original implementation)"""
+    atoms_A, atoms_E = atom_dicts(atoms_A), atom_dicts(atoms_E)
+    E_vdw = 0.0
+    E_elec = 0.0
+    for a1 in atoms_A:
+        for a2 in atoms_E:
+            dx = a1["x"] - a2["x"]
+            dy = a1["y"] - a2["y"]
+            dz = a1["z"] - a2["z"]
+            r2 = dx*dx + dy*dy + dz*dz
+
+            if r2 < 0.1 or r2 > 144:
+                continue
+
+            r = math.sqrt(r2)
+
+            sig = 0.5 * (a1["sig"] + a2["sig"])
+            eps = math.sqrt(a1["eps"] * a2["eps"])
+            E_vdw += 4 * eps * ((sig/r)**12 - (sig/r)**6)
+
+            if abs(a1["q"]) > 1e-4 and abs(a2["q"]) > 1e-4:
+                denom = 1 - 7.7839 * math.exp(-0.3153*r)
+                denom = max(denom, 0.01)
+                eps_r = max((86.9525 / denom) - 8.5525, 1.0)
+                E_elec += 332.16 * a1["q"] * a2["q"] / (eps_r * r)
+    return E_vdw, E_elec
+
+
+def numpy_backend(atoms_A, atoms_E, ff):
+    return pair_energies(*atom_arrays(atoms_A), *atom_arrays(atoms_E), ff)
+
+
+def tabulated_backend(atoms_A, atoms_E, ff):
+    use_elec_table(0.01)
+    try:
+        return pair_energies(*atom_arrays(atoms_A), *atom_arrays(atoms_E), ff)
+    finally:
+        use_elec_table(None)
+
+
+BACKENDS = {
+    "loop": loop_pair_energies,
+    "numpy": numpy_backend,
+    "numpy_tabulated": tabulated_backend,
+}
+
+
+def line_read_pdbqt(filename):
+    """Reference line-by-line PDBQT reader (the original string slicing)"""
+    rows = []
+    with open(filename) as f:
+        for line in f:
+            if line.startswith(("ATOM", "HETATM")):
+                rows.append((line[21], int(line[22:26]), line[12:16].strip(),
+                             float(line[30:38]), float(line[38:46]), float(line[46:54]),
+                             float(line[70:76]) if len(line) > 76 else 0.0, line[77:].strip()))
+    return rows
+
+
+def line_read_asa(filename):
+    """Reference line-by-line .asa reader (the original read_atomic_asa)"""
+    data = {}
+    with open(filename) as f:
+        for line in f:
+            if line.startswith("ATOM"):
+                data[(line[21], int(line[22:26]), line[12:16].strip())] = float(line[54:62])
+    return data
+
+
+def line_read_rsa(filename):
+    """Reference line-by-line .rsa reader (the original read_rsa)"""
+    data = {}
+    with open(filename) as f:
+        for line in f:
+            if line.startswith("RES"):
+                parts = line.split()
+                data[(parts[2], int(parts[3]))] = float(parts[4])
+    return data
+
+
+# (reference reader, bulk parser columns, record prefixes) per file extension
+READERS = {
+    ".pdbqt": (line_read_pdbqt, pdb_io.PDBQT_COLUMNS, ("ATOM", "HETATM")),
+    ".asa": (line_read_asa, pdb_io.ASA_COLUMNS, ("ATOM",)),
+    ".rsa": (line_read_rsa, pdb_io.RSA_COLUMNS, ("RES",)),
+}
+
+
+def bench_readers(files, repeat, chunk_bytes=1 << 16):
+    """Times the line-by-line readers against the bulk and streaming parsers on each file"""
+    results = []
+    for filename in files:
+        reference, columns, prefixes = READERS[os.path.splitext(filename)[1]]
+        backends = {
+            "lines": lambda: reference(filename),
+            "bulk": lambda: pdb_io.read_records(filename, columns, prefixes, compiled=False),
+            "stream": lambda: [len(r) for r in pdb_io.iter_records(filename, columns, prefixes, chunk_bytes)],
+        }
+        size = os.path.getsize(filename)
+        for name, func in backends.items():
+            seconds, _ = best_time(func, repeat)
+            results.append({"stage": "read", "backend": name, "file": os.path.basename(filename),
+                            "seconds": seconds, "bytes": size, "mb_per_sec": size / seconds / 1e6})
+    return results
+
+
+def replicate_table(table, copies, spacing=COPY_SPACING):
+    """Synthetic complex made of `copies` translated replicas of table.
+
+    Each replica is shifted by spacing along x and its residues renumbered,
+    so interfaces stay within a replica while the atom count scales.
+    """
+    if copies == 1:
+        return table
+    offset = 10 ** len(str(int(table.atoms["resnum"].max())))
+    parts = []
+    residue_asa = {}
+    for k in range(copies):
+        part = table.atoms.copy()
+        part["xyz"][:, 0] += k * spacing
+        part["resnum"] += k * offset
+        parts.append(part)
+        for (chain, res), value in table.residue_asa.items():
+            residue_asa[(chain, res + k * offset)] = value
+    return AtomTable(np.concatenate(parts), table.ff, residue_asa)
+
+
+def best_time(func, repeat):
+    """Smallest wall time of `repeat` calls, and the last result"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_parse(files, repeat):
+    seconds, table = best_time(lambda: load_atom_table(*files, compiled=False), repeat)
+    return {"stage": "parse", "seconds": seconds, "atoms": len(table),
+            "atoms_per_sec": len(table) / seconds}, table
+
+
+def bench_structure(table, scale, backends, repeat, loop_max_pairs=LOOP_MAX_PAIRS):
+    """Times interface detection, solvation and every pair backend on one structure"""
+    results = []
+
+    def interface():
+        table._interface_mask.clear()
+        return table.interface_mask()
+
+    seconds, mask = best_time(interface, repeat)
+    results.append({"stage": "interface", "scale": scale, "seconds": seconds,
+                    "atoms": len(table), "atoms_per_sec": len(table) / seconds})
+
+    selected = table.atoms[mask]
+    seconds, _ = best_time(lambda: solvation_energy(selected), repeat)
+    results.append({"stage": "solvation", "scale": scale, "seconds": seconds,
+                    "atoms": len(selected), "atoms_per_sec": len(selected) / seconds})
+
+    is_A = np.isin(selected["chain"], table.receptor)
+    atoms_A, atoms_E = selected[is_A], selected[~is_A]
+    pairs = len(atoms_A) * len(atoms_E)
+    for name in backends:
+        if name == "loop" and pairs > loop_max_pairs:
+            results.append({"stage": "pairs", "backend": name, "scale": scale, "pairs": pairs,
+                            "skipped": f"more than {loop_max_pairs} pairs"})
+            continue
+        seconds, (E_vdw, E_elec) = best_time(
+            lambda: BACKENDS[name](atoms_A, atoms_E, table.ff), 1 if name == "loop" else repeat
+        )
+        results.append({"stage": "pairs", "backend": name, "scale": scale, "seconds": seconds,
+                        "atoms": len(selected), "pairs": pairs, "pairs_per_sec": pairs / seconds,
+                        "E_vdw": E_vdw, "E_elec": E_elec})
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(files=(PDB_FILE, ASA_COMPLEX, ASA_CHAIN_A, ASA_CHAIN_E),
+                   scales=SCALES, backends=tuple(BACKENDS), repeat=3, read_files=READ_FILES):
+    results = bench_readers([f for f in read_files if os.path.exists(f)], repeat)
+    parse_result, table = bench_parse(files, repeat)
+    results.append(parse_result)
+    for scale in scales:
+        results += bench_structure(replicate_table(table, scale), scale, backends, repeat)
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "pair_block": interaction_energy.PAIR_BLOCK,
+        "results": results,
+    }
+
+
+def result_label(r):
+    return "/".join(str(r[k]) for k in ("stage", "backend", "file", "scale") if k in r)
+
+
+def compare(report, baseline):
+    """Prints the speed ratio of every timed stage against a previous report"""
+    old = {result_label(r): r for r in baseline["results"] if "seconds" in r}
+    print(f"\nComparison with {baseline.get('revision')} (ratio > 1 = faster now)")
+    for r in report["results"]:
+        label = result_label(r)
+        if "seconds" in r and label in old:
+            print(f"{label:<36} {old[label]['seconds'] / r['seconds']:8.2f}x")
+
+
+# e.g.  python benchmark_energy.py --scales 1 10 50 -o bench.json --compare bench_old.json
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the interaction-energy stages and pair backends")
+    parser.add_argument("--scales", type=int, nargs="*", default=list(SCALES),
+                        help="replication factors for the synthetic complexes")
+    parser.add_argument("--backends", nargs="*", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", default=OUTPUT_JSON)
+    parser.add_argument("--compare", help="previous JSON report to compare against")
+    args = parser.parse_args()
+
+    report = run_benchmarks(scales=args.scales, backends=args.backends, repeat=args.repeat)
+
+    print(f"{'Stage':<36} {'Atoms':>9} {'Pairs':>12} {'Time (s)':>10} {'Rate (/s)':>12}")
+    for r in report["results"]:
+        if "skipped" in r:
+            print(f"{result_label(r):<36} {'':>9} {r['pairs']:>12} {'skipped':>10}")
+            continue
+        if r["stage"] == "read":
+            print(f"{result_label(r):<36} {r['bytes']:>9} {'':>12} {r['seconds']:10.4f} "
+                  f"{r['mb_per_sec']:9.1f} MB")
+            continue
+        rate = r.get("pairs_per_sec", r.get("atoms_per_sec"))
+        print(f"{result_label(r):<36} {r['atoms']:>9} {r.get('pairs', ''):>12} "
+              f"{r['seconds']:10.4f} {rate:12.3e}")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"\nJSON saved to: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
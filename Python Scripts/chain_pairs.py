@@ -0,0 +1,181 @@
+import argparse
+import csv
+import os
+
+import numpy as np
+
+from contacts import CUTOFF, distance_interface
+from interaction_energy import (
+    ASA_THRESHOLD,
+    VDW_PRM_FILE,
+    atom_arrays,
+    build_atoms,
+    load_paramset,
+    pair_energies,
+)
+from interface_store import INTERFACE_DTYPE, InterfaceStore
+from pdb_io import Structure, read_pdbqt, residue_index
+from sasa import N_POINTS, PROBE_RADIUS, atom_radii, shrake_rupley
+from spatial import close_pairs
+import telemetry
+
+OUTPUT_CSV = "chain_pairs.csv"
+CSV_FIELDS = ["Chain_1", "Chain_2", "Atom_Contacts", "Interface_1", "Interface_2", "Distance_1", "Distance_2",
+              "dG", "dG_vdw", "dG_elec", "dG_solv"]
+
+
+class ChainPair():
+    """Interface between two chains of an assembly.
+
+    interface holds the INTERFACE_DTYPE records of the residues of both
+    chains whose ASA drops by more than the threshold when the two chains
+    bind (the rest of the assembly left out); distance the (chain, resnum)
+    of the residues with any atom within the distance cutoff of the other
+    chain, as contacts.distance_interface gives it; contacts counts the
+    heavy-atom pairs within the cutoff; energy is (total, E_vdw, E_elec,
+    E_solv) over the interface atoms.
+    """
+
+    def __init__(self, chain_1, chain_2, contacts, interface, distance, energy):
+        self.chain_1 = chain_1
+        self.chain_2 = chain_2
+        self.contacts = contacts
+        self.interface = interface
+        self.distance = distance
+        self.energy = energy
+
+    def residues(self, chain):
+        return set(zip(self.interface["chain"][self.interface["chain"] == chain].tolist(),
+                       self.interface["resnum"][self.interface["chain"] == chain].tolist()))
+
+    def row(self):
+        total, E_vdw, E_elec, E_solv = self.energy
+        return {
+            "Chain_1": self.chain_1, "Chain_2": self.chain_2, "Atom_Contacts": self.contacts,
+            "Interface_1": int(np.sum(self.interface["chain"] == self.chain_1)),
+            "Interface_2": int(np.sum(self.interface["chain"] == self.chain_2)),
+            "Distance_1": sum(1 for c, _ in self.distance if c == self.chain_1),
+            "Distance_2": sum(1 for c, _ in self.distance if c == self.chain_2),
+            "dG": total, "dG_vdw": E_vdw, "dG_elec": E_elec, "dG_solv": E_solv,
+        }
+
+
+def chain_pairs(pdbqt_file, chains=None, cutoff=CUTOFF, threshold=ASA_THRESHOLD, prm_file=VDW_PRM_FILE,
+                probe=PROBE_RADIUS, n_points=N_POINTS):
+    """[ChainPair] of every pair of chains in contact, from one neighbour search over the assembly.
+
+    The inter-chain heavy-atom pairs closer than the larger of cutoff and the
+    SASA sphere-overlap distance come from a single cell list over all the
+    chains, so only the chain pairs that touch are ever looked at. For each
+    of them the ASA of the residues within overlap distance of the other
+    chain is recomputed with both chains (bound) and each chain alone (free);
+    the rest of the assembly is left out.
+    """
+    ff = load_paramset(prm_file)
+    records = read_pdbqt(pdbqt_file)
+    if chains:
+        records = records[np.isin(records["chain"], chains)]
+    atoms = build_atoms(records, ff, np.zeros(len(records)), np.zeros(len(records)))
+    structure = Structure(records)
+    residue, residues = residue_index(records)
+    _, first_atom = np.unique(residue, return_index=True)
+    chain_ids, chain_code = np.unique(records["chain"], return_inverse=True)
+    chain_ids, chain_code = chain_ids.tolist(), chain_code.ravel()
+
+    radii = atom_radii(records)
+    heavy = np.flatnonzero(~np.isnan(radii) & (radii > 0))
+    xyz, radii = atoms["xyz"][heavy], radii[heavy]
+    heavy_residue, heavy_chain = residue[heavy], chain_code[heavy]
+    R = radii + probe
+    with telemetry.stage("neighbours", atoms=len(heavy)) as stage:
+        i, j, d2 = close_pairs(xyz, None, max(cutoff, 2 * R.max() if len(R) else 0.0), heavy_chain)
+        stage.count(pairs=len(i))
+
+    # every inter-chain pair once, grouped by chain pair
+    cross = np.flatnonzero(heavy_chain[i] < heavy_chain[j])
+    pair_code = heavy_chain[i[cross]] * len(chain_ids) + heavy_chain[j[cross]]
+    order = np.argsort(pair_code, kind="stable")
+    cross, pair_code = cross[order], pair_code[order]
+    codes, group_start = np.unique(pair_code, return_index=True)
+    group_stop = np.append(group_start[1:], len(cross))
+
+    results = []
+    for code, start, stop in zip(codes.tolist(), group_start.tolist(), group_stop.tolist()):
+        a, b = divmod(code, len(chain_ids))
+        k = cross[start:stop]
+        with telemetry.stage("chain_pair", pairs=len(k)):
+            # whole residues with an atom that the other chain may bury
+            overlap = d2[k] < (R[i[k]] + R[j[k]]) ** 2
+            touching = np.union1d(heavy_residue[i[k][overlap]], heavy_residue[j[k][overlap]])
+            targets = np.flatnonzero(np.isin(heavy_residue, touching))
+            local = np.flatnonzero((heavy_chain == a) | (heavy_chain == b))
+            bound, free = shrake_rupley(xyz[local], radii[local], heavy_chain[local], probe, n_points,
+                                        atoms=np.searchsorted(local, targets))
+            asa_bound, asa_free = np.zeros(len(records)), np.zeros(len(records))
+            asa_bound[heavy[targets]], asa_free[heavy[targets]] = bound, free
+
+            # ΔASA interface, and the energy between the atoms of its residues on either side
+            res_bound = np.bincount(residue, asa_bound, len(residues))
+            res_free = np.bincount(residue, asa_free, len(residues))
+            in_interface = np.flatnonzero(res_free - res_bound > threshold)
+            interface = np.zeros(len(in_interface), dtype=INTERFACE_DTYPE)
+            for field in ("chain", "resnum", "resname"):
+                interface[field] = records[field][first_atom[in_interface]]
+            interface["asa_bound"], interface["asa_free"] = res_bound[in_interface], res_free[in_interface]
+            interface["dasa"] = interface["asa_free"] - interface["asa_bound"]
+
+            selected = np.isin(residue, in_interface)
+            E_vdw, E_elec = pair_energies(*atom_arrays(atoms[selected & (chain_code == a)]),
+                                          *atom_arrays(atoms[selected & (chain_code == b)]), ff)
+            E_solv = float(np.sum(atoms["fsrf"][selected] * (asa_bound[selected] - asa_free[selected])))
+
+            close = k[d2[k] <= cutoff * cutoff]
+            distance, _ = distance_interface(pdbqt_file, cutoff, chain_ids[a], (chain_ids[b],), structure)
+        results.append(ChainPair(chain_ids[a], chain_ids[b], len(close), interface, distance,
+                                 (E_vdw + E_elec + E_solv, E_vdw, E_elec, E_solv)))
+    return results
+
+
+def write_rows(pairs, filename=OUTPUT_CSV):
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(pair.row() for pair in pairs)
+
+
+# interface and interaction energy of every pair of chains in contact, e.g.
+#   python chain_pairs.py assembly.pdbqt
+#   python chain_pairs.py 6m0j_fixed.pdbqt --store      (keys 6m0j_fixed.A-E, ... in the interface store)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="All-vs-all chain interfaces and energies of an assembly")
+    parser.add_argument("pdbqt", help="assembly with charges (.pdbqt)")
+    parser.add_argument("--chains", nargs="+", help="only these chains (default: all)")
+    parser.add_argument("--cutoff", type=float, default=CUTOFF, help="distance interface cutoff (A)")
+    parser.add_argument("--threshold", type=float, default=ASA_THRESHOLD, help="ΔASA interface threshold (A^2)")
+    parser.add_argument("-o", "--output", default=OUTPUT_CSV)
+    parser.add_argument("--store", action="store_true",
+                        help="save every pair's ΔASA interface in the interface store as <name>.<chain>-<chain>")
+    parser.add_argument("--telemetry", help="append JSON-lines stage timings to this file")
+    args = parser.parse_args()
+    if args.telemetry:
+        telemetry.enable(args.telemetry)
+
+    pairs = chain_pairs(args.pdbqt, args.chains, args.cutoff, args.threshold)
+    print(f"{len(pairs)} chain pairs in contact")
+    print(f"{'Pair':<6} {'contacts':>8} {'ΔASA res':>9} {'dist res':>9} {'ΔG':>10} {'vdW':>10} {'elec':>10} {'solv':>10}")
+    for pair in pairs:
+        row = pair.row()
+        print(f"{pair.chain_1}-{pair.chain_2:<4} {row['Atom_Contacts']:>8} "
+              f"{row['Interface_1'] + row['Interface_2']:>9} {row['Distance_1'] + row['Distance_2']:>9} "
+              f"{row['dG']:10.3f} {row['dG_vdw']:10.3f} {row['dG_elec']:10.3f} {row['dG_solv']:10.3f}")
+    write_rows(pairs, args.output)
+    print(f"CSV saved to: {args.output}")
+
+    if args.store:
+        store = InterfaceStore()
+        name = os.path.splitext(os.path.basename(args.pdbqt))[0]
+        for pair in pairs:
+            key = f"{name}.{pair.chain_1}-{pair.chain_2}"
+            store.put(key, pair.interface, "dasa-pair", args.threshold, [args.pdbqt],
+                      chains=[pair.chain_1, pair.chain_2])
+        print(f"Stored {len(pairs)} interfaces in '{store.directory}'")
@@ -0,0 +1,70 @@
+import os
+import sys
+
+# command: (module run as __main__, summary); nothing is imported until a command runs,
+# so the dispatcher itself starts without loading numpy, matplotlib, pandas or Bio
+COMMANDS = {
+    "energy": ("interaction_energy", "WT interaction energy of the complex"),
+    "scan": ("scan_runner", "parallel alanine scanning of the interface residues"),
+    "scan-check": ("alanine_scan", "check the incremental alanine scan against full recomputation"),
+    "scan-plot": ("alanine_scanning_plot", "alanine scanning with a ddG bar plot"),
+    "correlation": ("compare_scanning_vs_energy", "alanine scanning ddG against direct residue energies"),
+    "decompose": ("decomposition", "export the WT residue-pair energy table"),
+    "variants": ("variant_energy", "batch ΔΔG of variant models against the WT complex"),
+    "saturation": ("saturation", "ΔΔG matrix of every amino-acid substitution at the interface positions"),
+    "batch": ("batch_energy", "interface and interaction energy of every complex of a manifest"),
+    "trajectory": ("trajectory_energy", "interaction energy time series over a trajectory"),
+    "sasa": ("sasa", "in-process Shrake-Rupley SASA of a complex and its free chains"),
+    "interface-asa": ("interface_asa_variation", "ΔASA interface, saved in the interface store"),
+    "interface-distance": ("interface_distance", "distance interface at 8 A"),
+    "contacts": ("contacts", "distance interface for several cutoffs from one neighbour search"),
+    "chain-pairs": ("chain_pairs", "interface and energy of every pair of chains in contact in an assembly"),
+    "compare": ("compare_interfaces", "distance vs ΔASA interface statistics"),
+    "sweep": ("interface_sweep", "distance cutoff x ΔASA threshold interface sweep"),
+    "mutant": ("create_mutant_pdb", "write an alanine mutant PDB"),
+    "pymol-asa": ("create_interface_pymol_asa_variation", "PyMOL script of the ΔASA interface"),
+    "pymol-distance": ("create_interface_pymol_distance", "PyMOL script of the distance interface"),
+    "pymol-compare": ("compare_interfaces_pymol", "PyMOL script comparing both interface definitions"),
+    "pymol-hotspots": ("pymol_visualization_hotspots", "PyMOL script of the hotspot interactions"),
+    "pymol-hydrophobicity": ("visualize_hydrophobicity_pymol", "PyMOL script of the hydrophobic pocket"),
+    "compile": ("compile_structures", "compile structure files into binary caches"),
+    "cache": ("result_cache", "manage the on-disk energy result cache"),
+    "benchmark": ("benchmark_energy", "benchmark the energy stages and pair backends"),
+}
+
+
+def usage():
+    width = max(len(name) for name in COMMANDS)
+    lines = ["usage: cli.py COMMAND [ARGS...]", "",
+             "Run from the data folder; ARGS are passed to the command (COMMAND --help for its options).", "",
+             "commands:"]
+    lines += [f"  {name:<{width}}  {summary}" for name, (_, summary) in COMMANDS.items()]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0
+    name, args = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(f"cli.py: unknown command '{name}'\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    import runpy
+
+    module = COMMANDS[name][0]
+    # the scripts may import modules kept in the working directory
+    if os.getcwd() not in sys.path:
+        sys.path.insert(1, os.getcwd())
+    sys.argv = [f"{module}.py"] + args
+    runpy.run_module(module, run_name="__main__", alter_sys=True)
+    return 0
+
+
+# single entry point for all the scripts, e.g.
+#   python "../Python Scripts/cli.py" energy
+#   python "../Python Scripts/cli.py" scan --workers 8
+if __name__ == "__main__":
+    sys.exit(main())
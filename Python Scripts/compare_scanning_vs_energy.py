@@ -1,84 +1,109 @@
-import matplotlib.pyplot as plt
-import pandas as pd
+import argparse
+
 import numpy as np
-import interface_data
-from interaction_energy import (
-    compute_interaction_energy,
-    compute_interaction_energy_with_ala,
-    compute_wt_residue_contribution
-)
+
+from result_cache import cached_wt_energy, cached_alanine_scan, cached_residue_contributions
 
 
 PDBQT_FILE = "6m0j_fixed.pdbqt"
 ASA_COMPLEX = "6m0j_fixed.asa"
 ASA_A = "A.asa"
 ASA_E = "B.asa"
+INPUT_FILES = (PDBQT_FILE, ASA_COMPLEX, ASA_A, ASA_E)
+SCAN_METHOD = "incremental"  # or "full" to recompute every mutant
+WORKERS = 1                  # worker processes for the scan (None = all cores)
+CHUNKSIZE = 4
+
+
+def scanning_vs_direct(interface_residues, method=SCAN_METHOD, workers=WORKERS, chunksize=CHUNKSIZE):
+    """Rows with the alanine scanning ddG and the direct interaction energy of every residue"""
+    # energies are read from the result cache when the inputs are unchanged
+    print("Calculando energia WT global...")
+    WT_total = cached_wt_energy(INPUT_FILES)[0]
+
+    # direct energies: row/column sums of the residue x residue decomposition
+    direct_energies = cached_residue_contributions(INPUT_FILES, interface_residues)
 
+    results = []
 
-interface_residues = interface_data.INTERFACE_LIST
-print(f"Interface residues: {len(interface_residues)}")
+    print(f"{'Residue':<10} {'ddG (Ala)':<12} {'Direct Energy':<15}")
 
+    mutant_energies = cached_alanine_scan(INPUT_FILES, interface_residues, method=method,
+                                         workers=workers, chunksize=chunksize)
 
-print("Calculando energia WT global...")
-WT_total = compute_interaction_energy(
-    PDBQT_FILE, ASA_COMPLEX, ASA_A, ASA_E, return_components=False
-)
+    for (chain, res), mut, direct_energy in zip(interface_residues, mutant_energies, direct_energies):
+        mut_total = mut[0]
+        ddG = mut_total - WT_total
 
-results = []
+        print(f"{chain}:{res:<7} {ddG:12.4f} {direct_energy:15.4f}")
 
-print(f"{'Residue':<10} {'ddG (Ala)':<12} {'Direct Energy':<15}")
+        results.append({
+            "Label": f"{chain}:{res}",
+            "ddG": ddG,
+            "Direct_Energy": direct_energy
+        })
+    return results
 
-for chain, res in interface_residues:
-    mut_total = compute_interaction_energy_with_ala(
-        PDBQT_FILE, chain, res, ASA_COMPLEX, ASA_A, ASA_E, return_components=False
-    )
-    ddG = mut_total - WT_total 
-    direct_energy = compute_wt_residue_contribution(
-        PDBQT_FILE, chain, res, ASA_COMPLEX, ASA_A, ASA_E
-    )
 
-    print(f"{chain}:{res:<7} {ddG:12.4f} {direct_energy:15.4f}")
+def correlation(results):
+    """Pearson R between the direct energies and the ddG values"""
+    return float(np.corrcoef([r["Direct_Energy"] for r in results], [r["ddG"] for r in results])[0, 1])
 
-    results.append({
-        "Label": f"{chain}:{res}",
-        "ddG": ddG,
-        "Direct_Energy": direct_energy
-    })
 
-df = pd.DataFrame(results)
+def plot_correlation(results, filenames=("correlation_plot.png", "comparison_plot.png")):
+    """Scatter of ddG against direct energy with a linear fit, saved under every name in filenames"""
+    # the plotting libraries are only loaded when a plot is made
+    import matplotlib.pyplot as plt
+    import pandas as pd
 
+    df = pd.DataFrame(results)
 
-plt.figure(figsize=(8, 8))
-plt.scatter(df["Direct_Energy"], df["ddG"], color='blue', alpha=0.7, edgecolors='k')
+    plt.figure(figsize=(8, 8))
+    plt.scatter(df["Direct_Energy"], df["ddG"], color='blue', alpha=0.7, edgecolors='k')
 
+    z = np.polyfit(df["Direct_Energy"], df["ddG"], 1)
+    p = np.poly1d(z)
+    plt.plot(df["Direct_Energy"], p(df["Direct_Energy"]), "r--", label=f"Fit: y={z[0]:.2f}x + {z[1]:.2f}")
 
-z = np.polyfit(df["Direct_Energy"], df["ddG"], 1)
-p = np.poly1d(z)
-plt.plot(df["Direct_Energy"], p(df["Direct_Energy"]), "r--", label=f"Fit: y={z[0]:.2f}x + {z[1]:.2f}")
+    plt.xlabel("Direct Interaction Energy (kcal/mol)\n(Negative = Attractive)")
+    plt.ylabel("Alanine Scanning $\\Delta\\Delta G$ (kcal/mol)\n(Positive = Destabilizing)")
+    plt.title("Correlation: Direct Energy vs Alanine Scanning")
+    plt.grid(True, linestyle='--', alpha=0.5)
+    plt.axhline(0, color='black', linewidth=0.8)
+    plt.axvline(0, color='black', linewidth=0.8)
 
+    corr = df["Direct_Energy"].corr(df["ddG"])
+    plt.legend([f"Correlation (R): {corr:.4f}", "Trendline"])
 
-plt.xlabel("Direct Interaction Energy (kcal/mol)\n(Negative = Attractive)")
-plt.ylabel("Alanine Scanning $\Delta\Delta G$ (kcal/mol)\n(Positive = Destabilizing)")
-plt.title("Correlation: Direct Energy vs Alanine Scanning")
-plt.grid(True, linestyle='--', alpha=0.5)
-plt.axhline(0, color='black', linewidth=0.8)
-plt.axvline(0, color='black', linewidth=0.8)
+    for i, row in df.iterrows():
+        if row["ddG"] > 1.0 or row["Direct_Energy"] < -2.0:
+            plt.text(row["Direct_Energy"], row["ddG"], row["Label"], fontsize=8)
 
+    plt.tight_layout()
+    for filename in filenames:
+        plt.savefig(filename, dpi=300)
 
-corr = df["Direct_Energy"].corr(df["ddG"])
-plt.legend([f"Correlation (R): {corr:.4f}", "Trendline"])
 
+# correlation between alanine scanning ddG and the direct residue energies, e.g.
+#   python compare_scanning_vs_energy.py
+#   python compare_scanning_vs_energy.py --no-plot     (only print R, matplotlib/pandas are not loaded)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alanine scanning ddG against direct residue interaction energies")
+    parser.add_argument("--no-plot", action="store_true", help="only print the table and the correlation")
+    args = parser.parse_args()
 
-for i, row in df.iterrows():
-    if row["ddG"] > 1.0 or row["Direct_Energy"] < -2.0: 
-        plt.text(row["Direct_Energy"], row["ddG"], row["Label"], fontsize=8)
+    from interface_store import interface_residues as stored_interface
+    interface_residues = stored_interface()
+    print(f"Interface residues: {len(interface_residues)}")
 
-plt.tight_layout()
-plt.savefig("correlation_plot.png", dpi=300)
-print(f"\nCorrelation Plot saved to correlation_plot.png")
-print(f"Correlation Coefficient: {corr:.4f}")
+    results = scanning_vs_direct(interface_residues)
+    corr = correlation(results)
 
+    if not args.no_plot:
+        plot_correlation(results)
+        print(f"\nCorrelation Plot saved to correlation_plot.png")
+    print(f"Correlation Coefficient: {corr:.4f}")
 
-output_filename = "comparison_plot.png"
-plt.savefig(output_filename, dpi=300)
-print(f"\nGráfico guardado como: {output_filename}")
\ No newline at end of file
+    if not args.no_plot:
+        output_filename = "comparison_plot.png"
+        print(f"\nGráfico guardado como: {output_filename}")
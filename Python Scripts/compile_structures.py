@@ -0,0 +1,61 @@
+import argparse
+import glob
+import os
+import time
+
+from interaction_energy import (
+    PDB_FILE,
+    ASA_COMPLEX,
+    ASA_CHAIN_A,
+    ASA_CHAIN_E,
+    VDW_PRM_FILE,
+    atom_table_path,
+    compile_atom_table,
+    load_atom_table,
+)
+from pdb_io import FORMATS, compile_records
+from variant_energy import discover_variants
+
+
+def structure_sets(directory="."):
+    """{name: (pdbqt, asa_complex, asa_A, asa_E)} for the WT complex and every mut_<X> set"""
+    sets = {}
+    wt = tuple(os.path.join(directory, f) for f in (PDB_FILE, ASA_COMPLEX, ASA_CHAIN_A, ASA_CHAIN_E))
+    if os.path.exists(wt[0]):
+        sets["WT"] = wt
+    sets.update(discover_variants(directory))
+    return sets
+
+
+def compile_directory(directory=".", prm_file=VDW_PRM_FILE, force=False):
+    """Compiles every record file and structure set of directory; returns the paths written.
+
+    A relative prm_file is taken in directory, like the structure files.
+    """
+    prm_file = os.path.join(directory, prm_file)
+    written = [compile_records(f, force) for ext in FORMATS
+               for f in sorted(glob.glob(os.path.join(directory, "*" + ext)))]
+    written += [compile_atom_table(*files, prm_file, force=force)
+                for files in structure_sets(directory).values()]
+    return [path for path in written if path is not None]
+
+
+# compile the text structure files of the data folder into memory-mappable .npy copies, e.g.
+#   python compile_structures.py            (only out-of-date files)
+#   python compile_structures.py --force
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile PDB/PDBQT/ASA/RSA files into binary columnar caches")
+    parser.add_argument("--dir", default=".")
+    parser.add_argument("--force", action="store_true", help="recompile files that are up to date")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    written = compile_directory(args.dir, force=args.force)
+    print(f"Compiled {len(written)} files in {time.perf_counter() - start:.2f} s")
+
+    prm_file = os.path.join(args.dir, VDW_PRM_FILE)
+    for name, files in structure_sets(args.dir).items():
+        start = time.perf_counter()
+        table = load_atom_table(*files, prm_file)
+        print(f"{name:<8} {len(table):>7} atoms loaded in {(time.perf_counter() - start) * 1e3:.1f} ms "
+              f"({os.path.basename(atom_table_path(*files, prm_file))})")
@@ -0,0 +1,107 @@
+import argparse
+
+import numpy as np
+
+from pdb_io import load_structure
+from spatial import close_pairs
+
+PDB_FILE = "6m0j_fixed.pdb"
+CUTOFF = 8.0
+MAX_CUTOFF = 12.0
+CUTOFFS = (4.0, 5.0, 6.0, 8.0, 10.0, 12.0)
+# the RBD is chain E in 6M0J, chain B in some of the prepared files
+PARTNER_CHAINS = ("E", "B")
+
+
+class ResidueContacts():
+    """Minimum inter-chain distance of every residue pair closer than max_cutoff.
+
+    Built from a single neighbour search at the largest cutoff of interest;
+    the interface at any smaller cutoff is a threshold on the stored
+    distances, so sweeping cutoffs does not search again.
+    """
+
+    def __init__(self, chain_1, chain_2, res_1, res_2, distance, max_cutoff):
+        self.chain_1 = chain_1
+        self.chain_2 = chain_2
+        self.res_1 = res_1
+        self.res_2 = res_2
+        self.distance = distance
+        self.max_cutoff = max_cutoff
+
+    def __len__(self):
+        return len(self.distance)
+
+    def pairs(self, cutoff=CUTOFF):
+        """{((chain_1, res), (chain_2, res)): minimum distance} of the residue pairs within cutoff"""
+        self._check(cutoff)
+        keep = self.distance <= cutoff
+        return {((self.chain_1, a), (self.chain_2, b)): d for a, b, d in
+                zip(self.res_1[keep].tolist(), self.res_2[keep].tolist(), self.distance[keep].tolist())}
+
+    def interface(self, cutoff=CUTOFF):
+        """Set of (chain, res) with any atom within cutoff of the other chain"""
+        self._check(cutoff)
+        keep = self.distance <= cutoff
+        return ({(self.chain_1, r) for r in np.unique(self.res_1[keep]).tolist()}
+                | {(self.chain_2, r) for r in np.unique(self.res_2[keep]).tolist()})
+
+    def residue_distances(self):
+        """{(chain, res): minimum distance to the other chain} of the residues within max_cutoff"""
+        distances = {}
+        for chain, res in ((self.chain_1, self.res_1), (self.chain_2, self.res_2)):
+            order = np.lexsort((self.distance, res))
+            residues, first = np.unique(res[order], return_index=True)
+            distances.update(zip(((chain, r) for r in residues.tolist()), self.distance[order][first].tolist()))
+        return distances
+
+    def interfaces(self, cutoffs=CUTOFFS):
+        """{cutoff: interface set} for every cutoff"""
+        return {cutoff: self.interface(cutoff) for cutoff in cutoffs}
+
+    def _check(self, cutoff):
+        if cutoff > self.max_cutoff:
+            raise ValueError(f"Cutoff {cutoff} A is above the {self.max_cutoff} A the contacts were searched with")
+
+
+def residue_contacts(pdb_file=PDB_FILE, chain_1="A", chains_2=PARTNER_CHAINS, max_cutoff=MAX_CUTOFF,
+                     structure=None):
+    """ResidueContacts between chain_1 and the first of chains_2 found in pdb_file (or structure)"""
+    if structure is None:
+        structure = load_structure(pdb_file)
+    chain_2 = structure.chain_id(*chains_2)
+    part_1, part_2 = structure.select(chain_1), structure.select(chain_2)
+
+    i, j, d2 = close_pairs(part_1.xyz, part_2.xyz, max_cutoff)
+    res_1, res_2 = part_1.records["resnum"][i], part_2.records["resnum"][j]
+    # minimum over the atom pairs of each residue pair: sort by pair, then distance, keep the first
+    order = np.lexsort((d2, res_2, res_1))
+    res_1, res_2, d2 = res_1[order], res_2[order], d2[order]
+    first = np.ones(len(d2), dtype=bool)
+    first[1:] = (res_1[1:] != res_1[:-1]) | (res_2[1:] != res_2[:-1])
+    return ResidueContacts(chain_1, chain_2, res_1[first], res_2[first], np.sqrt(d2[first]), max_cutoff)
+
+
+def distance_interface(pdb_file=PDB_FILE, cutoff=CUTOFF, chain_1="A", chains_2=PARTNER_CHAINS, structure=None):
+    """Set of interface (chain, res) within cutoff, and the partner chain id that was used"""
+    contacts = residue_contacts(pdb_file, chain_1, chains_2, max_cutoff=cutoff, structure=structure)
+    return contacts.interface(cutoff), contacts.chain_2
+
+
+# interface size over a range of distance cutoffs from one neighbour search, e.g.
+#   python contacts.py
+#   python contacts.py mut_N501Y_complex.pdb --cutoffs 4 6 8
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Residue interface between two chains for several distance cutoffs")
+    parser.add_argument("pdb", nargs="?", default=PDB_FILE)
+    parser.add_argument("--cutoffs", type=float, nargs="+", default=list(CUTOFFS))
+    parser.add_argument("--chains", nargs=2, default=["A", "E"], metavar=("CHAIN_1", "CHAIN_2"))
+    args = parser.parse_args()
+
+    chains_2 = (args.chains[1],) + tuple(c for c in PARTNER_CHAINS if c != args.chains[1])
+    contacts = residue_contacts(args.pdb, args.chains[0], chains_2, max_cutoff=max(args.cutoffs))
+    print(f"{'cutoff':>7} {'residues':>9} {contacts.chain_1:>5} {contacts.chain_2:>5} {'pairs':>6}")
+    for cutoff, residues in sorted(contacts.interfaces(args.cutoffs).items()):
+        n_1 = sum(1 for chain, _ in residues if chain == contacts.chain_1)
+        print(f"{cutoff:7.1f} {len(residues):>9} {n_1:>5} {len(residues) - n_1:>5} "
+              f"{len(contacts.pairs(cutoff)):>6}")
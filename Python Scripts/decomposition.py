@@ -0,0 +1,162 @@
+import csv
+
+import numpy as np
+
+import telemetry
+
+from interaction_energy import (
+    R2_MAX,
+    PDB_FILE,
+    ASA_COMPLEX,
+    ASA_CHAIN_A,
+    ASA_CHAIN_E,
+    as_atom_table,
+    atom_arrays,
+    pair_terms,
+)
+from pdb_io import residue_index
+
+
+def labelled_residues(atoms):
+    """pdb_io.residue_index of atoms, with each residue as (chain, resnum, resname)"""
+    index, keys = residue_index(atoms)
+    _, first = np.unique(index, return_index=True)
+    return index, [key + (name,) for key, name in zip(keys, atoms["resname"][first].tolist())]
+
+
+def near_box(xyz, other, margin):
+    """Mask of the xyz points within `margin` of the bounding box of `other`"""
+    lo = other.min(axis=0) - margin
+    hi = other.max(axis=0) + margin
+    return np.all((xyz >= lo) & (xyz <= hi), axis=1)
+
+
+class ResidueDecomposition():
+    """Residue x residue interaction matrix between the receptor chains (rows) and the other chains (columns).
+
+    vdw, elec and contacts (number of atom pairs within the cutoffs) are
+    (n_rows, n_cols) arrays. Solvation is a per-residue term, kept in
+    solv_rows / solv_cols. A residue's total is the sum of its row (or
+    column) plus its own solvation, which is what
+    compute_wt_residue_contribution returns for that residue.
+    """
+
+    def __init__(self, rows, cols, vdw, elec, contacts, solv_rows, solv_cols):
+        self.rows = rows
+        self.cols = cols
+        self.vdw = vdw
+        self.elec = elec
+        self.contacts = contacts
+        self.solv_rows = solv_rows
+        self.solv_cols = solv_cols
+        self._row_pos = {(c, r): k for k, (c, r, _) in enumerate(rows)}
+        self._col_pos = {(c, r): k for k, (c, r, _) in enumerate(cols)}
+
+    @property
+    def total(self):
+        return self.vdw + self.elec
+
+    def residue_components(self, chain, res):
+        """(total, E_vdw, E_elec, E_solv) of one residue against the whole opposite chain"""
+        if (chain, res) in self._row_pos:
+            k = self._row_pos[(chain, res)]
+            E_vdw, E_elec, E_solv = self.vdw[k].sum(), self.elec[k].sum(), self.solv_rows[k]
+        elif (chain, res) in self._col_pos:
+            k = self._col_pos[(chain, res)]
+            E_vdw, E_elec, E_solv = self.vdw[:, k].sum(), self.elec[:, k].sum(), self.solv_cols[k]
+        else:
+            raise KeyError(f"Residue {chain}:{res} not found in the structure")
+        E_vdw, E_elec, E_solv = float(E_vdw), float(E_elec), float(E_solv)
+        return E_vdw + E_elec + E_solv, E_vdw, E_elec, E_solv
+
+    def residue_total(self, chain, res):
+        return self.residue_components(chain, res)[0]
+
+    def residue_totals(self):
+        """{(chain, res): total} for every residue of both chains"""
+        totals = {}
+        for chain, res, _ in self.rows + self.cols:
+            totals[(chain, res)] = self.residue_total(chain, res)
+        return totals
+
+    def sparse_table(self):
+        """One dict per residue pair with at least one atom pair within the cutoffs"""
+        table = []
+        for i, j in zip(*np.nonzero(self.contacts)):
+            ch_a, res_a, name_a = self.rows[i]
+            ch_b, res_b, name_b = self.cols[j]
+            table.append({
+                "Chain_1": ch_a, "ResNum_1": res_a, "ResName_1": name_a,
+                "Chain_2": ch_b, "ResNum_2": res_b, "ResName_2": name_b,
+                "Contacts": int(self.contacts[i, j]),
+                "E_vdw": float(self.vdw[i, j]),
+                "E_elec": float(self.elec[i, j]),
+                "E_total": float(self.vdw[i, j] + self.elec[i, j]),
+            })
+        return table
+
+    def write_csv(self, filename):
+        """Writes the sparse residue-pair table (e.g. for heatmaps)"""
+        rows = self.sparse_table()
+        fields = ["Chain_1", "ResNum_1", "ResName_1", "Chain_2", "ResNum_2", "ResName_2",
+                  "Contacts", "E_vdw", "E_elec", "E_total"]
+        with open(filename, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def decompose_interaction(pdbqt_file,
+                          asa_complex="6m0j_fixed.asa",
+                          asa_A="A.asa",
+                          asa_E="B.asa"):
+    """Builds the ResidueDecomposition of a complex in one pass over the atom pairs.
+
+    All atoms of both chains are used (as in compute_wt_residue_contribution);
+    atoms further than the 12 A cutoff from the other chain's bounding box
+    cannot contribute and are dropped before the pair loop.
+    """
+    table = as_atom_table(pdbqt_file, asa_complex, asa_A, asa_E)
+    atoms = table.atoms
+    is_A = np.isin(atoms["chain"], table.receptor)
+    atoms_1, atoms_2 = atoms[is_A], atoms[~is_A]
+
+    res_1, rows = labelled_residues(atoms_1)
+    res_2, cols = labelled_residues(atoms_2)
+    n_rows, n_cols = len(rows), len(cols)
+
+    solv_1 = atoms_1["fsrf"] * (atoms_1["asa_bound"] - atoms_1["asa_free"])
+    solv_2 = atoms_2["fsrf"] * (atoms_2["asa_bound"] - atoms_2["asa_free"])
+    solv_rows = np.bincount(res_1, solv_1, n_rows)
+    solv_cols = np.bincount(res_2, solv_2, n_cols)
+
+    cutoff = np.sqrt(R2_MAX)
+    keep_1 = np.flatnonzero(near_box(atoms_1["xyz"], atoms_2["xyz"], cutoff)) if len(atoms_2) else np.array([], int)
+    keep_2 = np.flatnonzero(near_box(atoms_2["xyz"], atoms_1["xyz"], cutoff)) if len(atoms_1) else np.array([], int)
+
+    vdw = np.zeros(n_rows * n_cols)
+    elec = np.zeros(n_rows * n_cols)
+    contacts = np.zeros(n_rows * n_cols, dtype=np.int64)
+    with telemetry.stage("pairs", atoms=len(keep_1) + len(keep_2), pairs=len(keep_1) * len(keep_2)) as stage:
+        for i, j, e_vdw, ie, je, e_elec in pair_terms(*atom_arrays(atoms_1[keep_1]),
+                                                      *atom_arrays(atoms_2[keep_2]), table.ff):
+            flat = res_1[keep_1[i]] * n_cols + res_2[keep_2[j]]
+            vdw += np.bincount(flat, e_vdw, n_rows * n_cols)
+            contacts += np.bincount(flat, minlength=n_rows * n_cols)
+            flat = res_1[keep_1[ie]] * n_cols + res_2[keep_2[je]]
+            elec += np.bincount(flat, e_elec, n_rows * n_cols)
+            stage.count(in_cutoff=len(e_vdw))
+
+    return ResidueDecomposition(rows, cols,
+                                vdw.reshape(n_rows, n_cols),
+                                elec.reshape(n_rows, n_cols),
+                                contacts.reshape(n_rows, n_cols),
+                                solv_rows, solv_cols)
+
+
+# export the WT residue-pair table
+if __name__ == "__main__":
+    decomposition = decompose_interaction(PDB_FILE, ASA_COMPLEX, ASA_CHAIN_A, ASA_CHAIN_E)
+    decomposition.write_csv("residue_pair_energies.csv")
+    print(f"Residue pairs in contact: {int(np.count_nonzero(decomposition.contacts))}")
+    print("CSV saved to: residue_pair_energies.csv")
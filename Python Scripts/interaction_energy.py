@@ -1,6 +1,21 @@
-import math
+import hashlib
+import os
 import sys
 
+import numpy as np
+
+import telemetry
+from pdb_io import (
+    compiled_path,
+    keyed,
+    load_compiled,
+    read_asa,
+    read_pdbqt,
+    residue_index,
+    residue_sums,
+    save_compiled,
+)
+
 # load forcefield parameters
 VDW_PRM_FILE = "vdwprm.txt"
 PDB_FILE = "6m0j_fixed.pdbqt"
@@ -8,6 +23,16 @@ ASA_COMPLEX = "6m0j_fixed.asa"
 ASA_CHAIN_A = "A.asa"
 ASA_CHAIN_E = "B.asa"
 ASA_THRESHOLD = 0.01  # Threshold
+# chains on the receptor side of the interface (ACE2); every other chain of the table is the ligand
+RECEPTOR_CHAINS = ("A",)
+
+# pair cutoffs (squared distances in A^2) and dielectric / Coulomb constants
+R2_MIN = 0.1
+R2_MAX = 144.0
+MIN_CHARGE = 1e-4
+COULOMB_K = 332.16
+# number of atom pairs evaluated per block in pair_energies
+PAIR_BLOCK = 1 << 20
 
 
 class VdwParamset():
@@ -27,38 +52,49 @@ class VdwParamset():
         except:
             print(f"ERROR: {filename} not found.")
             sys.exit(1)
+        self._build_tables()
+
+    def _build_tables(self):
+        """Dense type x type mixing tables, indexed by the position in type_names"""
+        self.type_names = list(self.at_types)
+        self.type_index = {t: i for i, t in enumerate(self.type_names)}
+        sig = np.array([self.at_types[t]['sig'] for t in self.type_names])
+        eps = np.array([self.at_types[t]['eps'] for t in self.type_names])
+        self.type_params = np.array(
+            [(self.at_types[t]['eps'], self.at_types[t]['sig'], self.at_types[t]['fsrf']) for t in self.type_names]
+        )
+        self.sig_mix = 0.5 * (sig[:, None] + sig[None, :])
+        self.eps_mix = np.sqrt(eps[:, None] * eps[None, :])
+        # E_LJ = A / r^12 - B / r^6
+        self.lj_A = 4 * self.eps_mix * self.sig_mix ** 12
+        self.lj_B = 4 * self.eps_mix * self.sig_mix ** 6
+
+
+_paramsets = {}
+
+
+def load_paramset(filename=VDW_PRM_FILE):
+    """VdwParamset of a parameter file, parsed once per path"""
+    key = os.path.abspath(filename)
+    if key not in _paramsets:
+        _paramsets[key] = VdwParamset(filename)
+    return _paramsets[key]
 
 
-def get_residue_asa(asa_file):
+def get_residue_asa(asa_file, compiled=True):
     """Reads .asa and sums by residue to define the interface"""
-    res_asa = {}
     try:
-        with open(asa_file, 'r') as f:
-            for line in f:
-                if line.startswith("ATOM"):
-                    chain = line[21]
-                    res = int(line[22:26])
-                    res_asa[(chain, res)] = res_asa.get((chain, res), 0.0) + float(line[54:62])
-    except:
-        pass
-    return res_asa
-
-
-def read_atomic_asa(filename):
+        return residue_sums(read_asa(asa_file, compiled))
+    except OSError:
+        return {}
+
+
+def read_atomic_asa(filename, compiled=True):
     """Reads .asa atom by atom for energy calculation"""
-    data = {}
     try:
-        with open(filename, 'r') as f:
-            for line in f:
-                if line.startswith("ATOM"):
-                    name = line[12:16].strip()
-                    res = int(line[22:26])
-                    chain = line[21]
-                    asa = float(line[54:62])
-                    data[(chain, res, name)] = asa
-    except:
-        pass
-    return data
+        return keyed(read_asa(filename, compiled), ("chain", "resnum", "name"), "asa")
+    except OSError:
+        return {}
 
 
 def guess_atom_type(atom_name, pdbqt_type, ff):
@@ -73,98 +109,390 @@ def guess_atom_type(atom_name, pdbqt_type, ff):
     if n.startswith('S'): return 'SA'
     return 'C'
 
-print(f"Final energy calculation for interface residues...")
 
-#   Original Function — COMPUTES WT ΔG
-def compute_interaction_energy(pdbqt_file,
-                               asa_complex="6m0j_fixed.asa",
-                               asa_A="A.asa",
-                               asa_E="B.asa",
-                               return_components=True,
-                               verbose=False):
+def dielectric(r):
+    """Mehler-Solmajer distance-dependent dielectric eps_r(r)"""
+    denom = np.maximum(1 - 7.7839 * np.exp(-0.3153 * r), 0.01)
+    return np.maximum((86.9525 / denom) - 8.5525, 1.0)
 
-    rsa_c = get_residue_asa(asa_complex)
-    rsa_a = get_residue_asa(asa_A)
-    rsa_e = get_residue_asa(asa_E)
 
-    INTERFACE = set()
+def coulomb_prefactor(r2):
+    """332.16 / (eps_r(r) * r) as a function of the squared distance"""
+    r = np.sqrt(r2)
+    return COULOMB_K / (dielectric(r) * r)
+
 
-    for (chain, res), bound in rsa_c.items():
-        free = rsa_a.get((chain, res), 0.0) if chain == "A" else rsa_e.get((chain, res), 0.0)
-        if (free - bound) > ASA_THRESHOLD:
-            INTERFACE.add((chain, res))
+class ElecTable():
+    """Tabulated coulomb_prefactor on a uniform r^2 grid from R2_MIN to R2_MAX.
 
-    if verbose:
-        print(f"Interface residues: {len(INTERFACE)}")
+    Values in between are linearly interpolated. max_error is the largest
+    absolute deviation from the analytic form (kcal/mol per unit charge
+    product), measured at 10 points inside every grid interval.
+    """
+
+    def __init__(self, spacing=0.01):
+        self.spacing = spacing
+        n = int(np.ceil((R2_MAX - R2_MIN) / spacing)) + 1
+        self.r2 = R2_MIN + spacing * np.arange(n + 1)
+        self.values = coulomb_prefactor(self.r2)
+        self.slopes = np.diff(self.values)
+
+        check = R2_MIN + spacing * np.arange(0, n, 0.1)
+        check = check[check <= R2_MAX]
+        self.max_error = float(np.max(np.abs(self(check) - coulomb_prefactor(check))))
+
+    def __call__(self, r2):
+        x = (r2 - R2_MIN) / self.spacing
+        k = x.astype(np.int64)
+        return self.values[k] + (x - k) * self.slopes[k]
+
+
+# tabulated electrostatics used by pair_terms when set (see use_elec_table)
+_elec_table = None
 
-    ff = VdwParamset(VDW_PRM_FILE)
-    asa_atom_c = read_atomic_asa(asa_complex)
-    asa_atom_a = read_atomic_asa(asa_A)
-    asa_atom_e = read_atomic_asa(asa_E)
 
-    atoms_A = []
-    atoms_E = []
-    E_solv = 0.0
+def use_elec_table(spacing=0.01):
+    """Switches pair_terms to the tabulated Coulomb prefactor (spacing in A^2).
 
-    with open(pdbqt_file, "r") as f:
-        for line in f:
-            if not line.startswith(("ATOM", "HETATM")):
-                continue
+    Returns the ElecTable, whose max_error reports the interpolation error;
+    use_elec_table(None) goes back to the analytic form.
+    """
+    global _elec_table
+    _elec_table = ElecTable(spacing) if spacing else None
+    return _elec_table
 
-            chain = line[21]
-            res = int(line[22:26])
 
-            if (chain, res) not in INTERFACE:
-                continue
+def pair_terms(xyz_1, q_1, type_1,
+               xyz_2, q_2, type_2,
+               ff, block=PAIR_BLOCK):
+    """Vectorized LJ 6-12 + Coulomb terms between two sets of atoms.
 
-            name = line[12:16].strip()
-            x = float(line[30:38])
-            y = float(line[38:46])
-            z = float(line[46:54])
+    Each set is given as an (N, 3) coordinate array, per-atom charges and
+    atom type indices into ff (a VdwParamset), whose mixing tables give the
+    LJ coefficients of every pair. Distances are computed block by block
+    (about `block` pairs at a time) and pairs outside R2_MIN..R2_MAX are
+    skipped, exactly as in the original per-pair loop.
 
-            q = float(line[70:76]) if len(line) > 76 else 0.0
+    Atoms with |q| <= MIN_CHARGE are dropped from the electrostatic pair set
+    before the loop, so the Coulomb term has its own pair list.
 
-            pdbqt_type = line[77:].strip() if len(line) > 77 else ""
-            atype = guess_atom_type(name, pdbqt_type, ff)
-            p = ff.at_types.get(atype, ff.at_types["C"])
+    Yields (i, j, e_vdw, ie, je, e_elec) arrays for the pairs within the
+    cutoffs of each block: i/ie index set 1 and j/je set 2.
+    """
+    n1, n2 = len(xyz_1), len(xyz_2)
+    if n1 == 0 or n2 == 0:
+        return
 
-            bound = asa_atom_c.get((chain, res, name), 0.0)
-            free = asa_atom_a.get((chain, res, name), 0.0) if chain == 'A' else asa_atom_e.get((chain, res, name), 0.0)
-            E_solv += p["fsrf"] * (bound - free)
+    charged_1 = np.flatnonzero(np.abs(q_1) > MIN_CHARGE)
+    charged_2 = np.flatnonzero(np.abs(q_2) > MIN_CHARGE)
+    all_charged = len(charged_1) == n1 and len(charged_2) == n2
+    prefactor = _elec_table if _elec_table is not None else coulomb_prefactor
+    rows = max(1, block // n2)
 
-            atom = {"x": x, "y": y, "z": z, "q": q, "eps": p["eps"], "sig": p["sig"]}
+    for start in range(0, n1, rows):
+        stop = min(start + rows, n1)
+        d = xyz_1[start:stop, None, :] - xyz_2[None, :, :]
+        r2 = np.einsum("ijk,ijk->ij", d, d)
+        inside = (r2 >= R2_MIN) & (r2 <= R2_MAX)
 
-            if chain == "A":
-                atoms_A.append(atom)
-            else:
-                atoms_E.append(atom)
+        i, j = np.nonzero(inside)
+        if len(i) == 0:
+            continue
+        r2_pairs = r2[i, j]
 
+        t_i, t_j = type_1[i + start], type_2[j]
+        inv_r6 = 1.0 / (r2_pairs * r2_pairs * r2_pairs)
+        e_vdw = (ff.lj_A[t_i, t_j] * inv_r6 - ff.lj_B[t_i, t_j]) * inv_r6
+
+        if all_charged:
+            ie, je, r2_elec = i, j, r2_pairs
+        else:
+            rows_q = charged_1[(charged_1 >= start) & (charged_1 < stop)] - start
+            sub = np.ix_(rows_q, charged_2)
+            ie, je = np.nonzero(inside[sub])
+            r2_elec = r2[sub][ie, je]
+            ie, je = rows_q[ie], charged_2[je]
+        ie = ie + start
+        e_elec = q_1[ie] * q_2[je] * prefactor(r2_elec)
+
+        yield i + start, j, e_vdw, ie, je, e_elec
+
+
+def pair_energies(xyz_1, q_1, type_1,
+                  xyz_2, q_2, type_2,
+                  ff, block=PAIR_BLOCK, vdw_cap=None):
+    """Total (E_vdw, E_elec) between two sets of atoms, summed from pair_terms.
+
+    Results agree with the original per-pair Python loop to within
+    1e-6 kcal/mol (only the summation order and LJ factorisation differ).
+    With vdw_cap, the vdW energy of each pair is capped at that value.
+    """
     E_vdw = 0.0
     E_elec = 0.0
+    with telemetry.stage("pairs", atoms=len(xyz_1) + len(xyz_2), pairs=len(xyz_1) * len(xyz_2)) as stage:
+        for _, _, e_vdw, _, _, e_elec in pair_terms(xyz_1, q_1, type_1,
+                                                    xyz_2, q_2, type_2, ff, block):
+            if vdw_cap is not None:
+                e_vdw = np.minimum(e_vdw, vdw_cap)
+            E_vdw += float(np.sum(e_vdw))
+            E_elec += float(np.sum(e_elec))
+            stage.count(in_cutoff=len(e_vdw))
+    return E_vdw, E_elec
+
+
+def atom_pair_energies(xyz_1, q_1, type_1,
+                       xyz_2, q_2, type_2,
+                       ff, block=PAIR_BLOCK):
+    """Per-atom (vdw_1, elec_1, vdw_2, elec_2): each atom's summed pair energy with the other set"""
+    vdw_1, elec_1 = np.zeros(len(xyz_1)), np.zeros(len(xyz_1))
+    vdw_2, elec_2 = np.zeros(len(xyz_2)), np.zeros(len(xyz_2))
+    with telemetry.stage("pairs", atoms=len(xyz_1) + len(xyz_2), pairs=len(xyz_1) * len(xyz_2)) as stage:
+        for i, j, e_vdw, ie, je, e_elec in pair_terms(xyz_1, q_1, type_1,
+                                                      xyz_2, q_2, type_2, ff, block):
+            vdw_1 += np.bincount(i, e_vdw, len(xyz_1))
+            vdw_2 += np.bincount(j, e_vdw, len(xyz_2))
+            elec_1 += np.bincount(ie, e_elec, len(xyz_1))
+            elec_2 += np.bincount(je, e_elec, len(xyz_2))
+            stage.count(in_cutoff=len(e_vdw))
+    return vdw_1, elec_1, vdw_2, elec_2
+
+
+# one row per atom of the parsed structure
+ATOM_DTYPE = np.dtype([
+    ("chain", "U1"),
+    ("resnum", "i4"),
+    ("resname", "U3"),
+    ("name", "U4"),
+    ("xyz", "f8", (3,)),
+    ("q", "f8"),
+    ("type", "i2"),        # index into the VdwParamset type_names
+    ("eps", "f8"),
+    ("sig", "f8"),
+    ("fsrf", "f8"),
+    ("asa_bound", "f8"),   # atomic ASA in the complex
+    ("asa_free", "f8"),    # atomic ASA in the isolated chain
+])
+
+ALA_ATOMS = ("N", "CA", "C", "O", "CB")
+
+
+class AtomTable():
+    """Structure parsed once from a .pdbqt + its three .asa files.
+
+    `atoms` is a structured array with ATOM_DTYPE, in file order, and `ff`
+    the VdwParamset its type indices refer to.
+    `residue_asa` maps (chain, resnum) -> (bound, free) residue ASA, summed
+    from the .asa files exactly like get_residue_asa. `receptor` holds the
+    chain ids of one side of the interface, the other chains being the other.
+    """
+
+    def __init__(self, atoms, ff, residue_asa, receptor=RECEPTOR_CHAINS):
+        self.atoms = atoms
+        self.ff = ff
+        self.residue_asa = residue_asa
+        self.receptor = tuple(receptor)
+        self._interface = {}
+        self._interface_mask = {}
+
+    def __len__(self):
+        return len(self.atoms)
+
+    def interface(self, threshold=ASA_THRESHOLD):
+        """Set of (chain, resnum) whose ASA drops by more than threshold on binding"""
+        if threshold not in self._interface:
+            self._interface[threshold] = {
+                key for key, (bound, free) in self.residue_asa.items()
+                if (free - bound) > threshold
+            }
+        return self._interface[threshold]
+
+    def residue_mask(self, chain, res):
+        return (self.atoms["chain"] == chain) & (self.atoms["resnum"] == res)
+
+    def interface_mask(self, threshold=ASA_THRESHOLD):
+        """Boolean mask of the atoms belonging to interface residues"""
+        if threshold not in self._interface_mask:
+            with telemetry.stage("interface", atoms=len(self.atoms)):
+                keys = self.interface(threshold)
+                self._interface_mask[threshold] = np.array(
+                    [(c, r) in keys for c, r in zip(self.atoms["chain"].tolist(), self.atoms["resnum"].tolist())],
+                    dtype=bool)
+        return self._interface_mask[threshold]
+
+    def ala_mask(self, chain, res):
+        """Atoms kept when (chain, res) is truncated to alanine"""
+        return ~(self.residue_mask(chain, res) & ~np.isin(self.atoms["name"], ALA_ATOMS))
+
+
+def atom_table_path(pdbqt_file, asa_complex, asa_A, asa_E, prm_file=VDW_PRM_FILE, receptor=RECEPTOR_CHAINS):
+    """Compiled atom table of a .pdbqt, named after the .asa/parameter files and receptor chains it was built with"""
+    base = os.path.dirname(os.path.abspath(pdbqt_file))
+    inputs = "|".join(os.path.relpath(os.path.abspath(f), base) for f in (asa_complex, asa_A, asa_E, prm_file))
+    inputs += "|" + ",".join(receptor)
+    return compiled_path(pdbqt_file, hashlib.sha1(inputs.encode()).hexdigest()[:10])
+
+
+def load_atom_table(pdbqt_file,
+                    asa_complex="6m0j_fixed.asa",
+                    asa_A="A.asa",
+                    asa_E="B.asa",
+                    prm_file=VDW_PRM_FILE,
+                    compiled=True,
+                    receptor=RECEPTOR_CHAINS):
+    """Parses a .pdbqt and its .asa files into an AtomTable.
+
+    asa_A holds the free ASA of the receptor chains, asa_E that of the other
+    chains. With compiled=True an up-to-date table written by compile_atom_table is
+    memory-mapped instead of parsing the files, and otherwise the files are read
+    through their own compiled copies where up to date; compiled=False parses
+    every file as text.
+    """
+    ff = load_paramset(prm_file)
+
+    with telemetry.stage("asa_read") as stage:
+        rsa_c = get_residue_asa(asa_complex, compiled)
+        rsa_a = get_residue_asa(asa_A, compiled)
+        rsa_e = get_residue_asa(asa_E, compiled)
+        residue_asa = {}
+        for (chain, res), bound in rsa_c.items():
+            free = rsa_a.get((chain, res), 0.0) if chain in receptor else rsa_e.get((chain, res), 0.0)
+            residue_asa[(chain, res)] = (bound, free)
+
+    sources = (pdbqt_file, asa_complex, asa_A, asa_E, prm_file)
+    if compiled:
+        with telemetry.stage("load_compiled") as stage:
+            atoms = load_compiled(atom_table_path(*sources, receptor), sources, ATOM_DTYPE)
+            if atoms is not None:
+                stage.count(atoms=len(atoms))
+                return AtomTable(atoms, ff, residue_asa, receptor)
+
+    with telemetry.stage("asa_read") as stage:
+        asa_atom_c = read_atomic_asa(asa_complex, compiled)
+        asa_atom_a = read_atomic_asa(asa_A, compiled)
+        asa_atom_e = read_atomic_asa(asa_E, compiled)
+        stage.count(atoms=len(asa_atom_c) + len(asa_atom_a) + len(asa_atom_e))
+
+    with telemetry.stage("parse") as stage:
+        records = read_pdbqt(pdbqt_file, compiled)
+        keys = list(zip(records["chain"].tolist(), records["resnum"].tolist(), records["name"].tolist()))
+        asa_bound = [asa_atom_c.get(k, 0.0) for k in keys]
+        is_receptor = np.isin(records["chain"], receptor).tolist()
+        asa_free = [(asa_atom_a if r else asa_atom_e).get(k, 0.0) for k, r in zip(keys, is_receptor)]
+        atoms = build_atoms(records, ff, asa_bound, asa_free)
+        stage.count(atoms=len(atoms))
+    return AtomTable(atoms, ff, residue_asa, receptor)
+
+
+def build_atoms(records, ff, asa_bound, asa_free):
+    """ATOM_DTYPE array of parsed .pdbqt records, with the atomic ASA of each atom in the complex and free"""
+    atoms = np.zeros(len(records), dtype=ATOM_DTYPE)
+    for field in ("chain", "resnum", "resname", "name", "q"):
+        atoms[field] = records[field]
+    atoms["xyz"] = np.column_stack((records["x"], records["y"], records["z"]))
+
+    # force-field type of every distinct (atom name, PDBQT type) pair
+    pairs, inverse = np.unique(np.char.add(np.char.add(records["name"], " "), records["type"]),
+                               return_inverse=True)
+    type_of = []
+    for pair in pairs.tolist():
+        name, _, pdbqt_type = pair.partition(" ")
+        atype = guess_atom_type(name, pdbqt_type, ff)
+        type_of.append(ff.type_index[atype if atype in ff.at_types else "C"])
+    atoms["type"] = np.array(type_of, dtype=np.int64)[inverse.ravel()]
+    params = ff.type_params[atoms["type"]]
+    atoms["eps"], atoms["sig"], atoms["fsrf"] = params.T
+
+    atoms["asa_bound"] = asa_bound
+    atoms["asa_free"] = asa_free
+    return atoms
+
+
+def records_table(records, ff, asa_bound, asa_free, receptor=RECEPTOR_CHAINS):
+    """AtomTable of parsed .pdbqt records and per-atom ASA arrays (e.g. computed in-process)"""
+    atoms = build_atoms(records, ff, asa_bound, asa_free)
+    residue, residues = residue_index(records)
+    sums = zip(np.bincount(residue, atoms["asa_bound"], len(residues)).tolist(),
+               np.bincount(residue, atoms["asa_free"], len(residues)).tolist())
+    return AtomTable(atoms, ff, dict(zip(residues, sums)), receptor)
+
+
+def compile_atom_table(pdbqt_file,
+                       asa_complex="6m0j_fixed.asa",
+                       asa_A="A.asa",
+                       asa_E="B.asa",
+                       prm_file=VDW_PRM_FILE,
+                       force=False,
+                       receptor=RECEPTOR_CHAINS):
+    """Saves the parsed atom array next to the .pdbqt.
+
+    Returns the path written, or None if the compiled table was already up to date.
+    """
+    sources = (pdbqt_file, asa_complex, asa_A, asa_E, prm_file)
+    path = atom_table_path(*sources, receptor)
+    if not force and load_compiled(path, sources, ATOM_DTYPE) is not None:
+        return None
+    table = load_atom_table(*sources, compiled=False, receptor=receptor)
+    save_compiled(path, table.atoms)
+    return path
+
+
+_atom_tables = {}
+
+
+def cached_atom_table(pdbqt_file,
+                      asa_complex="6m0j_fixed.asa",
+                      asa_A="A.asa",
+                      asa_E="B.asa",
+                      prm_file=VDW_PRM_FILE):
+    """load_atom_table, memoized on the input paths and their modification times"""
+    key = tuple((os.path.abspath(f), os.path.getmtime(f) if os.path.exists(f) else None)
+                for f in (pdbqt_file, asa_complex, asa_A, asa_E, prm_file))
+    if key not in _atom_tables:
+        _atom_tables[key] = load_atom_table(pdbqt_file, asa_complex, asa_A, asa_E, prm_file)
+    return _atom_tables[key]
+
+
+def as_atom_table(pdbqt_file, asa_complex, asa_A, asa_E):
+    """Returns pdbqt_file itself if it is already an AtomTable, otherwise parses the files"""
+    if isinstance(pdbqt_file, AtomTable):
+        return pdbqt_file
+    return load_atom_table(pdbqt_file, asa_complex, asa_A, asa_E)
+
+
+def atom_arrays(atoms):
+    """(xyz, q, type) arrays of an ATOM_DTYPE slice, as taken by pair_energies"""
+    return atoms["xyz"], atoms["q"], atoms["type"]
+
+
+def solvation_energy(atoms):
+    """Sum of fsrf * (ASA_complex - ASA_free) over the given atoms"""
+    with telemetry.stage("solvation", atoms=len(atoms)):
+        return float(np.sum(atoms["fsrf"] * (atoms["asa_bound"] - atoms["asa_free"])))
+
+
+def interface_energy(atoms, ff, receptor=RECEPTOR_CHAINS, vdw_cap=None):
+    """(total, E_vdw, E_elec, E_solv) between the receptor chains and the other chains of `atoms`"""
+    is_A = np.isin(atoms["chain"], receptor)
+    E_vdw, E_elec = pair_energies(*atom_arrays(atoms[is_A]), *atom_arrays(atoms[~is_A]), ff, vdw_cap=vdw_cap)
+    E_solv = solvation_energy(atoms)
+    return E_vdw + E_elec + E_solv, E_vdw, E_elec, E_solv
 
-    for a1 in atoms_A:
-        for a2 in atoms_E:
-            dx = a1["x"] - a2["x"]
-            dy = a1["y"] - a2["y"]
-            dz = a1["z"] - a2["z"]
-            r2 = dx*dx + dy*dy + dz*dz
-
-            if r2 < 0.1 or r2 > 144:
-                continue
 
-            r = math.sqrt(r2)
+#   Original Function — COMPUTES WT ΔG
+#   pdbqt_file may be a path (parsed with the three .asa files) or an AtomTable
+def compute_interaction_energy(pdbqt_file,
+                               asa_complex="6m0j_fixed.asa",
+                               asa_A="A.asa",
+                               asa_E="B.asa",
+                               return_components=True,
+                               verbose=False):
 
-            sig = 0.5 * (a1["sig"] + a2["sig"])
-            eps = math.sqrt(a1["eps"] * a2["eps"])
-            E_vdw += 4 * eps * ((sig/r)**12 - (sig/r)**6)
+    table = as_atom_table(pdbqt_file, asa_complex, asa_A, asa_E)
 
-            if abs(a1["q"]) > 1e-4 and abs(a2["q"]) > 1e-4:
-                denom = 1 - 7.7839 * math.exp(-0.3153*r)
-                denom = max(denom, 0.01)
-                eps_r = max((86.9525 / denom) - 8.5525, 1.0)
-                E_elec += 332.16 * a1["q"] * a2["q"] / (eps_r * r)
+    if verbose:
+        print(f"Interface residues: {len(table.interface())}")
 
-    total = E_vdw + E_elec + E_solv
+    total, E_vdw, E_elec, E_solv = interface_energy(table.atoms[table.interface_mask()], table.ff, table.receptor)
 
     if return_components:
         return total, E_vdw, E_elec, E_solv
@@ -182,90 +510,12 @@ def compute_interaction_energy_with_ala(pdbqt_file,
                                         return_components=True,
                                         verbose=False):
 
-    allowed = {"N", "CA", "C", "O", "CB"}  # alanine atoms
-
-    rsa_c = get_residue_asa(asa_complex)
-    rsa_a = get_residue_asa(asa_A)
-    rsa_e = get_residue_asa(asa_E)
-
-    INTERFACE = set()
-
-    for (ch, rn), bound in rsa_c.items():
-        free = rsa_a.get((ch, rn), 0.0) if ch == "A" else rsa_e.get((ch, rn), 0.0)
-        if (free - bound) > ASA_THRESHOLD:
-            INTERFACE.add((ch, rn))
-
-    ff = VdwParamset(VDW_PRM_FILE)
-    asa_atom_c = read_atomic_asa(asa_complex)
-    asa_atom_a = read_atomic_asa(asa_A)
-    asa_atom_e = read_atomic_asa(asa_E)
-
-    atoms_A = []
-    atoms_E = []
-    E_solv = 0.0
-
-    with open(pdbqt_file, "r") as f:
-        for line in f:
-            if not line.startswith(("ATOM", "HETATM")):
-                continue
-
-            ch = line[21]
-            rn = int(line[22:26])
-            atom = line[12:16].strip()
-
-            if (ch == chain_mut) and (rn == res_mut):
-                if atom not in allowed:
-                    continue
-
-            if (ch, rn) not in INTERFACE:
-                continue
-
-            x = float(line[30:38])
-            y = float(line[38:46])
-            z = float(line[46:54])
-            q = float(line[70:76]) if len(line) > 76 else 0.0
-
-            pdbqt_type = line[77:].strip()
-            atype = guess_atom_type(atom, pdbqt_type, ff)
-            p = ff.at_types.get(atype, ff.at_types["C"])
+    table = as_atom_table(pdbqt_file, asa_complex, asa_A, asa_E)
 
-            bound = asa_atom_c.get((ch, rn, atom), 0.0)
-            free = asa_atom_a.get((ch, rn, atom), 0.0) if ch == "A" else asa_atom_e.get((ch, rn, atom), 0.0)
-            E_solv += p["fsrf"] * (bound - free)
+    # keep only the alanine atoms (N, CA, C, O, CB) of the mutated residue
+    keep = table.interface_mask() & table.ala_mask(chain_mut, res_mut)
+    total, E_vdw, E_elec, E_solv = interface_energy(table.atoms[keep], table.ff, table.receptor)
 
-            data = {"x": x, "y": y, "z": z, "q": q, "eps": p["eps"], "sig": p["sig"]}
-
-            if ch == "A":
-                atoms_A.append(data)
-            else:
-                atoms_E.append(data)
-
-    E_vdw = 0.0
-    E_elec = 0.0
-
-    for a1 in atoms_A:
-        for a2 in atoms_E:
-            dx = a1["x"] - a2["x"]
-            dy = a1["y"] - a2["y"]
-            dz = a1["z"] - a2["z"]
-            r2 = dx*dx + dy*dy + dz*dz
-
-            if r2 < 0.1 or r2 > 144:
-                continue
-
-            r = math.sqrt(r2)
-
-            sig = 0.5*(a1["sig"]+a2["sig"])
-            eps = math.sqrt(a1["eps"]*a2["eps"])
-            E_vdw += 4*eps*((sig/r)**12 - (sig/r)**6)
-
-            if abs(a1["q"]) > 1e-4 and abs(a2["q"]) > 1e-4:
-                denom = 1 - 7.7839*math.exp(-0.3153*r)
-                denom = max(denom, 0.01)
-                eps_r = max((86.9525/denom) - 8.5525, 1)
-                E_elec += 332.16*a1["q"]*a2["q"]/(eps_r*r)
-
-    total = E_vdw + E_elec + E_solv
     if return_components:
         return total, E_vdw, E_elec, E_solv
     else:
@@ -280,76 +530,17 @@ def compute_wt_residue_contribution(pdbqt_file,
                                     asa_E="B.asa",
                                     verbose=False):
 
-    
-    
-    ff = VdwParamset(VDW_PRM_FILE)
-    asa_atom_c = read_atomic_asa(asa_complex)
-    asa_atom_a = read_atomic_asa(asa_A)
-    asa_atom_e = read_atomic_asa(asa_E)
-
-    atoms_target = []
-    atoms_other_chain = []
-    E_solv = 0.0
-
-    with open(pdbqt_file, "r") as f:
-        for line in f:
-            if not line.startswith(("ATOM", "HETATM")):
-                continue
-
-            ch = line[21]
-            rn = int(line[22:26])
-            name = line[12:16].strip()
-            
-            x = float(line[30:38])
-            y = float(line[38:46])
-            z = float(line[46:54])
-            q = float(line[70:76]) if len(line) > 76 else 0.0
-            
-            pdbqt_type = line[77:].strip()
-            atype = guess_atom_type(name, pdbqt_type, ff)
-            p = ff.at_types.get(atype, ff.at_types["C"])
-            
-            atom_data = {"x": x, "y": y, "z": z, "q": q, "eps": p["eps"], "sig": p["sig"]}
-
-            if ch == target_chain and rn == target_res:
-                atoms_target.append(atom_data)
-                
-                # Solvatação apenas para este resíduo
-                bound = asa_atom_c.get((ch, rn, name), 0.0)
-                free = asa_atom_a.get((ch, rn, name), 0.0) if ch == "A" else asa_atom_e.get((ch, rn, name), 0.0)
-                E_solv += p["fsrf"] * (bound - free)
-
-          
-            elif ch != target_chain:
-                atoms_other_chain.append(atom_data)
-
-    # Calculate VdW and Eletrostatic between (Target) vs (other chain)
-    E_vdw = 0.0
-    E_elec = 0.0
-
-    for a1 in atoms_target:
-        for a2 in atoms_other_chain:
-            dx = a1["x"] - a2["x"]
-            dy = a1["y"] - a2["y"]
-            dz = a1["z"] - a2["z"]
-            r2 = dx*dx + dy*dy + dz*dz
-
-            if r2 < 0.1 or r2 > 144: # Cutoff 12A
-                continue
+    table = as_atom_table(pdbqt_file, asa_complex, asa_A, asa_E)
+    atoms = table.atoms
 
-            r = math.sqrt(r2)
+    target = table.residue_mask(target_chain, target_res)
+    other_chain = atoms["chain"] != target_chain
 
-            # VdW
-            sig = 0.5 * (a1["sig"] + a2["sig"])
-            eps = math.sqrt(a1["eps"] * a2["eps"])
-            E_vdw += 4 * eps * ((sig/r)**12 - (sig/r)**6)
+    # Solvatação apenas para este resíduo
+    E_solv = solvation_energy(atoms[target])
 
-            # Eletrostática
-            if abs(a1["q"]) > 1e-4 and abs(a2["q"]) > 1e-4:
-                denom = 1 - 7.7839 * math.exp(-0.3153*r)
-                denom = max(denom, 0.01)
-                eps_r = max((86.9525 / denom) - 8.5525, 1.0)
-                E_elec += 332.16 * a1["q"] * a2["q"] / (eps_r * r)
+    # Calculate VdW and Eletrostatic between (Target) vs (other chain), cutoff 12A
+    E_vdw, E_elec = pair_energies(*atom_arrays(atoms[target]), *atom_arrays(atoms[other_chain]), table.ff)
 
     total = E_vdw + E_elec + E_solv
     return total
@@ -357,6 +548,7 @@ def compute_wt_residue_contribution(pdbqt_file,
 
 # run wt as a test
 if __name__ == "__main__":
+    print(f"Final energy calculation for interface residues...")
     total, lj, elec, solv = compute_interaction_energy(
         PDB_FILE,
         asa_complex=ASA_COMPLEX,
@@ -1,26 +1,16 @@
-from Bio.PDB import PDBParser, NeighborSearch
+from contacts import residue_contacts
 
-# load structure
-parser = PDBParser(QUIET=True)
-structure = parser.get_structure('6m0j', '6m0j_fixed.pdb')
+cutoff_distance = 8.0 # Distance we found in pymol
 
-# separate chains A and E
-atoms_A = [atom for atom in structure[0]['A'].get_atoms()]
-atoms_E = [atom for atom in structure[0]['E'].get_atoms()] 
 
-# create neighbor search system for chain E
-ns = NeighborSearch(atoms_E)
+def main():
+    # one neighbour search between chains A and E; the interface is every residue
+    # with an atom within the cutoff of the other chain
+    contacts = residue_contacts('6m0j_fixed.pdb', max_cutoff=cutoff_distance)
+    interface_residues = contacts.interface(cutoff_distance)
+
+    print(f"Interface residues (<{cutoff_distance}A): {len(interface_residues)}")
 
-interface_residues = set()
-cutoff_distance = 8.0 # Distance we found in pymol
-# For each atom in chain A, find neighbors in chain E within cutoff
-for atom_a in atoms_A:
-    neighbors = ns.search(atom_a.get_coord(), cutoff_distance)
-    if neighbors:
-        # If there are neighbors, the residue of A belongs to the interface
-        interface_residues.add(atom_a.get_parent())
-        # The neighbors found in E also belong
-        for atom_e in neighbors:
-            interface_residues.add(atom_e.get_parent())
 
-print(f"Interface residues (<{cutoff_distance}A): {len(interface_residues)}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import re
+import tempfile
+
+import numpy as np
+
+from interaction_energy import ASA_THRESHOLD
+from pdb_io import keyed, load_compiled, read_rsa, save_compiled
+
+STORE_DIR = "interfaces"
+INDEX_FILE = "index.json"
+DEFAULT_KEY = "WT"
+# complex .rsa, then the free-chain .rsa of each chain of the interface
+WT_RSA = ("6m0j_fixed.rsa", "A.rsa", "B.rsa")
+WT_CHAINS = ("A", "E")
+INTERFACE_DTYPE = np.dtype([
+    ("chain", "U1"),
+    ("resnum", "i4"),
+    ("resname", "U3"),
+    ("asa_bound", "f8"),
+    ("asa_free", "f8"),
+    ("dasa", "f8"),
+])
+_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_.@+-]+$")
+# set to 1 (pipeline.py does, for every stage but the one building the store) to open stores read-only
+READONLY_ENV = "INTERFACE_STORE_READONLY"
+
+
+def dasa_interface(complex_rsa, free_rsa, chains=WT_CHAINS, threshold=ASA_THRESHOLD):
+    """Interface records of the residues of chains whose ASA drops by more than threshold on binding.
+
+    free_rsa holds one free-chain .rsa per chain, in the same order; residues
+    are matched on (chain, resnum, resname) and sorted by chain and number.
+    """
+    bound = read_rsa(complex_rsa)
+    parts = []
+    for chain, filename in zip(chains, free_rsa):
+        free_asa = keyed(read_rsa(filename), ("chain", "resnum", "resname"), "asa")
+        res = bound[bound["chain"] == chain]
+        part = np.zeros(len(res), dtype=INTERFACE_DTYPE)
+        for field in ("chain", "resnum", "resname"):
+            part[field] = res[field]
+        part["asa_bound"] = res["asa"]
+        part["asa_free"] = [free_asa.get(k, 0.0) for k in
+                            zip(res["chain"].tolist(), res["resnum"].tolist(), res["resname"].tolist())]
+        part["dasa"] = part["asa_free"] - part["asa_bound"]
+        parts.append(part[part["dasa"] > threshold])
+    records = np.concatenate(parts) if parts else np.zeros(0, dtype=INTERFACE_DTYPE)
+    return records[np.lexsort((records["resnum"], records["chain"]))]
+
+
+class InterfaceStore():
+    """Named interface definitions kept side by side in one folder.
+
+    Every interface is a structured .npy array (INTERFACE_DTYPE), memory-mapped
+    on first access; index.json records how it was made (method, threshold,
+    source files, relative to the store directory so that the index holds
+    from any working directory). An interface whose sources changed since it
+    was stored is stale: a ΔASA interface is then rebuilt from its sources,
+    any other one is reported missing. A read-only store never writes: it
+    serves what is stored, leaving the freshness of its sources to the writer.
+    """
+
+    def __init__(self, directory=STORE_DIR, readonly=None):
+        self.directory = directory
+        self.readonly = os.environ.get(READONLY_ENV) == "1" if readonly is None else readonly
+        self._loaded = {}
+
+    @property
+    def index_path(self):
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def keys(self):
+        return sorted(self.index())
+
+    def __contains__(self, key):
+        return key in self.index()
+
+    def path(self, key):
+        if not _KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid interface key '{key}'")
+        return os.path.join(self.directory, key + ".npy")
+
+    def info(self, key):
+        """Metadata of a stored interface: method, threshold, sources and size"""
+        index = self.index()
+        if key not in index:
+            raise KeyError(f"No interface '{key}' in {self.directory}")
+        return index[key]
+
+    def sources(self, key):
+        """Paths of the files an interface was made from, relative to the working directory"""
+        paths = []
+        for f in self.info(key)["sources"]:
+            path = os.path.normpath(os.path.join(self.directory, f))
+            # older indexes hold the paths relative to the directory they were built from
+            paths.append(f if not os.path.exists(path) and os.path.exists(f) else path)
+        return paths
+
+    def put(self, key, records, method, threshold, sources=(), **params):
+        """Stores records under key, replacing any previous interface of that name"""
+        if self.readonly:
+            raise PermissionError(f"Interface store '{self.directory}' is read-only (cannot store '{key}')")
+        os.makedirs(self.directory, exist_ok=True)
+        save_compiled(self.path(key), np.asarray(records, dtype=INTERFACE_DTYPE))
+        index = self.index()
+        sources = [os.path.relpath(os.path.abspath(f), os.path.abspath(self.directory)) for f in sources]
+        index[key] = dict(params, method=method, threshold=threshold, sources=sources, residues=len(records))
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.index_path)
+        self._loaded.pop(key, None)
+
+    def put_dasa(self, key, complex_rsa, free_rsa, chains=WT_CHAINS, threshold=ASA_THRESHOLD):
+        """Computes and stores the ΔASA interface of a complex"""
+        records = dasa_interface(complex_rsa, free_rsa, chains, threshold)
+        self.put(key, records, "dasa", threshold, [complex_rsa, *free_rsa], chains=list(chains))
+        return self.load(key)
+
+    def load(self, key=DEFAULT_KEY):
+        """Memory-mapped records of an interface"""
+        if key not in self._loaded:
+            info = self.info(key)
+            sources = self.sources(key)
+            records = load_compiled(self.path(key), [] if self.readonly else sources, INTERFACE_DTYPE)
+            if records is None and self.readonly:
+                raise KeyError(f"Interface '{key}' in {self.directory} cannot be read")
+            if records is None:
+                if info["method"] != "dasa":
+                    raise KeyError(f"Interface '{key}' is out of date with {', '.join(sources)}")
+                complex_rsa, *free_rsa = sources
+                return self.put_dasa(key, complex_rsa, free_rsa, info["chains"], info["threshold"])
+            self._loaded[key] = records
+        return self._loaded[key]
+
+    def residues(self, key=DEFAULT_KEY):
+        """[(chain, resnum)] of an interface, in stored order"""
+        records = self.load(key)
+        return list(zip(records["chain"].tolist(), records["resnum"].tolist()))
+
+    def query(self, key=DEFAULT_KEY, chain=None, min_dasa=None):
+        """Records of an interface, optionally only one chain and/or ΔASA above min_dasa"""
+        records = self.load(key)
+        keep = np.ones(len(records), dtype=bool)
+        if chain is not None:
+            keep &= records["chain"] == chain
+        if min_dasa is not None:
+            keep &= records["dasa"] > min_dasa
+        return records[keep]
+
+
+def interface_residues(key=DEFAULT_KEY, directory=STORE_DIR):
+    """[(chain, resnum)] of a stored interface; the WT ΔASA interface is built from the .rsa files on first use"""
+    store = InterfaceStore(directory)
+    if key not in store and key == DEFAULT_KEY and not store.readonly:
+        store.put_dasa(key, WT_RSA[0], WT_RSA[1:])
+    return store.residues(key)
+
+
+# list the stored interfaces, or add one, e.g.
+#   python interface_store.py
+#   python interface_store.py --add WT@0.5 --threshold 0.5
+#   python interface_store.py --add N501Y --rsa mut_N501Y_complex.rsa mut_N501Y_A.rsa mut_N501Y_B.rsa
+#   python interface_store.py --show WT --chain E
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stored interface definitions")
+    parser.add_argument("--dir", default=STORE_DIR)
+    parser.add_argument("--add", metavar="KEY", help="compute the ΔASA interface and store it under KEY")
+    parser.add_argument("--rsa", nargs=3, default=list(WT_RSA), metavar=("COMPLEX", "FREE_A", "FREE_E"))
+    parser.add_argument("--threshold", type=float, default=ASA_THRESHOLD)
+    parser.add_argument("--show", metavar="KEY", help="print the residues of an interface")
+    parser.add_argument("--chain", help="with --show, only this chain")
+    args = parser.parse_args()
+
+    store = InterfaceStore(args.dir)
+    if args.add:
+        records = store.put_dasa(args.add, args.rsa[0], args.rsa[1:], threshold=args.threshold)
+        print(f"Stored '{args.add}': {len(records)} residues (ΔASA > {args.threshold})")
+    if args.show:
+        for r in store.query(args.show, chain=args.chain):
+            print(f"{r['chain']} {r['resname']}{r['resnum']:<5} bound {r['asa_bound']:8.2f} "
+                  f"free {r['asa_free']:8.2f} ΔASA={r['dasa']:.2f}")
+    if not args.add and not args.show:
+        print(f"{'key':<16} {'method':<8} {'threshold':>9} {'residues':>8}  sources")
+        for key, info in sorted(store.index().items()):
+            print(f"{key:<16} {info['method']:<8} {info['threshold']:>9g} {info['residues']:>8}  "
+                  f"{', '.join(store.sources(key))}")
@@ -0,0 +1,142 @@
+import argparse
+import csv
+import time
+
+import numpy as np
+
+from contacts import PDB_FILE, residue_contacts
+from pdb_io import rsa_values
+
+RSA_COMPLEX = "6m0j_fixed.rsa"
+RSA_A = "A.rsa"
+RSA_B = "B.rsa"
+OUTPUT_CSV = "interface_sweep.csv"
+CUTOFF_RANGE = (4.0, 12.0, 50)
+THRESHOLD_RANGE = (0.01, 20.0, 50)
+CSV_FIELDS = ["Cutoff", "Threshold", "N_dist", "N_asa", "Intersection",
+              "Only_dist", "Only_asa", "Union", "Jaccard", "Overlap"]
+# name of each count/score matrix returned by sweep, in CSV_FIELDS order
+SWEEP_FIELDS = dict(zip(CSV_FIELDS[2:], ["n_dist", "n_asa", "intersection",
+                                         "only_dist", "only_asa", "union", "jaccard", "overlap"]))
+
+
+def residue_delta_asa(complex_rsa=RSA_COMPLEX, free_a=RSA_A, free_b=RSA_B):
+    """{(chain, res): ASA_free - ASA_bound} of every residue of the complex"""
+    bound = rsa_values(complex_rsa, missing_ok=True)
+    f_a = rsa_values(free_a, missing_ok=True)
+    f_b = rsa_values(free_b, missing_ok=True)
+    delta = {}
+    for (chain, res), val_bound in bound.items():
+        if chain == 'A':
+            val_free = f_a.get((chain, res), 0.0)
+        else:
+            # the free RBD file may label the chain B or E
+            val_free = f_b.get((chain, res), f_b.get(('B', res), f_b.get(('E', res), 0.0)))
+        delta[(chain, res)] = val_free - val_bound
+    return delta
+
+
+def sweep(distances, delta_asa, cutoffs, thresholds):
+    """Distance-vs-ΔASA interface comparison over a grid of cutoffs x thresholds.
+
+    distances is {(chain, res): minimum distance to the other chain} and
+    delta_asa {(chain, res): ΔASA}; a residue is in the distance interface
+    at cutoff c if its distance is <= c, and in the ΔASA interface at
+    threshold t if its ΔASA is > t. Returns {name: array} with cutoffs,
+    thresholds and one (n_cutoffs, n_thresholds) matrix per entry of
+    SWEEP_FIELDS; Jaccard/overlap are NaN where both sets are empty.
+    """
+    cutoffs = np.asarray(cutoffs, dtype=np.float64)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    residues = sorted(set(distances) | set(delta_asa))
+    d = np.array([distances.get(k, np.inf) for k in residues])
+    a = np.array([delta_asa.get(k, -np.inf) for k in residues])
+
+    # membership of every residue at every cutoff / threshold; the overlaps are one matrix product
+    in_dist = (d[None, :] <= cutoffs[:, None]).astype(np.int64)
+    in_asa = (a[None, :] > thresholds[:, None]).astype(np.int64)
+    intersection = in_dist @ in_asa.T
+    n_dist = np.broadcast_to(in_dist.sum(axis=1)[:, None], intersection.shape)
+    n_asa = np.broadcast_to(in_asa.sum(axis=1)[None, :], intersection.shape)
+    union = n_dist + n_asa - intersection
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        jaccard = np.where(union > 0, intersection / union, np.nan)
+        smaller = np.minimum(n_dist, n_asa)
+        overlap = np.where(smaller > 0, intersection / smaller, np.nan)
+    return {
+        "cutoffs": cutoffs,
+        "thresholds": thresholds,
+        "n_dist": np.array(n_dist),
+        "n_asa": np.array(n_asa),
+        "intersection": intersection,
+        "only_dist": n_dist - intersection,
+        "only_asa": n_asa - intersection,
+        "union": union,
+        "jaccard": jaccard,
+        "overlap": overlap,
+    }
+
+
+def sweep_rows(result):
+    """One CSV row per (cutoff, threshold) cell"""
+    rows = []
+    for i, cutoff in enumerate(result["cutoffs"].tolist()):
+        for j, threshold in enumerate(result["thresholds"].tolist()):
+            row = {"Cutoff": cutoff, "Threshold": threshold}
+            row.update((field, result[name][i, j].item()) for field, name in SWEEP_FIELDS.items())
+            rows.append(row)
+    return rows
+
+
+def grid(values, value_range):
+    """Explicit values if given, otherwise N evenly spaced values of (START, STOP, N)"""
+    if values:
+        return np.array(sorted(values), dtype=np.float64)
+    start, stop, n = value_range
+    return np.linspace(start, stop, int(n))
+
+
+# sweep distance cutoffs x ΔASA thresholds from one neighbour search and the .rsa files, e.g.
+#   python interface_sweep.py                                   (4-12 A x 0.01-20 A^2, 50 x 50)
+#   python interface_sweep.py --cutoffs 5 8 10 --thresholds 0.01 1 5 --npz sweep.npz
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jaccard/overlap of distance and ΔASA interfaces over a grid")
+    parser.add_argument("--pdb", default=PDB_FILE)
+    parser.add_argument("--rsa", nargs=3, default=[RSA_COMPLEX, RSA_A, RSA_B], metavar=("COMPLEX", "A", "B"))
+    parser.add_argument("--cutoff-range", type=float, nargs=3, default=list(CUTOFF_RANGE),
+                        metavar=("START", "STOP", "N"), help="evenly spaced distance cutoffs in A")
+    parser.add_argument("--threshold-range", type=float, nargs=3, default=list(THRESHOLD_RANGE),
+                        metavar=("START", "STOP", "N"), help="evenly spaced ΔASA thresholds in A^2")
+    parser.add_argument("--cutoffs", type=float, nargs="+", help="explicit cutoffs (instead of --cutoff-range)")
+    parser.add_argument("--thresholds", type=float, nargs="+", help="explicit thresholds (instead of --threshold-range)")
+    parser.add_argument("-o", "--output", default=OUTPUT_CSV)
+    parser.add_argument("--npz", help="also save the matrices (heatmap-ready, cutoffs x thresholds) to this .npz")
+    args = parser.parse_args()
+
+    cutoffs = grid(args.cutoffs, args.cutoff_range)
+    thresholds = grid(args.thresholds, args.threshold_range)
+    start = time.perf_counter()
+    distances = residue_contacts(args.pdb, max_cutoff=cutoffs.max()).residue_distances()
+    delta_asa = residue_delta_asa(*args.rsa)
+    prepared = time.perf_counter()
+    result = sweep(distances, delta_asa, cutoffs, thresholds)
+    done = time.perf_counter()
+
+    rows = sweep_rows(result)
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+    if args.npz:
+        np.savez(args.npz, **result)
+
+    print(f"{len(cutoffs)} cutoffs x {len(thresholds)} thresholds: inputs {prepared - start:.3f} s, "
+          f"sweep {(done - prepared) * 1e3:.1f} ms")
+    if np.all(np.isnan(result["jaccard"])):
+        parser.exit(1, "Both interfaces are empty over the whole grid\n")
+    i, j = np.unravel_index(np.nanargmax(result["jaccard"]), result["jaccard"].shape)
+    print(f"Best Jaccard: {result['jaccard'][i, j]:.4f} at {cutoffs[i]:.2f} A / {thresholds[j]:.2f} A^2 "
+          f"({result['intersection'][i, j]} shared, {result['only_dist'][i, j]} distance only, "
+          f"{result['only_asa'][i, j]} ΔASA only)")
+    print(f"CSV saved to: {args.output}" + (f", matrices to: {args.npz}" if args.npz else ""))
@@ -0,0 +1,406 @@
+import mmap
+import os
+import tempfile
+
+import numpy as np
+
+# fixed-width columns (0-based start, end, dtype) of the record types we read
+ATOM_COLUMNS = {
+    "name": (12, 16, "U4"),
+    "resname": (17, 20, "U3"),
+    "chain": (21, 22, "U1"),
+    "resnum": (22, 26, "i4"),
+    "x": (30, 38, "f8"),
+    "y": (38, 46, "f8"),
+    "z": (46, 54, "f8"),
+}
+XYZ_COLUMNS = {field: ATOM_COLUMNS[field] for field in ("x", "y", "z")}
+PDB_COLUMNS = dict(ATOM_COLUMNS, altloc=(16, 17, "U1"), occupancy=(54, 60, "f8"), bfactor=(60, 66, "f8"))
+PDBQT_COLUMNS = dict(ATOM_COLUMNS, q=(70, 76, "f8"), type=(77, 79, "U2"))
+# NACCESS .asa: PDB atom records with the accessibility and radius in place of occupancy/B
+ASA_COLUMNS = dict(ATOM_COLUMNS, asa=(54, 62, "f8"), radius=(62, 68, "f8"))
+# NACCESS .rsa: "RES SER A  19   117.17 100.6 ..." (all-atom absolute and relative ASA)
+RSA_COLUMNS = {
+    "resname": (4, 7, "U3"),
+    "chain": (8, 9, "U1"),
+    "resnum": (9, 13, "i4"),
+    "asa": (14, 22, "f8"),
+    "rel": (22, 28, "f8"),
+}
+
+# record columns and line prefixes read from each file type
+FORMATS = {
+    ".pdb": (PDB_COLUMNS, ("ATOM", "HETATM")),
+    ".pdbqt": (PDBQT_COLUMNS, ("ATOM", "HETATM")),
+    ".asa": (ASA_COLUMNS, ("ATOM",)),
+    ".rsa": (RSA_COLUMNS, ("RES",)),
+}
+
+# bytes of the file handed to the parser at a time in streaming mode
+CHUNK_BYTES = 1 << 24
+# compiled (binary, memory-mappable) copy of a parsed file: <file>.npy
+COMPILED_EXT = ".npy"
+
+_NEWLINE, _CR, _SPACE, _MINUS, _DOT, _ZERO = (ord(c) for c in "\n\r -.0")
+
+
+def _records_dtype(columns):
+    return np.dtype([(field, dtype) for field, (_, _, dtype) in columns.items()])
+
+
+def _line_bounds(buf):
+    """Start and end offsets of every line in a uint8 buffer"""
+    ends = np.flatnonzero(buf == _NEWLINE)
+    if len(buf) and buf[-1] != _NEWLINE:
+        ends = np.append(ends, len(buf))
+    starts = np.empty_like(ends)
+    starts[:1] = 0
+    starts[1:] = ends[:-1] + 1
+    # drop the carriage return of CRLF line ends
+    ends -= (ends > starts) & (buf[np.maximum(ends - 1, 0)] == _CR)
+    return starts, ends
+
+
+def _select_lines(buf, starts, ends, prefixes):
+    """Mask of the lines that start with one of prefixes"""
+    keep = np.zeros(len(starts), dtype=bool)
+    for prefix in prefixes:
+        prefix = np.frombuffer(prefix.encode(), dtype=np.uint8)
+        match = (ends - starts) >= len(prefix)
+        for k, c in enumerate(prefix):
+            match &= buf[np.minimum(starts + k, len(buf) - 1)] == c
+        keep |= match
+    return keep
+
+
+def _char_block(buf, starts, ends, first, last):
+    """(lines x (last - first)) uint8 matrix of columns first:last of the given lines, space padded"""
+    width = last - first
+    offsets = np.minimum(starts + first, len(buf))
+    # row i of the window view is buf[i:i + width], so this gathers whole rows at once; lines whose
+    # window runs past the end of the file are gathered from a space-padded copy of the tail only
+    inside = offsets + width <= len(buf)
+    chars = np.empty((len(starts), width), dtype=np.uint8)
+    if inside.any():
+        chars[inside] = np.lib.stride_tricks.sliding_window_view(buf, width)[offsets[inside]]
+    if not inside.all():
+        tail_start = int(offsets[~inside].min())
+        tail = np.concatenate((buf[tail_start:], np.full(width, _SPACE, dtype=np.uint8)))
+        chars[~inside] = np.lib.stride_tricks.sliding_window_view(tail, width)[offsets[~inside] - tail_start]
+    lengths = ends - starts - first
+    short = np.flatnonzero(lengths < width)
+    if len(short):
+        chars[short] = np.where(np.arange(width) >= lengths[short, None], _SPACE, chars[short])
+    return chars
+
+
+def _parse_number(field, dtype):
+    """Vectorized decimal parser for a fixed-width uint8 column block.
+
+    The digits are accumulated column by column into an exact integer
+    mantissa, which is divided once by the power of ten of the decimals, so
+    the result rounds exactly like float(). Blank fields parse as 0; exponent
+    notation is not used by these formats and is not supported.
+    """
+    mantissa = np.zeros(len(field), dtype=np.int64)
+    decimals = np.zeros(len(field), dtype=np.int64)
+    seen_dot = np.zeros(len(field), dtype=bool)
+    negative = np.zeros(len(field), dtype=bool)
+    for column in np.ascontiguousarray(field.T):
+        value = column - np.uint8(_ZERO)
+        digit = value <= 9
+        mantissa = np.where(digit, mantissa * 10 + value, mantissa)
+        decimals += digit & seen_dot
+        seen_dot |= column == _DOT
+        negative |= column == _MINUS
+    sign = np.where(negative, -1, 1)
+    if np.dtype(dtype).kind in "iu":
+        return (sign * mantissa).astype(dtype)
+    return sign * (mantissa / 10.0 ** decimals)
+
+
+def _parse_text(field, dtype):
+    """Stripped strings of a fixed-width uint8 column block"""
+    width = field.shape[1]
+    text = np.char.strip(np.ascontiguousarray(field).view(f"S{width}").ravel())
+    if np.dtype(dtype).kind == "S":
+        return text.astype(dtype)
+    # ASCII bytes -> UCS4 code points, without going through Python strings
+    codes = text.astype(f"S{width}").view(np.uint8).reshape(-1, width).astype(np.uint32)
+    return codes.view(f"U{width}").ravel().astype(dtype)
+
+
+def parse_block(buf, columns, prefixes=("ATOM", "HETATM")):
+    """Structured array of the columns of every line of buf starting with one of prefixes.
+
+    buf is a uint8 array holding whole lines (e.g. a view of a memory-mapped file).
+    """
+    records = np.zeros(0, dtype=_records_dtype(columns))
+    if len(buf) == 0:
+        return records
+    starts, ends = _line_bounds(buf)
+    keep = _select_lines(buf, starts, ends, prefixes)
+    first = min(start for start, _, _ in columns.values())
+    last = max(end for _, end, _ in columns.values())
+    chars = _char_block(buf, starts[keep], ends[keep], first, last)
+
+    records = np.zeros(len(chars), dtype=records.dtype)
+    for field, (start, end, dtype) in columns.items():
+        block = chars[:, start - first:end - first]
+        if np.dtype(dtype).kind in "SU":
+            records[field] = _parse_text(block, dtype)
+        else:
+            records[field] = _parse_number(block, dtype)
+    return records
+
+
+def _mapped(filename):
+    """(mmap, uint8 view) of a file; (None, empty array) for an empty file"""
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None, np.zeros(0, dtype=np.uint8)
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mm, np.frombuffer(mm, dtype=np.uint8)
+
+
+def _line_end(buf, pos):
+    """Offset just past the line containing buf[pos - 1]"""
+    while pos < len(buf) and buf[pos - 1] != _NEWLINE:
+        newline = np.flatnonzero(buf[pos:pos + 4096] == _NEWLINE)
+        pos = pos + int(newline[0]) + 1 if len(newline) else min(pos + 4096, len(buf))
+    return pos
+
+
+def iter_records(filename, columns, prefixes=("ATOM", "HETATM"), chunk_bytes=CHUNK_BYTES):
+    """Streams the records of a file as structured arrays of at most ~chunk_bytes of lines.
+
+    Only one chunk is parsed at a time, so memory use does not grow with the file.
+    """
+    mm, buf = _mapped(filename)
+    try:
+        start = 0
+        while start < len(buf):
+            end = _line_end(buf, min(start + chunk_bytes, len(buf)))
+            records = parse_block(buf[start:end], columns, prefixes)
+            start = end
+            if len(records):
+                yield records
+    finally:
+        del buf
+        if mm is not None:
+            mm.close()
+
+
+def compiled_path(filename, tag=None):
+    return filename + (f".{tag}" if tag else "") + COMPILED_EXT
+
+
+def load_compiled(path, sources, dtype):
+    """Memory-mapped array saved by save_compiled.
+
+    Returns None if the file is missing, older than any of sources, or holds
+    another dtype (e.g. written by an older version of the columns).
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        if any(os.stat(source).st_mtime_ns > mtime for source in sources):
+            return None
+        array = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if array.dtype != dtype:
+        return None
+    return array.view(np.ndarray)
+
+
+def save_compiled(path, array):
+    # write to a temporary file first so readers never map a partial file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def _is_default_format(filename, columns, prefixes):
+    return FORMATS.get(os.path.splitext(filename)[1]) == (columns, tuple(prefixes))
+
+
+def read_records(filename, columns, prefixes=("ATOM", "HETATM"), compiled=True):
+    """All the records of a file, parsed in one pass over the memory-mapped file.
+
+    If compile_records has written an up-to-date binary copy of the file,
+    that copy is memory-mapped instead and nothing is parsed.
+    """
+    if compiled and _is_default_format(filename, columns, prefixes):
+        records = load_compiled(compiled_path(filename), [filename], _records_dtype(columns))
+        if records is not None:
+            return records
+    mm, buf = _mapped(filename)
+    try:
+        return parse_block(buf, columns, prefixes)
+    finally:
+        del buf
+        if mm is not None:
+            mm.close()
+
+
+def model_ranges(filename):
+    """[(start, end)] byte ranges of the MODEL ... ENDMDL blocks of a file (the whole file if it has none)"""
+    mm, buf = _mapped(filename)
+    if mm is None:
+        return []
+    try:
+        ranges = []
+        start = 0 if mm[:5] == b"MODEL" else mm.find(b"\nMODEL")
+        while start != -1:
+            end = mm.find(b"\nENDMDL", start)
+            end = len(mm) if end == -1 else end + 1
+            ranges.append((start, end))
+            start = mm.find(b"\nMODEL", end - 1)
+        return ranges or [(0, len(mm))]
+    finally:
+        del buf
+        mm.close()
+
+
+def read_model(filename, start, end, columns=XYZ_COLUMNS, prefixes=("ATOM", "HETATM")):
+    """Records of one model (a byte range from model_ranges), read without loading the rest of the file"""
+    with open(filename, "rb") as f:
+        f.seek(start)
+        return parse_block(np.frombuffer(f.read(end - start), dtype=np.uint8), columns, prefixes)
+
+
+def iter_models(filename, columns=XYZ_COLUMNS, prefixes=("ATOM", "HETATM")):
+    """Streams the records of a multi-MODEL file one model at a time"""
+    for start, end in model_ranges(filename):
+        yield read_model(filename, start, end, columns, prefixes)
+
+
+def compile_records(filename, force=False):
+    """Saves the parsed records of a .pdb/.pdbqt/.asa/.rsa file next to it.
+
+    Returns the path written, or None if the compiled copy was already up to date.
+    """
+    columns, prefixes = FORMATS[os.path.splitext(filename)[1]]
+    path = compiled_path(filename)
+    if not force and load_compiled(path, [filename], _records_dtype(columns)) is not None:
+        return None
+    save_compiled(path, read_records(filename, columns, prefixes, compiled=False))
+    return path
+
+
+def read_pdb(filename, compiled=True):
+    return read_records(filename, PDB_COLUMNS, compiled=compiled)
+
+
+def read_pdbqt(filename, compiled=True):
+    return read_records(filename, PDBQT_COLUMNS, compiled=compiled)
+
+
+def read_asa(filename, compiled=True):
+    """Atom records of a NACCESS .asa file"""
+    return read_records(filename, ASA_COLUMNS, ("ATOM",), compiled)
+
+
+def read_rsa(filename, compiled=True):
+    """Residue records of a NACCESS .rsa file"""
+    return read_records(filename, RSA_COLUMNS, ("RES",), compiled)
+
+
+def keyed(records, keys, field):
+    """{(record[k] for k in keys): record[field]}; later records win on duplicate keys"""
+    columns = [records[k].tolist() for k in keys]
+    return dict(zip(zip(*columns), records[field].tolist()))
+
+
+def residue_index(records):
+    """Residue index of every record, and the (chain, resnum) of each residue in order of first appearance"""
+    chain, resnum = records["chain"], records["resnum"]
+    # residues are normally contiguous runs of records
+    new = np.ones(len(records), dtype=bool)
+    new[1:] = (chain[1:] != chain[:-1]) | (resnum[1:] != resnum[:-1])
+    firsts = np.flatnonzero(new)
+    keys = list(zip(chain[firsts].tolist(), resnum[firsts].tolist()))
+    if len(set(keys)) < len(keys):
+        # a residue split over several runs: number the residues by first appearance
+        index = {}
+        run_residue = np.array([index.setdefault(k, len(index)) for k in keys], dtype=np.int64)
+        keys = list(index)
+    else:
+        run_residue = np.arange(len(keys))
+    return run_residue[np.cumsum(new) - 1], keys
+
+
+def residue_sums(records, field="asa"):
+    """{(chain, resnum): sum of field} in order of first appearance"""
+    residue, keys = residue_index(records)
+    # bincount adds the values of each residue in file order, like a running sum
+    sums = np.bincount(residue, records[field], len(keys))
+    return dict(zip(keys, sums.tolist()))
+
+
+def first_altloc(records):
+    """Mask keeping one location per atom: the highest occupancy, the first one on ties (as Bio.PDB does)"""
+    keep = np.ones(len(records), dtype=bool)
+    best = {}
+    for k in np.flatnonzero(records["altloc"] != "").tolist():
+        key = (records["chain"][k], records["resnum"][k], records["name"][k])
+        if key not in best:
+            best[key] = k
+            continue
+        if records["occupancy"][k] > records["occupancy"][best[key]]:
+            keep[best[key]] = False
+            best[key] = k
+        else:
+            keep[k] = False
+    return keep
+
+
+class Structure():
+    """Coordinates and residue indices of the atoms of a structure file.
+
+    A flat stand-in for a Bio.PDB hierarchy where only positions and residue
+    identities are needed: xyz is (n_atoms, 3), and residue[k] is the index in
+    residues, a list of (chain, resnum), of the residue of atom k.
+    """
+
+    def __init__(self, records):
+        if "altloc" in records.dtype.names:
+            records = records[first_altloc(records)]
+        self.records = records
+        self.xyz = np.column_stack((records["x"], records["y"], records["z"]))
+        self.residue, self.residues = residue_index(records)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def chains(self):
+        """Chain ids in file order"""
+        return list(dict.fromkeys(self.records["chain"].tolist()))
+
+    def chain_id(self, *candidates):
+        """First of candidates present in the structure (e.g. chain_id("E", "B") for the RBD)"""
+        present = set(self.chains)
+        for chain in candidates:
+            if chain in present:
+                return chain
+        raise KeyError(f"None of the chains {', '.join(candidates)} found")
+
+    def select(self, chain):
+        """Structure of the atoms of one chain"""
+        return Structure(self.records[self.records["chain"] == chain])
+
+
+def load_structure(filename):
+    """Structure of a .pdb/.pdbqt file (from the compiled copy when there is one)"""
+    if os.path.splitext(filename)[1] == ".pdbqt":
+        return Structure(read_pdbqt(filename))
+    return Structure(read_pdb(filename))
+
+
+def rsa_values(filename, keys=("chain", "resnum"), missing_ok=False):
+    """{(chain, resnum): all-atom ASA} of a .rsa file ({} for a missing file if missing_ok)"""
+    if missing_ok and not os.path.exists(filename):
+        return {}
+    return keyed(read_rsa(filename), keys, "asa")
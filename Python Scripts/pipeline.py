@@ -0,0 +1,254 @@
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import telemetry
+from interface_store import READONLY_ENV
+from result_cache import file_digest
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CLI = os.path.join(SCRIPTS_DIR, "cli.py")
+STATE_DIR = ".pipeline"
+STATE_FILE = os.path.join(STATE_DIR, "state.json")
+
+WT_INPUTS = ["6m0j_fixed.pdbqt", "6m0j_fixed.asa", "A.asa", "B.asa", "vdwprm.txt"]
+RSA_INPUTS = ["6m0j_fixed.rsa", "A.rsa", "B.rsa"]
+VARIANT_INPUTS = ["mut_*_complex.pdbqt", "mut_*_complex.asa", "mut_*_A.asa", "mut_*_B.asa"]
+# modules behind the energy results; a change to any of them reruns the energy stages
+ENERGY_MODULES = ["interaction_energy.py", "pdb_io.py", "telemetry.py"]
+SCAN_MODULES = ENERGY_MODULES + ["alanine_scan.py", "scan_runner.py", "result_cache.py", "decomposition.py"]
+INTERFACE_MODULES = ["contacts.py", "spatial.py", "pdb_io.py"]
+STORE_MODULES = ["interface_store.py", "pdb_io.py"]
+INTERFACE_FILE = "interfaces/WT.npy"
+
+
+class Stage():
+    """One step of the workflow: a cli.py command with the files it reads and writes.
+
+    inputs may hold glob patterns (matched when the stage is checked);
+    modules are script files, also treated as inputs, so editing the code
+    reruns the stage. Every stage's output is logged to .pipeline/<name>.log.
+    """
+
+    def __init__(self, name, command, inputs=(), outputs=(), modules=()):
+        self.name = name
+        self.command = list(command)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.modules = list(modules)
+
+    @property
+    def log(self):
+        return os.path.join(STATE_DIR, f"{self.name}.log")
+
+    def input_files(self):
+        files = []
+        for pattern in self.inputs:
+            files += sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        files += [os.path.join(SCRIPTS_DIR, m) for m in self.modules]
+        return files
+
+    def stamp(self):
+        """What the stage's last run depended on: its command and the contents of its inputs"""
+        return {"command": self.command, "inputs": {f: file_digest(f) for f in self.input_files()}}
+
+
+# Steps 1-5 of the README; run from the data folder
+STAGES = [
+    Stage("interface", ["interface-asa"], RSA_INPUTS, [INTERFACE_FILE],
+          ["interface_asa_variation.py"] + STORE_MODULES),
+    Stage("compare", ["compare"], ["6m0j_fixed.pdb"] + RSA_INPUTS, [],
+          ["compare_interfaces.py"] + INTERFACE_MODULES),
+    Stage("sweep", ["sweep"], ["6m0j_fixed.pdb"] + RSA_INPUTS, ["interface_sweep.csv"],
+          ["interface_sweep.py"] + INTERFACE_MODULES),
+    Stage("energy", ["energy"], WT_INPUTS, [], ENERGY_MODULES),
+    Stage("decompose", ["decompose"], WT_INPUTS, ["residue_pair_energies.csv"],
+          ENERGY_MODULES + ["decomposition.py"]),
+    Stage("scan", ["scan-plot", "--no-show"], WT_INPUTS + [INTERFACE_FILE],
+          ["alanine_scanning_results.csv", "alanine_scanning_plot.png"],
+          SCAN_MODULES + STORE_MODULES + ["alanine_scanning_plot.py"]),
+    Stage("correlation", ["correlation"], WT_INPUTS + [INTERFACE_FILE],
+          ["correlation_plot.png", "comparison_plot.png"],
+          SCAN_MODULES + STORE_MODULES + ["compare_scanning_vs_energy.py"]),
+    Stage("variants", ["variants"], WT_INPUTS + VARIANT_INPUTS, ["variant_ddg.csv"],
+          ENERGY_MODULES + ["variant_energy.py", "scan_runner.py", "result_cache.py"]),
+    Stage("pml-interface", ["pymol-asa"], [INTERFACE_FILE], ["visualize_interface.pml"],
+          ["create_interface_pymol_asa_variation.py"] + STORE_MODULES),
+    Stage("pml-distance", ["pymol-distance"], ["6m0j_fixed.pdb"], ["visualize_distance_interface.pml"],
+          ["create_interface_pymol_distance.py"] + INTERFACE_MODULES),
+    Stage("pml-compare", ["pymol-compare"], ["6m0j_fixed.pdb"] + RSA_INPUTS, ["visualize_comparison.pml"],
+          ["compare_interfaces_pymol.py"] + INTERFACE_MODULES),
+    Stage("pml-hotspots", ["pymol-hotspots"], [], ["visualize_hotspots.pml"],
+          ["pymol_visualization_hotspots.py"]),
+    Stage("pml-hydrophobicity", ["pymol-hydrophobicity"], [], ["visualize_hydrophobicity.pml"],
+          ["visualize_hydrophobicity_pymol.py"]),
+]
+
+
+def dependencies(stages):
+    """{stage name: names of the stages producing one of its inputs}"""
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers:
+                raise ValueError(f"{output} is written by both {producers[output]} and {stage.name}")
+            producers[output] = stage.name
+    deps = {stage.name: {producers[f] for f in stage.inputs if f in producers} - {stage.name}
+            for stage in stages}
+
+    # reject cycles (depth-first search)
+    done, visiting = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through stage {name}")
+        visiting.add(name)
+        for dep in deps[name]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in deps:
+        visit(name)
+    return deps
+
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def is_stale(stage, state):
+    """True if an output or the log is missing, or an input or the command changed since the last run"""
+    if not all(os.path.exists(f) for f in stage.outputs + [stage.log]):
+        return True
+    return state.get(stage.name) != stage.stamp()
+
+
+def run_stage(stage):
+    """Runs the stage's command with its output in the stage log; returns (returncode, seconds)"""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    env = dict(os.environ, MPLBACKEND="Agg")
+    # only the stage that writes the interface store may build or rebuild it; the others read it as is
+    if INTERFACE_FILE not in stage.outputs:
+        env[READONLY_ENV] = "1"
+    start = time.perf_counter()
+    with open(stage.log, "w") as log:
+        returncode = subprocess.call([sys.executable, CLI] + stage.command, stdout=log,
+                                     stderr=subprocess.STDOUT, env=env)
+    return returncode, time.perf_counter() - start
+
+
+def run_pipeline(stages=STAGES, targets=None, jobs=4, force=False, dry_run=False):
+    """Runs the out-of-date stages (and the stages they depend on), independent ones concurrently.
+
+    targets restricts the run to those stages and their dependencies.
+    Returns one {"stage", "status", "seconds"} dict per stage considered,
+    status being "ran", "up to date", "failed", "skipped" (a dependency
+    failed) or, with dry_run, "stale".
+    """
+    deps = dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    wanted = set(by_name) if not targets else set()
+    todo = list(targets or [])
+    while todo:
+        name = todo.pop()
+        if name not in by_name:
+            raise KeyError(f"Unknown stage '{name}'")
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+
+    state = load_state()
+    results = {}
+    # with dry_run the dependents of a stale stage count as stale, as its outputs are not rebuilt
+    rerun = set()
+    pending = [s for s in stages if s.name in wanted]
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            for stage in list(pending):
+                stage_deps = deps[stage.name] & wanted
+                if any(d not in results for d in stage_deps):
+                    continue
+                pending.remove(stage)
+                if any(results[d]["status"] in ("failed", "skipped") for d in stage_deps):
+                    results[stage.name] = {"stage": stage.name, "status": "skipped", "seconds": 0.0}
+                elif not (force or is_stale(stage, state) or (dry_run and stage_deps & rerun)):
+                    results[stage.name] = {"stage": stage.name, "status": "up to date", "seconds": 0.0}
+                elif dry_run:
+                    rerun.add(stage.name)
+                    results[stage.name] = {"stage": stage.name, "status": "stale", "seconds": 0.0}
+                else:
+                    # the inputs are stamped before the run, so a change made meanwhile reruns it next time
+                    running[pool.submit(run_stage, stage)] = (stage, stage.stamp())
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, stamp = running.pop(future)
+                returncode, seconds = future.result()
+                if returncode == 0:
+                    state[stage.name] = stamp
+                    status = "ran"
+                else:
+                    state.pop(stage.name, None)
+                    status = "failed"
+                results[stage.name] = {"stage": stage.name, "status": status, "seconds": seconds}
+                telemetry.emit("pipeline_stage", stage=stage.name, status=status, seconds=seconds)
+                save_state(state)
+    return [results[s.name] for s in stages if s.name in results]
+
+
+# rebuild whatever is out of date in the data folder, e.g.
+#   python pipeline.py                    (every stage, 4 at a time)
+#   python pipeline.py scan pml-interface --jobs 2
+#   python pipeline.py --dry-run
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the out-of-date stages of the analysis workflow")
+    parser.add_argument("targets", nargs="*", help="stages to bring up to date (default: all)")
+    parser.add_argument("--jobs", type=int, default=4, help="stages run at the same time")
+    parser.add_argument("--force", action="store_true", help="rerun the stages even if they are up to date")
+    parser.add_argument("--dry-run", action="store_true", help="only list the stages that would run")
+    parser.add_argument("--list", action="store_true", help="list the stages and their dependencies")
+    parser.add_argument("--telemetry", help="append JSON-lines stage timings to this file")
+    args = parser.parse_args()
+    if args.telemetry:
+        telemetry.enable(args.telemetry)
+
+    if args.list:
+        for name, stage_deps in dependencies(STAGES).items():
+            print(f"{name:<20} <- {', '.join(sorted(stage_deps)) or '-'}")
+        sys.exit(0)
+
+    start = time.perf_counter()
+    try:
+        results = run_pipeline(STAGES, args.targets, jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    except KeyError as e:
+        parser.error(e.args[0])
+    for r in results:
+        print(f"{r['stage']:<20} {r['status']:<11} {r['seconds']:8.2f} s")
+    print(f"Total: {time.perf_counter() - start:.2f} s (logs in {STATE_DIR}/)")
+    failed = [r["stage"] for r in results if r["status"] == "failed"]
+    if failed:
+        parser.exit(1, f"Failed: {', '.join(failed)} (see {STATE_DIR}/<stage>.log)\n")
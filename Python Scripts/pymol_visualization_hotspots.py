@@ -79,8 +79,14 @@ set antialias, 2
 
 """
 
-# Write the file
-with open(pml_filename, "w") as f:
-    f.write(pml_content)
 
-print(f"PyMOL script '{pml_filename}' created successfully.")
+def main():
+    # Write the file
+    with open(pml_filename, "w") as f:
+        f.write(pml_content)
+
+    print(f"PyMOL script '{pml_filename}' created successfully.")
+
+
+if __name__ == "__main__":
+    main()
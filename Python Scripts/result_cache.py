@@ -0,0 +1,201 @@
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+
+import interaction_energy
+import decomposition
+from interaction_energy import (
+    VDW_PRM_FILE,
+    ASA_THRESHOLD,
+    R2_MIN,
+    R2_MAX,
+    MIN_CHARGE,
+    COULOMB_K,
+    cached_atom_table,
+    compute_interaction_energy,
+)
+
+CACHE_DIR = os.environ.get("ENERGY_CACHE_DIR", ".energy_cache")
+CACHE_MAX_BYTES = int(os.environ.get("ENERGY_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+# modules whose code determines each kind of cached result (what its computation imports)
+ENERGY_MODULES = ("interaction_energy", "pdb_io")
+KIND_MODULES = {
+    "wt": ENERGY_MODULES,
+    "variant": ENERGY_MODULES + ("variant_energy",),
+    "alanine": ENERGY_MODULES + ("alanine_scan", "scan_runner", "sasa", "spatial"),
+    "contrib": ENERGY_MODULES + ("decomposition",),
+    "complex": ENERGY_MODULES + ("batch_energy", "sasa", "spatial", "scan_runner"),
+}
+
+_digests = {}
+
+
+def file_digest(path):
+    """sha256 of a file's contents (re-hashed only when its size or mtime changes)"""
+    if not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if key not in _digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _digests[key] = h.hexdigest()
+    return _digests[key]
+
+
+def code_version(kind):
+    """Digest of the modules whose code determines the cached results of a kind (all of them if unknown)"""
+    modules = KIND_MODULES.get(kind) or sorted({m for ms in KIND_MODULES.values() for m in ms})
+    h = hashlib.sha256()
+    for module in modules:
+        h.update(file_digest(os.path.join(SCRIPTS_DIR, module + ".py")).encode())
+    return h.hexdigest()
+
+
+def cache_key(kind, files, prm_file=VDW_PRM_FILE, **params):
+    """Content address of a result: input file contents, force field, thresholds, cutoffs and code"""
+    elec_table = interaction_energy._elec_table
+    description = {
+        "kind": kind,
+        "files": [file_digest(f) for f in files],
+        "forcefield": file_digest(prm_file),
+        "asa_threshold": ASA_THRESHOLD,
+        "cutoffs": [R2_MIN, R2_MAX, MIN_CHARGE, COULOMB_K],
+        "elec_table": elec_table.spacing if elec_table is not None else None,
+        "code": code_version(kind),
+        "params": params,
+    }
+    return kind + "-" + hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache():
+    """Size-bounded on-disk store of JSON results, one file per content key.
+
+    A hit refreshes the entry's modification time, and put() evicts the
+    least recently used entries once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        return value
+
+    def put(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        # write to a temporary file first so concurrent readers never see partial entries
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def entries(self):
+        """[(path, size, mtime)] of the stored results, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                st = os.stat(os.path.join(self.directory, name))
+                entries.append((os.path.join(self.directory, name), st.st_size, st.st_mtime))
+        return sorted(entries, key=lambda e: e[2])
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def invalidate(self, kind=None):
+        """Removes every entry (or only those of one kind); returns how many were removed"""
+        removed = 0
+        for path, _, _ in self.entries():
+            if kind is None or os.path.basename(path).startswith(kind + "-"):
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def cached(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+
+def cached_wt_energy(files, cache=None):
+    """(total, E_vdw, E_elec, E_solv) of the complex (pdbqt, asa_complex, asa_A, asa_E)"""
+    cache = cache or ResultCache()
+    return tuple(cache.cached(
+        cache_key("wt", files),
+        lambda: list(compute_interaction_energy(cached_atom_table(*files), return_components=True))
+    ))
+
+
+def cached_alanine_scan(files, residues, method="incremental", workers=1, chunksize=4, cache=None):
+    """Alanine mutant (total, E_vdw, E_elec, E_solv) per residue, in the order of residues"""
+    from scan_runner import map_residues
+
+    cache = cache or ResultCache()
+    residues = [tuple(r) for r in residues]
+
+    def compute():
+        energies = map_residues(cached_atom_table(*files), residues, method=method,
+                                workers=workers, chunksize=chunksize)
+        return [list(e) for e in energies]
+
+    energies = cache.cached(cache_key("alanine", files, residues=residues, method=method), compute)
+    return [tuple(e) for e in energies]
+
+
+def cached_residue_contributions(files, residues, cache=None):
+    """Direct interaction energy of each residue (row/column sums of the decomposition)"""
+    cache = cache or ResultCache()
+    residues = [tuple(r) for r in residues]
+
+    def compute():
+        matrix = decomposition.decompose_interaction(cached_atom_table(*files))
+        return [matrix.residue_total(chain, res) for chain, res in residues]
+
+    return cache.cached(cache_key("contrib", files, residues=residues), compute)
+
+
+# cache maintenance, e.g.
+#   python result_cache.py stats
+#   python result_cache.py invalidate [--kind alanine]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the on-disk energy result cache")
+    parser.add_argument("command", choices=["stats", "invalidate"])
+    parser.add_argument("--kind", help=f"only invalidate entries of this kind ({', '.join(KIND_MODULES)})")
+    parser.add_argument("--dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    cache = ResultCache(args.dir)
+    if args.command == "invalidate":
+        print(f"Removed {cache.invalidate(args.kind)} cached results from {args.dir}")
+    else:
+        entries = cache.entries()
+        total = sum(size for _, size, _ in entries)
+        print(f"{len(entries)} cached results, {total / 1024:.1f} KiB in {args.dir} "
+              f"(limit {cache.max_bytes / 1024 / 1024:.0f} MiB)")
@@ -0,0 +1,336 @@
+import argparse
+import math
+
+import numpy as np
+
+from interaction_energy import ASA_THRESHOLD
+from pdb_io import ASA_COLUMNS, keyed, load_structure, read_asa, residue_sums, rsa_values
+from spatial import close_pairs
+
+PROBE_RADIUS = 1.4
+N_POINTS = 960
+# atom pairs x sphere points tested per block in shrake_rupley
+SASA_BLOCK = 1 << 22
+ALA_ATOMS = ("N", "CA", "C", "O", "CB")
+
+# NACCESS (vdw.radii) atomic radii: sp3 carbons 1.87, sp2 carbons 1.76, N 1.65, O 1.40, S 1.85
+ELEMENT_RADII = {"C": 1.87, "N": 1.65, "O": 1.40, "S": 1.85}
+DEFAULT_RADIUS = 1.80
+SP2_CARBONS = {
+    "ARG": {"CZ"},
+    "ASN": {"CG"},
+    "ASP": {"CG"},
+    "GLN": {"CD"},
+    "GLU": {"CD"},
+    "HIS": {"CG", "CD2", "CE1"},
+    "PHE": {"CG", "CD1", "CD2", "CE1", "CE2", "CZ"},
+    "TRP": {"CG", "CD1", "CD2", "CE2", "CE3", "CZ2", "CZ3", "CH2"},
+    "TYR": {"CG", "CD1", "CD2", "CE1", "CE2", "CZ"},
+}
+for _name in ("HID", "HIE", "HIP"):
+    SP2_CARBONS[_name] = SP2_CARBONS["HIS"]
+SPECIAL_RADII = {("LYS", "NZ"): 1.50}
+
+
+def atom_radius(resname, name):
+    """NACCESS-style radius of a heavy atom (None for hydrogens)"""
+    element = name.lstrip("0123456789")[:1]
+    if element == "H":
+        return None
+    if (resname, name) in SPECIAL_RADII:
+        return SPECIAL_RADII[(resname, name)]
+    if element == "C" and (name == "C" or name in SP2_CARBONS.get(resname, ())):
+        return 1.76
+    return ELEMENT_RADII.get(element, DEFAULT_RADIUS)
+
+
+def atom_radii(records):
+    """Radius of every record (NaN for hydrogens), looked up once per distinct (resname, name)"""
+    pairs, inverse = np.unique(np.char.add(np.char.add(records["resname"], " "), records["name"]),
+                               return_inverse=True)
+    radii = [atom_radius(*pair.split(" ")) for pair in pairs.tolist()]
+    return np.array([np.nan if r is None else r for r in radii])[inverse.ravel()]
+
+
+def sphere_points(n=N_POINTS):
+    """n nearly uniform unit vectors (golden-section spiral)"""
+    k = np.arange(n) + 0.5
+    z = 1 - 2 * k / n
+    r = np.sqrt(1 - z * z)
+    phi = math.pi * (3 - math.sqrt(5)) * k
+    return np.column_stack((r * np.cos(phi), r * np.sin(phi), z))
+
+
+def shrake_rupley(xyz, radii, groups=None, probe=PROBE_RADIUS, n_points=N_POINTS, atoms=None):
+    """Shrake-Rupley accessible surface area of every atom (or only of the indices in atoms).
+
+    Each atom's sphere of radius r + probe is sampled with n_points points;
+    a point is buried if it lies inside the expanded sphere of a neighbour.
+    Neighbours come from a cell list and all the points of a block of atom
+    pairs are tested at once.
+
+    With groups (one label per atom, e.g. the chain) the area is also
+    computed with every group isolated, counting only occlusion by atoms of
+    the same group. Returns asa, or (asa_complex, asa_free) when groups is given.
+    Atoms left out of `atoms` still occlude the others.
+    """
+    R_all = np.asarray(radii, dtype=np.float64) + probe
+    targets = np.arange(len(xyz)) if atoms is None else np.asarray(atoms, dtype=np.int64)
+    R = R_all[targets]
+    sphere = sphere_points(n_points)
+    n = len(targets)
+
+    # i indexes targets, j all atoms
+    i, j, d2 = close_pairs(xyz[targets], xyz, 2 * R_all.max() if len(xyz) else 1.0)
+    keep = (d2 < (R[i] + R_all[j]) ** 2) & (targets[i] != j)
+    i, j, d2 = i[keep], j[keep], d2[keep]
+    other = (groups[targets[i]] != groups[j]) if groups is not None else np.zeros(len(i), dtype=bool)
+    # pairs grouped by atom, then same-group occluders before other-group ones
+    order = np.lexsort((other, i))
+    i, j, d2, other = i[order], j[order], d2[order], other[order]
+
+    exposed = np.full(n, n_points)
+    exposed_free = np.full(n, n_points)
+    sphere_t = sphere.T.astype(np.float32)
+    pair_start = np.searchsorted(i, np.arange(n + 1))
+    atoms_per_block = max(1, SASA_BLOCK // (n_points * max(1, len(i) // max(n, 1))))
+    for a in range(0, n, atoms_per_block):
+        b = min(a + atoms_per_block, n)
+        p, q = pair_start[a], pair_start[b]
+        if p == q:
+            continue
+        bi, bj, bother = i[p:q], j[p:q], other[p:q]
+        # |x_i + R_i s - x_j| < R_j  <=>  s.(x_j - x_i) > (d2 + R_i^2 - R_j^2) / (2 R_i)
+        limit = (d2[p:q] + R[bi] ** 2 - R_all[bj] ** 2) / (2 * R[bi])
+        buried = (xyz[bj] - xyz[targets[bi]]).astype(np.float32) @ sphere_t > limit[:, None].astype(np.float32)
+
+        # OR over the occluders of each (atom, same/other group) run, on bit-packed points
+        run = np.flatnonzero(np.r_[True, (bi[1:] != bi[:-1]) | (bother[1:] != bother[:-1])])
+        run_buried = np.bitwise_or.reduceat(np.packbits(buried, axis=1), run, axis=0)
+        run_atom, run_other = bi[run] - a, bother[run]
+
+        buried_same = np.zeros((b - a, run_buried.shape[1]), dtype=np.uint8)
+        buried_same[run_atom[~run_other]] = run_buried[~run_other]
+        buried_all = buried_same.copy()
+        buried_all[run_atom[run_other]] |= run_buried[run_other]
+        exposed[a:b] = n_points - np.unpackbits(buried_all, axis=1, count=n_points).sum(axis=1)
+        exposed_free[a:b] = n_points - np.unpackbits(buried_same, axis=1, count=n_points).sum(axis=1)
+
+    area = 4 * math.pi * R ** 2 / n_points
+    if groups is None:
+        return area * exposed
+    return area * exposed, area * exposed_free
+
+
+def asa_records(records, radii, asa):
+    """Records in the layout of a parsed NACCESS .asa file"""
+    out = np.zeros(len(records), dtype=[(f, d) for f, (_, _, d) in ASA_COLUMNS.items()])
+    for field in out.dtype.names:
+        if field in records.dtype.names:
+            out[field] = records[field]
+    out["radius"] = radii
+    out["asa"] = asa
+    return out
+
+
+def complex_asa(pdb_file, probe=PROBE_RADIUS, n_points=N_POINTS, radii=None):
+    """(complex, free) ASA records of the heavy atoms of a structure, from one call.
+
+    The free ASA of each atom is that of its chain on its own. radii may be
+    a {(chain, resnum, name): radius} mapping (e.g. taken from an existing
+    .asa file) to override the built-in table.
+    """
+    records, r = heavy_atoms(load_structure(pdb_file).records, radii)
+    asa_complex, asa_free = shrake_rupley(coordinates(records), r, records["chain"], probe, n_points)
+    return asa_records(records, r, asa_complex), asa_records(records, r, asa_free)
+
+
+def atom_keys(records):
+    return list(zip(records["chain"].tolist(), records["resnum"].tolist(), records["name"].tolist()))
+
+
+def coordinates(records):
+    return np.column_stack((records["x"], records["y"], records["z"]))
+
+
+def heavy_atoms(records, radii=None):
+    """(records, radii) of the atoms that get a surface, i.e. without hydrogens"""
+    if radii is None:
+        r = atom_radii(records)
+    else:
+        r = np.array([radii.get(k, np.nan) for k in atom_keys(records)])
+    heavy = ~np.isnan(r) & (r > 0)
+    return records[heavy], r[heavy]
+
+
+class IncrementalSASA():
+    """Complex and free-chain SASA of structures that differ from a reference in a few atoms.
+
+    The reference areas are computed once. For a mutant, only the atoms that
+    were added or moved, and the atoms whose expanded sphere overlaps one
+    that was removed, moved or added, are recomputed. Every other atom has the
+    same occluders as in the reference, so its reference value is exactly
+    what a full pass would give.
+    """
+
+    def __init__(self, records, probe=PROBE_RADIUS, n_points=N_POINTS, radii=None):
+        self.probe = probe
+        self.n_points = n_points
+        self.radii_override = radii
+        self.records, self.radii = heavy_atoms(records, radii)
+        self.xyz = coordinates(self.records)
+        self.bound, self.free = shrake_rupley(self.xyz, self.radii, self.records["chain"], probe, n_points)
+        self.index = {k: i for i, k in enumerate(atom_keys(self.records))}
+
+    @classmethod
+    def from_pdb(cls, pdb_file, probe=PROBE_RADIUS, n_points=N_POINTS, radii=None):
+        return cls(load_structure(pdb_file).records, probe, n_points, radii)
+
+    def update(self, records):
+        """(asa_bound, asa_free, ref, recomputed) for the heavy atoms of a mutant.
+
+        ref[k] is the reference index of mutant atom k when the atom is
+        unchanged (same name, position and radius), -1 otherwise;
+        recomputed holds the indices of the atoms that were recomputed.
+        """
+        records, radii = heavy_atoms(records, self.radii_override)
+        xyz = coordinates(records)
+        ref = np.array([self.index.get(k, -1) for k in atom_keys(records)], dtype=np.int64)
+        matched = ref >= 0
+        matched[matched] = (np.all(self.xyz[ref[matched]] == xyz[matched], axis=1)
+                            & (self.radii[ref[matched]] == radii[matched]))
+        ref[~matched] = -1
+
+        # reference atoms that are gone from (or moved in) the mutant, and the mutant's new atoms
+        lost = np.ones(len(self.records), dtype=bool)
+        lost[ref[matched]] = False
+        changed_xyz = np.concatenate((self.xyz[lost], xyz[~matched]))
+        changed_R = np.concatenate((self.radii[lost], radii[~matched])) + self.probe
+
+        R = radii + self.probe
+        touched = ~matched
+        if len(changed_xyz):
+            i, j, d2 = close_pairs(xyz, changed_xyz, R.max() + changed_R.max())
+            touched[i[d2 < (R[i] + changed_R[j]) ** 2]] = True
+        recomputed = np.flatnonzero(touched)
+
+        asa_bound = np.where(matched, self.bound[np.maximum(ref, 0)], 0.0)
+        asa_free = np.where(matched, self.free[np.maximum(ref, 0)], 0.0)
+        if len(recomputed):
+            asa_bound[recomputed], asa_free[recomputed] = shrake_rupley(
+                xyz, radii, records["chain"], self.probe, self.n_points, atoms=recomputed
+            )
+        return records, radii, asa_bound, asa_free, ref, recomputed
+
+    def mutant_asa(self, records):
+        """(complex, free) ASA records of a mutant, as complex_asa would return them"""
+        records, radii, asa_bound, asa_free, _, _ = self.update(records)
+        return asa_records(records, radii, asa_bound), asa_records(records, radii, asa_free)
+
+    def truncate(self, chain, res, keep=ALA_ATOMS):
+        """Reference records with the side chain of (chain, res) cut back to alanine"""
+        atoms = self.records
+        in_residue = (atoms["chain"] == chain) & (atoms["resnum"] == res)
+        mutant = atoms[~in_residue | np.isin(atoms["name"], keep)].copy()
+        mutant["resname"][(mutant["chain"] == chain) & (mutant["resnum"] == res)] = "ALA"
+        return mutant
+
+    def alanine_delta(self, chain, res, keep=ALA_ATOMS):
+        """{(chain, resnum, name): (d_bound, d_free)} for the remaining atoms whose ASA changes
+        when (chain, res) is truncated to alanine"""
+        records, _, asa_bound, asa_free, ref, recomputed = self.update(self.truncate(chain, res, keep))
+        recomputed = recomputed[ref[recomputed] >= 0]
+        keys = atom_keys(records[recomputed])
+        d_bound = asa_bound[recomputed] - self.bound[ref[recomputed]]
+        d_free = asa_free[recomputed] - self.free[ref[recomputed]]
+        return {k: (b, f) for k, b, f in zip(keys, d_bound.tolist(), d_free.tolist()) if b or f}
+
+
+def atomic_asa(records):
+    """{(chain, resnum, name): ASA}, as returned by read_atomic_asa"""
+    return keyed(records, ("chain", "resnum", "name"), "asa")
+
+
+def residue_asa(records):
+    """{(chain, resnum): ASA}, as returned by get_residue_asa"""
+    return residue_sums(records)
+
+
+def write_asa(records, filename):
+    """Writes ASA records in the NACCESS .asa layout"""
+    with open(filename, "w") as f:
+        for serial, atom in enumerate(records.tolist(), start=1):
+            rec = dict(zip(records.dtype.names, atom))
+            name = rec["name"] if len(rec["name"]) == 4 else " " + rec["name"]
+            f.write(f"ATOM  {serial:5d} {name:<4} {rec['resname']:>3} {rec['chain']}{rec['resnum']:4d}    "
+                    f"{rec['x']:8.3f}{rec['y']:8.3f}{rec['z']:8.3f}{rec['asa']:8.3f}{rec['radius']:6.2f}\n")
+
+
+def compare_asa(computed, reference):
+    """Agreement of two keyed ASA dicts over the keys of reference"""
+    ref = np.array(list(reference.values()))
+    got = np.array([computed.get(k, 0.0) for k in reference])
+    diff = got - ref
+    return {
+        "n": len(ref),
+        "rmsd": float(np.sqrt(np.mean(diff ** 2))) if len(ref) else 0.0,
+        "max_abs": float(np.max(np.abs(diff))) if len(ref) else 0.0,
+        "total_rel": float(np.sum(got) / np.sum(ref) - 1) if np.sum(ref) else 0.0,
+    }
+
+
+def asa_interface(bound, free, threshold=ASA_THRESHOLD):
+    """Residues whose ASA drops by more than threshold on binding"""
+    return {k for k, v in bound.items() if free.get(k, 0.0) - v > threshold}
+
+
+# replace the three NACCESS runs of a complex, and/or check against existing NACCESS output, e.g.
+#   python sasa.py 6m0j_fixed.pdb --validate
+#   python sasa.py 6m0j_fixed.pdb --write 6m0j_fixed.asa A=A.asa E=B.asa
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-process Shrake-Rupley SASA of a complex and its free chains")
+    parser.add_argument("pdb", help="complex structure (.pdb)")
+    parser.add_argument("--probe", type=float, default=PROBE_RADIUS)
+    parser.add_argument("--points", type=int, default=N_POINTS, help="sphere points per atom")
+    parser.add_argument("--write", nargs="+", metavar="FILE",
+                        help="complex .asa path followed by CHAIN=path for each free chain")
+    parser.add_argument("--validate", action="store_true",
+                        help="compare with 6m0j_fixed.asa/.rsa, A.asa/.rsa and B.asa/.rsa")
+    parser.add_argument("--radii-from", help="take the atomic radii from this NACCESS .asa file")
+    args = parser.parse_args()
+
+    radii = None
+    if args.radii_from:
+        radii = keyed(read_asa(args.radii_from), ("chain", "resnum", "name"), "radius")
+    bound, free = complex_asa(args.pdb, args.probe, args.points, radii)
+    print(f"{len(bound)} heavy atoms, total ASA {bound['asa'].sum():.1f} A^2 (complex), "
+          f"{free['asa'].sum():.1f} A^2 (free chains)")
+
+    if args.write:
+        write_asa(bound, args.write[0])
+        for spec in args.write[1:]:
+            chain, _, filename = spec.partition("=")
+            write_asa(free[free["chain"] == chain], filename)
+        print(f"Written: {', '.join(args.write)}")
+
+    if args.validate:
+        references = {"complex": ("6m0j_fixed.asa", "6m0j_fixed.rsa", bound),
+                      "free": (("A.asa", "B.asa"), ("A.rsa", "B.rsa"), free)}
+        print(f"{'':<8} {'level':<8} {'n':>6} {'RMSD':>8} {'max|d|':>8} {'total':>8}")
+        for label, (asa_files, rsa_files, records) in references.items():
+            asa_files = (asa_files,) if isinstance(asa_files, str) else asa_files
+            rsa_files = (rsa_files,) if isinstance(rsa_files, str) else rsa_files
+            ref_atoms = {k: v for f in asa_files for k, v in atomic_asa(read_asa(f)).items()}
+            ref_res = {k: v for f in rsa_files for k, v in rsa_values(f).items()}
+            for level, computed, reference in (("atom", atomic_asa(records), ref_atoms),
+                                               ("residue", residue_asa(records), ref_res)):
+                s = compare_asa(computed, reference)
+                print(f"{label:<8} {level:<8} {s['n']:>6} {s['rmsd']:8.3f} {s['max_abs']:8.3f} "
+                      f"{100 * s['total_rel']:+7.2f}%")
+
+        ref_bound = rsa_values("6m0j_fixed.rsa")
+        ref_free = {**rsa_values("A.rsa"), **rsa_values("B.rsa")}
+        expected = asa_interface(ref_bound, ref_free)
+        got = asa_interface(residue_asa(bound), residue_asa(free))
+        print(f"Interface (dASA > {ASA_THRESHOLD}): {len(got)} residues, NACCESS {len(expected)}, "
+              f"shared {len(got & expected)}")
@@ -0,0 +1,579 @@
+import argparse
+import csv
+import math
+import os
+import time
+from collections import Counter
+
+import numpy as np
+
+from interaction_energy import (
+    PDB_FILE,
+    R2_MAX,
+    RECEPTOR_CHAINS,
+    VDW_PRM_FILE,
+    atom_arrays,
+    build_atoms,
+    interface_energy,
+    load_paramset,
+    pair_terms,
+    records_table,
+)
+from pdb_io import read_pdbqt, residue_index
+from sasa import IncrementalSASA, atom_radii
+import scan_runner
+import telemetry
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROTAMER_FILE = os.path.join(SCRIPTS_DIR, "rotamers.txt")
+OUTPUT_CSV = "saturation_ddg.csv"
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+THREE_LETTER = {
+    "A": "ALA", "C": "CYS", "D": "ASP", "E": "GLU", "F": "PHE", "G": "GLY", "H": "HIS", "I": "ILE",
+    "K": "LYS", "L": "LEU", "M": "MET", "N": "ASN", "P": "PRO", "Q": "GLN", "R": "ARG", "S": "SER",
+    "T": "THR", "V": "VAL", "W": "TRP", "Y": "TYR",
+}
+# .pdbqt residue names of the protonation / disulfide states, in order of preference as templates
+RESIDUE_NAMES = dict({aa: (name,) for aa, name in THREE_LETTER.items()},
+                     H=("HIE", "HID", "HIP", "HIS"), C=("CYS", "CYX"))
+ONE_LETTER = {name: aa for aa, names in RESIDUE_NAMES.items() for name in names}
+# atoms kept from the WT residue; everything else (from HA on) comes from the template
+BACKBONE = ("N", "CA", "C", "O", "H", "OXT", "H1", "H2", "H3")
+# side-chain dihedrals chi1..chi4 of each residue type
+CHI_ATOMS = {
+    "ARG": (("N", "CA", "CB", "CG"), ("CA", "CB", "CG", "CD"), ("CB", "CG", "CD", "NE"), ("CG", "CD", "NE", "CZ")),
+    "ASN": (("N", "CA", "CB", "CG"), ("CA", "CB", "CG", "OD1")),
+    "ASP": (("N", "CA", "CB", "CG"), ("CA", "CB", "CG", "OD1")),
+    "CYS": (("N", "CA", "CB", "SG"),),
+    "GLN": (("N", "CA", "CB", "CG"), ("CA", "CB", "CG", "CD"), ("CB", "CG", "CD", "OE1")),
+    "GLU": (("N", "CA", "CB", "CG"), ("CA", "CB", "CG", "CD"), ("CB", "CG", "CD", "OE1")),
+    "HIS": (("N", "CA", "CB", "CG"), ("CA", "CB", "CG", "ND1")),
+    "ILE": (("N", "CA", "CB", "CG1"), ("CA", "CB", "CG1", "CD1")),
+    "LEU": (("N", "CA", "CB", "CG"), ("CA", "CB", "CG", "CD1")),
+    "LYS": (("N", "CA", "CB", "CG"), ("CA", "CB", "CG", "CD"), ("CB", "CG", "CD", "CE"), ("CG", "CD", "CE", "NZ")),
+    "MET": (("N", "CA", "CB", "CG"), ("CA", "CB", "CG", "SD"), ("CB", "CG", "SD", "CE")),
+    "PHE": (("N", "CA", "CB", "CG"), ("CA", "CB", "CG", "CD1")),
+    "SER": (("N", "CA", "CB", "OG"),),
+    "THR": (("N", "CA", "CB", "OG1"),),
+    "TRP": (("N", "CA", "CB", "CG"), ("CA", "CB", "CG", "CD1")),
+    "TYR": (("N", "CA", "CB", "CG"), ("CA", "CB", "CG", "CD1")),
+    "VAL": (("N", "CA", "CB", "CG1"),),
+}
+# chi1 offsets (degrees) tried around each library rotamer
+CHI1_STEPS = (-15.0, 0.0, 15.0)
+# farthest a side-chain atom gets from its CA (A); with the pair cutoff it bounds the atoms scored
+SIDE_CHAIN_REACH = 10.0
+# an atom pair clashes above this vdW energy (kcal/mol; no WT side chain at the interface has a
+# pair above 9.6). Rotamers are ranked soft-core, with each clashing pair at CLASH_PENALTY, and the
+# interaction energy caps the vdW of each pair at CLASH_VDW (no WT pair across the interface is above 6.2)
+CLASH_VDW = 10.0
+CLASH_PENALTY = 100.0
+# passes of repacking the side chains the new one clashes with
+PACK_CYCLES = 3
+# chi steps (degrees) of the coordinate descent that refines the packed side chains
+REFINE_STEPS = (10.0, 5.0, 2.0)
+REFINE_ITERATIONS = 10
+
+
+def load_rotamers(filename=ROTAMER_FILE):
+    """{residue name: (n_rotamers, n_chi) array of chi angles in degrees}, most frequent rotamer first"""
+    entries = {}
+    with open(filename) as f:
+        for line in f:
+            fields = line.split("#")[0].split()
+            if fields:
+                entries.setdefault(fields[0], []).append((float(fields[2]), [float(c) for c in fields[3:]]))
+    return {name: np.array([chis for _, chis in sorted(rows, key=lambda r: -r[0])])
+            for name, rows in entries.items()}
+
+
+def candidate_chis(library, residue, resname):
+    """Chi sets tried for resname in place of the WT residue (records), or None without chi angles.
+
+    These are the library rotamers with chi1 also at CHI1_STEPS, and the
+    library rotamers with the leading chis that the WT side chain shares
+    (same atom names, e.g. chi1 and chi2 of Glu for Gln) set to their WT values.
+    """
+    chi_atoms = CHI_ATOMS.get(resname, ())
+    if library is None or not chi_atoms:
+        return None
+    xyz = dict(zip(residue["name"].tolist(), np.column_stack((residue["x"], residue["y"], residue["z"]))))
+    wt = []
+    for chi in chi_atoms:
+        if not all(n in xyz for n in chi):
+            break
+        wt.append(math.degrees(dihedral(*(xyz[n] for n in chi))))
+
+    chis = np.repeat(library, len(CHI1_STEPS), axis=0)
+    chis[:, 0] += np.tile(CHI1_STEPS, len(library))
+    if wt:
+        seeded = library.copy()
+        seeded[:, :len(wt)] = wt
+        chis = np.vstack((seeded, chis))
+    return np.unique(chis, axis=0)
+
+
+def dihedral(p0, p1, p2, p3):
+    """Dihedral angle(s) in radians of the points p0-p1-p2-p3 (arrays of shape (..., 3))"""
+    b0, b1, b2 = p0 - p1, p2 - p1, p3 - p2
+    b1 = b1 / np.linalg.norm(b1, axis=-1, keepdims=True)
+    v = b0 - np.sum(b0 * b1, axis=-1, keepdims=True) * b1
+    w = b2 - np.sum(b2 * b1, axis=-1, keepdims=True) * b1
+    return np.arctan2(np.sum(np.cross(b1, v) * w, axis=-1), np.sum(v * w, axis=-1))
+
+
+def superposition(mobile, target):
+    """Rotation R and translation t with mobile @ R.T + t the least-squares fit onto target (Kabsch)"""
+    mobile_centre, target_centre = mobile.mean(axis=0), target.mean(axis=0)
+    u, _, vt = np.linalg.svd((mobile - mobile_centre).T @ (target - target_centre))
+    d = np.sign(np.linalg.det(vt.T @ u.T))
+    R = vt.T @ np.diag([1.0, 1.0, d]) @ u.T
+    return R, target_centre - mobile_centre @ R.T
+
+
+class SideChainTemplate():
+    """Side chain of one residue type, as found in the structure itself.
+
+    records are the template residue's non-backbone atoms (HA and beyond),
+    with the charge of each atom averaged over every residue of that type
+    with the same atoms; frame holds its N, CA and C. Each chi of CHI_ATOMS
+    is stored as the indices of its four atoms (into frame + records) and
+    the mask of the atoms that turn with it.
+    """
+
+    def __init__(self, resname, records, frame):
+        self.resname = resname
+        self.records = records
+        self.frame = frame
+        self.xyz = np.vstack((frame, np.column_stack((records["x"], records["y"], records["z"]))))
+        names = ["N", "CA", "C"] + records["name"].tolist()
+
+        # bonds within CA + side chain, from the distances (1.2 A for hydrogens)
+        heavy = np.array([not n.lstrip("0123456789").startswith("H") for n in names])
+        d = np.linalg.norm(self.xyz[:, None] - self.xyz[None], axis=-1)
+        bonded = (d < np.where(heavy[:, None] & heavy[None], 1.95, 1.2)) & (d > 0)
+        bonded[[0, 2], :] = bonded[:, [0, 2]] = False
+
+        self.chis = []
+        for chi in CHI_ATOMS.get(THREE_LETTER[ONE_LETTER[resname]], ()):
+            a1, a2, a3, a4 = (names.index(n) for n in chi)
+            # atoms reached from a3 without crossing the a2-a3 bond
+            moving = np.zeros(len(names), dtype=bool)
+            todo = [a3]
+            while todo:
+                k = todo.pop()
+                for n in np.flatnonzero(bonded[k]).tolist():
+                    if n != a2 and not moving[n] and n != a3:
+                        moving[n] = True
+                        todo.append(n)
+            self.chis.append((a1, a2, a3, a4, moving))
+
+    def place(self, frame, chis=None):
+        """(n_rotamers, n_atoms, 3) side-chain coordinates on a backbone frame (N, CA, C) for each chi set.
+
+        Without chis (or for a residue without chi angles) the template's own
+        conformation is placed. The chi angles are set against the target's
+        own N, CA and C, so the placed side chain has exactly the chis asked for.
+        """
+        R, t = superposition(self.frame, frame)
+        chis = np.zeros((1, 0)) if chis is None or not self.chis else np.asarray(chis)
+        xyz = np.repeat((self.xyz @ R.T + t)[None], len(chis), axis=0)
+        xyz[:, :3] = frame
+        for k, (a1, a2, a3, a4, moving) in enumerate(self.chis[:chis.shape[1]]):
+            angle = np.radians(chis[:, k]) - dihedral(xyz[:, a1], xyz[:, a2], xyz[:, a3], xyz[:, a4])
+            # Rodrigues rotation of the moving atoms about the a2 -> a3 axis
+            axis = xyz[:, a3] - xyz[:, a2]
+            axis /= np.linalg.norm(axis, axis=-1, keepdims=True)
+            v = xyz[:, moving] - xyz[:, a3, None]
+            cos, sin = np.cos(angle)[:, None, None], np.sin(angle)[:, None, None]
+            k_axis = axis[:, None, :]
+            xyz[:, moving] = (xyz[:, a3, None] + v * cos + np.cross(k_axis, v) * sin
+                              + k_axis * np.sum(k_axis * v, axis=-1, keepdims=True) * (1 - cos))
+        return xyz[:, 3:]
+
+
+def residue_templates(records):
+    """{one-letter code: SideChainTemplate} of every amino acid with an internal residue in records"""
+    residue, residues = residue_index(records)
+    bounds = np.flatnonzero(np.r_[True, residue[1:] != residue[:-1], True])
+    by_name = {}
+    for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        atoms = records[start:stop]
+        names = tuple(atoms["name"].tolist())
+        # termini carry extra atoms (OXT, H1-H3), so only internal residues are used
+        if "OXT" in names or "H1" in names or not {"N", "CA", "C"} <= set(names):
+            continue
+        by_name.setdefault(atoms["resname"][0], []).append(atoms)
+
+    templates = {}
+    for aa, names in RESIDUE_NAMES.items():
+        resname = next((n for n in names if n in by_name), None)
+        if resname is None:
+            continue
+        instances = by_name[resname]
+        layout, _ = Counter(tuple(r["name"].tolist()) for r in instances).most_common(1)[0]
+        same = [r for r in instances if tuple(r["name"].tolist()) == layout]
+        atoms = same[0].copy()
+        atoms["q"] = np.mean([r["q"] for r in same], axis=0)
+        side = atoms[~np.isin(atoms["name"], BACKBONE)]
+        frame = np.array([[atoms[c][atoms["name"] == n][0] for c in ("x", "y", "z")] for n in ("N", "CA", "C")])
+        templates[aa] = SideChainTemplate(resname, side, frame)
+    return templates
+
+
+class PackedSideChain():
+    """Side chain moved while a mutant is packed.
+
+    template places it on its backbone frame (N, CA, C); side holds the
+    indices of its atoms in the mutant's arrays and span the first and last+1
+    index of its residue, bonded the atoms of other residues its side chain
+    is bonded to or one bond away from (the C before a proline). chis are the
+    chi angles it is at, None while it keeps its WT coordinates.
+    """
+
+    def __init__(self, template, frame, side, span, candidates, chis=None, bonded=()):
+        self.template = template
+        self.frame = frame
+        self.side = side
+        self.span = span
+        self.candidates = candidates
+        self.chis = chis
+        self.bonded = bonded
+
+
+def soft_scores(xyz, side, env, ff):
+    """Soft-core vdW + elec of each placement xyz (n_rotamers, n_atoms, 3) of the atoms side against env.
+
+    The vdW energy of a pair is capped: above CLASH_VDW it counts
+    CLASH_PENALTY, so a placement clashes only when every other one does, and
+    then with as few pairs as it can, whatever their overlap.
+    """
+    n_rot, n_atoms = xyz.shape[:2]
+    score = np.zeros(n_rot * n_atoms)
+    for i, _, e_vdw, ie, _, e_elec in pair_terms(xyz.reshape(-1, 3), np.tile(side["q"], n_rot),
+                                                 np.tile(side["type"], n_rot), *atom_arrays(env), ff):
+        score += np.bincount(i, np.where(e_vdw > CLASH_VDW, CLASH_PENALTY, e_vdw), len(score))
+        score += np.bincount(ie, e_elec, len(score))
+    return score.reshape(n_rot, n_atoms).sum(axis=1)
+
+
+def backbone_frame(residue):
+    """(3, 3) coordinates of the N, CA and C of a residue's records"""
+    return np.array([[residue[c][residue["name"] == n][0] for c in ("x", "y", "z")] for n in ("N", "CA", "C")])
+
+
+class SaturationScan():
+    """Interaction ΔΔG of amino-acid substitutions, with the mutants built in memory.
+
+    Side chains come from templates taken from the WT structure itself
+    (geometry, charges and atom types) and are set to every candidate chi set
+    of candidate_chis; the rotamer with the lowest soft-core energy (vdW
+    capped per atom pair, plus elec) against the atoms around the position
+    is kept. When it still clashes with a side chain around it, that side
+    chain is repacked from its own rotamers along with the new one; the chi
+    angles of the side chains that moved are then refined by coordinate
+    descent. A mutant that clashes even so is scored with its clashing
+    pairs capped, and flagged.
+    The mutant's ASA is recomputed around the changed atoms only
+    (sasa.IncrementalSASA). Its interaction energy is evaluated over the WT
+    interface residues, the mutated one included, so a substitution that
+    moves a residue out of the ΔASA interface is still scored there. ΔΔG is
+    taken against the WT with the same in-process ASA.
+    """
+
+    def __init__(self, pdbqt_file=PDB_FILE, prm_file=VDW_PRM_FILE, rotamer_file=ROTAMER_FILE,
+                 receptor=RECEPTOR_CHAINS):
+        self.ff = load_paramset(prm_file)
+        self.receptor = receptor
+        self.records = read_pdbqt(pdbqt_file)
+        self.templates = residue_templates(self.records)
+        self.template_atoms = {aa: build_atoms(t.records, self.ff, 0.0, 0.0) for aa, t in self.templates.items()}
+        self.rotamers = load_rotamers(rotamer_file)
+        self.sasa = IncrementalSASA(self.records)
+        self.atoms = build_atoms(self.records, self.ff, 0.0, 0.0)
+        self.own_templates = {}
+
+        residue, residues = residue_index(self.records)
+        bounds = np.flatnonzero(np.r_[True, residue[1:] != residue[:-1], True])
+        self.slices = {residues[residue[a]]: (a, b) for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist())}
+        wt_table = self.table(self.records)
+        self.interface = wt_table.interface_mask()
+        self.wt = self.energy(wt_table, self.interface)
+
+    def table(self, records):
+        """AtomTable of a structure close to the WT, with its ASA updated incrementally"""
+        _, _, asa_bound, asa_free, _, _ = self.sasa.update(records)
+        radii = atom_radii(records)
+        heavy = ~np.isnan(radii) & (radii > 0)
+        bound, free = np.zeros(len(records)), np.zeros(len(records))
+        bound[heavy], free[heavy] = asa_bound, asa_free
+        return records_table(records, self.ff, bound, free, self.receptor)
+
+    def energy(self, table, interface):
+        """(total, E_vdw, E_elec, E_solv) over the atoms of the interface mask, each pair's vdW capped at CLASH_VDW"""
+        return interface_energy(table.atoms[interface], self.ff, self.receptor, CLASH_VDW)
+
+    def mutant_interface(self, chain, res, records):
+        """The WT interface mask carried over to mutant records with (chain, res) replaced"""
+        start, stop = self.slices[(chain, res)]
+        mutated = stop - start + len(records) - len(self.records)
+        return np.concatenate((self.interface[:start], np.full(mutated, self.interface[start]),
+                               self.interface[stop:]))
+
+    def wt_residue(self, chain, res):
+        start, _ = self.slices[(chain, res)]
+        return ONE_LETTER.get(self.records["resname"][start], "X")
+
+    def own_template(self, key):
+        """SideChainTemplate of the WT side chain at key, or None if it is not repacked
+        (no chi angles, disulfide-bonded or missing atoms)"""
+        if key not in self.own_templates:
+            start, stop = self.slices[key]
+            residue = self.records[start:stop]
+            resname = residue["resname"][0]
+            chi_atoms = CHI_ATOMS.get(THREE_LETTER.get(ONE_LETTER.get(resname), ""), ())
+            names = set(residue["name"].tolist())
+            complete = all(n in names for chi in chi_atoms for n in chi) and "C" in names
+            template = None
+            if chi_atoms and resname != "CYX" and complete:
+                template = SideChainTemplate(resname, residue[~np.isin(residue["name"], BACKBONE)],
+                                             backbone_frame(residue))
+            self.own_templates[key] = template
+        return self.own_templates[key]
+
+    def mutant_arrays(self, chain, res, aa):
+        """(records, atoms, side chain) of the complex with (chain, res) replaced by aa,
+        the new side chain placed as in its template"""
+        start, stop = self.slices[(chain, res)]
+        template = self.templates[aa]
+        residue = self.records[start:stop]
+        keep = np.isin(residue["name"], BACKBONE) & ~((aa == "P") & (residue["name"] == "H"))
+        backbone = residue[keep].copy()
+        backbone["resname"] = template.resname
+        side = template.records.copy()
+        side["chain"], side["resnum"] = chain, res
+        records = np.concatenate((self.records[:start], backbone, side, self.records[stop:]))
+        atoms = np.concatenate((self.atoms[:start], self.atoms[start:stop][keep], self.template_atoms[aa],
+                                self.atoms[stop:]))
+        first = start + len(backbone)
+        frame = backbone_frame(residue)
+        atoms["xyz"][first:first + len(side)] = template.place(frame)[0]
+        chis = candidate_chis(self.rotamers.get(THREE_LETTER[aa]), residue, THREE_LETTER[aa])
+        # the ring of a proline closes on N, one bond from the C of the residue before
+        before = np.flatnonzero((self.records["chain"][:start] == chain) & (self.records["resnum"][:start] == res - 1)
+                                & (self.records["name"][:start] == "C")) if aa == "P" else ()
+        mutant = PackedSideChain(template, frame, np.arange(first, first + len(side)), (start, first + len(side)),
+                                 chis, bonded=before)
+        return records, atoms, mutant
+
+    def neighbour(self, key, shift, mutated_stop):
+        """PackedSideChain of the WT residue at key in a mutant whose residues from mutated_stop on are
+        shifted by shift atoms, or None if it is not repacked"""
+        template = self.own_template(key)
+        if template is None:
+            return None
+        start, stop = self.slices[key]
+        offset = shift if start >= mutated_stop else 0
+        residue = self.records[start:stop]
+        side = np.flatnonzero(~np.isin(residue["name"], BACKBONE)) + start + offset
+        resname = THREE_LETTER[ONE_LETTER[residue["resname"][0]]]
+        return PackedSideChain(template, template.frame, side, (start + offset, stop + offset),
+                               candidate_chis(self.rotamers.get(resname), residue, resname))
+
+    def environment(self, atoms, packed):
+        """Indices of the atoms a packed side chain can interact with, other than its residue's own"""
+        reach = math.sqrt(R2_MAX) + SIDE_CHAIN_REACH
+        near = np.flatnonzero(np.sum((atoms["xyz"] - packed.frame[1]) ** 2, axis=1) < reach * reach)
+        near = near[(near < packed.span[0]) | (near >= packed.span[1])]
+        return np.setdiff1d(near, packed.bonded)
+
+    def choose(self, atoms, packed, chis, keep_current=False):
+        """Sets packed to its best soft-scored chi set among chis (or its current coordinates, with
+        keep_current); returns whether it moved"""
+        candidates = packed.template.place(packed.frame, chis)
+        if keep_current:
+            candidates = np.concatenate((atoms["xyz"][packed.side][None], candidates))
+        env = atoms[self.environment(atoms, packed)]
+        with telemetry.stage("rotamers", rotamers=len(candidates)):
+            best = int(np.argmin(soft_scores(candidates, atoms[packed.side], env, self.ff)))
+        atoms["xyz"][packed.side] = candidates[best]
+        if keep_current and best == 0:
+            return False
+        packed.chis = chis[best - keep_current]
+        return True
+
+    def refine(self, atoms, packed):
+        """Coordinate descent of the chi angles of packed over REFINE_STEPS"""
+        n_chi = len(packed.chis)
+        for step in REFINE_STEPS:
+            moves = np.vstack((np.zeros(n_chi), step * np.eye(n_chi), -step * np.eye(n_chi)))
+            for _ in range(REFINE_ITERATIONS):
+                if not self.choose(atoms, packed, packed.chis + moves, keep_current=True):
+                    break
+
+    def clashes(self, atoms, packed):
+        """{(atom, other atom): vdW energy} of the pairs of the packed side chains' atoms that clash"""
+        found = {}
+        for side_chain in packed:
+            env = self.environment(atoms, side_chain)
+            for i, j, e_vdw, _, _, _ in pair_terms(*atom_arrays(atoms[side_chain.side]),
+                                                   *atom_arrays(atoms[env]), self.ff):
+                clash = e_vdw > CLASH_VDW
+                for pair, energy in zip(zip(side_chain.side[i[clash]].tolist(), env[j[clash]].tolist()),
+                                        e_vdw[clash].tolist()):
+                    if pair[::-1] not in found:
+                        found[pair] = energy
+        return found
+
+    def packed_mutant(self, chain, res, aa):
+        """(records, clashes) of the complex with (chain, res) replaced by aa, its side chain packed.
+
+        The new side chain takes its best candidate rotamer. The repackable
+        side chains it clashes with join it, and all of them are re-chosen in
+        turn (the WT side chains may stay as they are), for up to PACK_CYCLES
+        passes while clashes remain. Every side chain that moved is then
+        refined. clashes are those left, as in SaturationScan.clashes.
+        """
+        records, atoms, mutant = self.mutant_arrays(chain, res, aa)
+        start, stop = self.slices[(chain, res)]
+        shift = mutant.span[1] - stop
+        packed = {(chain, res): mutant}
+        moved = [mutant]
+        if mutant.candidates is not None:
+            self.choose(atoms, mutant, mutant.candidates)
+        for _ in range(PACK_CYCLES):
+            clashes = self.clashes(atoms, packed.values())
+            partners = {(records["chain"][j], int(records["resnum"][j])) for _, j in clashes}
+            new = {key: self.neighbour(key, shift, stop) for key in partners - packed.keys()}
+            new = {key: side_chain for key, side_chain in new.items() if side_chain is not None}
+            if not new:
+                break
+            packed.update(new)
+            for side_chain in packed.values():
+                if side_chain.candidates is None:
+                    continue
+                keep_current = side_chain is not mutant
+                if self.choose(atoms, side_chain, side_chain.candidates, keep_current) and side_chain not in moved:
+                    moved.append(side_chain)
+        for side_chain in moved:
+            if side_chain.chis is not None:
+                self.refine(atoms, side_chain)
+        records["x"], records["y"], records["z"] = atoms["xyz"].T
+        return records, self.clashes(atoms, packed.values())
+
+    def mutant_records(self, chain, res, aa, chis=None):
+        """Records of the complex with (chain, res) replaced by aa; with chis, the new side chain is set
+        to those chi angles and nothing is packed"""
+        if chis is None:
+            return self.packed_mutant(chain, res, aa)[0]
+        records, atoms, mutant = self.mutant_arrays(chain, res, aa)
+        atoms["xyz"][mutant.side] = mutant.template.place(mutant.frame, [chis])[0]
+        records["x"], records["y"], records["z"] = atoms["xyz"].T
+        return records
+
+    def mutant_energy(self, chain, res, aa):
+        """((total, E_vdw, E_elec, E_solv), clashes) of the complex with (chain, res) replaced by aa;
+        clashes describes each atom pair left clashing, whose vdW the energy counts at CLASH_VDW"""
+        records, clashes = self.packed_mutant(chain, res, aa)
+        xyz = np.column_stack((records["x"], records["y"], records["z"]))
+        described = [f"{records['chain'][i]}:{records['resname'][i]}{records['resnum'][i]} {records['name'][i]} "
+                     f"{np.linalg.norm(xyz[i] - xyz[j]):.2f} A from {records['chain'][j]}:{records['resname'][j]}"
+                     f"{records['resnum'][j]} {records['name'][j]} ({energy:.0f} kcal/mol)"
+                     for (i, j), energy in sorted(clashes.items())]
+        return self.energy(self.table(records), self.mutant_interface(chain, res, records)), described
+
+    def ddg(self, chain, res, aa):
+        """ΔΔG of the substitution"""
+        energy, _ = self.mutant_energy(chain, res, aa)
+        return energy[0] - self.wt[0]
+
+
+def _mutant_energy(mutation):
+    return scan_runner._worker_state["saturation"].mutant_energy(*mutation)
+
+
+def saturation_matrix(scan, positions, amino_acids=AMINO_ACIDS, workers=1, chunksize=4):
+    """({(chain, res): {aa: ΔΔG}}, {(chain, res, aa): clashes}, number of mutants) for every substitution.
+
+    The WT residue gets 0.0. A substitution that still clashes after packing
+    is scored with the clashing pairs capped and also listed with its clashes.
+    """
+    mutations = [(chain, res, aa) for chain, res in positions for aa in amino_acids
+                 if aa in scan.templates and aa != scan.wt_residue(chain, res)]
+    results = scan_runner.map_tasks(_mutant_energy, mutations, workers=workers, chunksize=chunksize,
+                                    state={"saturation": scan})
+    matrix = {(chain, res): {aa: 0.0 for aa in amino_acids if aa == scan.wt_residue(chain, res)}
+              for chain, res in positions}
+    clashing = {}
+    for (chain, res, aa), (energy, clashes) in zip(mutations, results):
+        matrix[(chain, res)][aa] = energy[0] - scan.wt[0]
+        if clashes:
+            clashing[(chain, res, aa)] = clashes
+    return matrix, clashing, len(mutations)
+
+
+def write_matrix(scan, matrix, filename=OUTPUT_CSV, amino_acids=AMINO_ACIDS, clashing=()):
+    """Position x amino-acid ΔΔG table: Chain, ResNum, WT, one column per amino acid, then Clashing,
+    the amino acids whose substitution still clashes (keys of saturation_matrix's clashes)"""
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["Chain", "ResNum", "WT"] + list(amino_acids) + ["Clashing"],
+                                lineterminator="\n")
+        writer.writeheader()
+        for (chain, res), ddgs in matrix.items():
+            flagged = "".join(aa for aa in amino_acids if (chain, res, aa) in clashing)
+            writer.writerow(dict(ddgs, Chain=chain, ResNum=res, WT=scan.wt_residue(chain, res), Clashing=flagged))
+
+
+# all 19 substitutions at every interface position, e.g.
+#   python saturation.py --workers 8
+#   python saturation.py --positions E:484 E:501 --amino-acids KYR
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Saturation mutagenesis ΔΔG matrix of the interface positions")
+    parser.add_argument("--pdbqt", default=PDB_FILE)
+    parser.add_argument("--positions", nargs="+", metavar="CHAIN:RES",
+                        help="positions to mutate (default: the WT interface of the interface store)")
+    parser.add_argument("--amino-acids", default=AMINO_ACIDS, help="one-letter codes substituted in")
+    parser.add_argument("--rotamers", default=ROTAMER_FILE, help="rotamer library")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (0 = all cores)")
+    parser.add_argument("-o", "--output", default=OUTPUT_CSV)
+    parser.add_argument("--telemetry", help="append JSON-lines stage timings and progress to this file")
+    args = parser.parse_args()
+    if args.telemetry:
+        telemetry.enable(args.telemetry)
+    unknown = set(args.amino_acids) - set(AMINO_ACIDS)
+    if unknown:
+        parser.error(f"unknown amino acid code(s): {', '.join(sorted(unknown))}")
+
+    if args.positions:
+        positions = [(p.split(":")[0], int(p.split(":")[1])) for p in args.positions]
+    else:
+        from interface_store import interface_residues
+        positions = interface_residues()
+
+    start = time.perf_counter()
+    scan = SaturationScan(args.pdbqt, rotamer_file=args.rotamers)
+    missing = [(c, r) for c, r in positions if (c, r) not in scan.slices]
+    if missing:
+        parser.error(f"position(s) not in {args.pdbqt}: {', '.join(f'{c}:{r}' for c, r in missing)}")
+    skipped = sorted(set(args.amino_acids) - set(scan.templates))
+    if skipped:
+        print(f"No template residue in the structure for: {', '.join(skipped)}")
+    print(f"WT Total Energy: {scan.wt[0]:.4f} kcal/mol (in-process ASA)")
+
+    matrix, clashing, count = saturation_matrix(scan, positions, args.amino_acids, workers=args.workers or None)
+    seconds = time.perf_counter() - start
+
+    print(f"{'Pos':<8} WT " + " ".join(f"{aa:>5} " for aa in args.amino_acids))
+    for (chain, res), ddgs in matrix.items():
+        values = " ".join(f"{ddgs[aa]:5.1f}{'*' if (chain, res, aa) in clashing else ' '}" if aa in ddgs
+                          else f"{'':>6}" for aa in args.amino_acids)
+        print(f"{chain}:{res:<6} {scan.wt_residue(chain, res)}  {values}")
+    write_matrix(scan, matrix, args.output, args.amino_acids, clashing)
+    if clashing:
+        print(f"\n* {len(clashing)} substitutions still clash after packing; their clashing pairs count "
+              f"{CLASH_VDW:g} kcal/mol each:")
+        for (chain, res, aa), clashes in clashing.items():
+            print(f"  {chain}:{res} {scan.wt_residue(chain, res)}->{aa}: {'; '.join(clashes)}")
+    print(f"\n{count} mutants at {len(positions)} positions in {seconds:.1f} s "
+          f"({60 * count / seconds:.0f} mutants/min)")
+    print(f"CSV saved to: {args.output}")
@@ -0,0 +1,152 @@
+import argparse
+import csv
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import telemetry
+from interaction_energy import (
+    PDB_FILE,
+    ASA_COMPLEX,
+    ASA_CHAIN_A,
+    ASA_CHAIN_E,
+    as_atom_table,
+    compute_interaction_energy_with_ala,
+    compute_wt_residue_contribution,
+)
+from alanine_scan import AlanineScan
+from sasa import IncrementalSASA
+
+# incremental: AlanineScan subtraction, full: compute_interaction_energy_with_ala,
+# direct: compute_wt_residue_contribution
+SCAN_METHODS = ("incremental", "full", "direct")
+DDG_THRESHOLD = 1.0
+CSV_FIELDS = ["Chain", "ResNum", "Label", "Energy_Mutant", "ddG", "Is_Hotspot"]
+
+# state seen by the workers: inherited on fork, or set once per worker by _init_worker
+_worker_state = {}
+
+
+def _init_worker(state):
+    _worker_state.update(state)
+
+
+def _evaluate(residue):
+    chain, res = residue
+    method = _worker_state["method"]
+    if method == "incremental":
+        return _worker_state["scan"].mutant_energy(chain, res)
+    if method == "full":
+        return compute_interaction_energy_with_ala(_worker_state["table"], chain, res,
+                                                   return_components=True)
+    return compute_wt_residue_contribution(_worker_state["table"], chain, res)
+
+
+def map_tasks(func, items, workers=1, chunksize=1, state=None):
+    """Applies func to every item, optionally across a process pool.
+
+    Workers are forked where the platform allows it, so module-level state of
+    the parent (parsed structures, `state` copied into _worker_state) is
+    inherited instead of being pickled for each task; elsewhere `state` is
+    sent once per worker. Results keep the order of `items`, so the output is
+    the same for any worker count. With telemetry on, a progress event (with
+    ETA) is emitted as each result arrives.
+    """
+    items = list(items)
+    if state is not None:
+        _worker_state.clear()
+        _worker_state.update(state)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(items))
+    progress = telemetry.Progress(getattr(func, "__name__", "task"), len(items))
+    if workers <= 1:
+        results = []
+        for item in items:
+            results.append(func(item))
+            progress.step(item)
+        return results
+
+    if "fork" in mp.get_all_start_methods():
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("fork"))
+    elif state is not None:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(state,))
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+
+    with pool:
+        results = []
+        for item, result in zip(items, pool.map(func, items, chunksize=chunksize)):
+            results.append(result)
+            progress.step(item)
+        return results
+
+
+def map_residues(structure, residues, method="incremental", workers=1, chunksize=4, scan=None):
+    """Evaluates every (chain, res) of `residues` with map_tasks.
+
+    structure is an AtomTable (or pdbqt path with the default .asa names);
+    method is one of SCAN_METHODS.
+    """
+    if method not in SCAN_METHODS:
+        raise ValueError(f"Unknown scan method '{method}' (choose from {', '.join(SCAN_METHODS)})")
+
+    table = scan.table if scan is not None else as_atom_table(structure, ASA_COMPLEX, ASA_CHAIN_A, ASA_CHAIN_E)
+    state = {"method": method, "table": table}
+    if method == "incremental":
+        state["scan"] = scan if scan is not None else AlanineScan(table)
+
+    return map_tasks(_evaluate, residues, workers=workers, chunksize=chunksize, state=state)
+
+
+def scan_rows(wt_total, residues, mutant_totals, threshold=DDG_THRESHOLD):
+    """Alanine scanning result rows (as written to alanine_scanning_results.csv)"""
+    rows = []
+    for (chain, res), mut_total in zip(residues, mutant_totals):
+        ddG = mut_total - wt_total
+        rows.append({
+            "Chain": chain,
+            "ResNum": res,
+            "Label": f"{chain}:{res}",
+            "Energy_Mutant": mut_total,
+            "ddG": ddG,
+            "Is_Hotspot": ddG > threshold
+        })
+    return rows
+
+
+def write_rows(rows, filename, fields=CSV_FIELDS):
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# run the alanine scan from the command line, e.g.
+#   python scan_runner.py --method full --workers 32 --chunksize 2
+if __name__ == "__main__":
+    from interface_store import interface_residues
+
+    parser = argparse.ArgumentParser(description="Parallel alanine scanning over the interface residues")
+    parser.add_argument("--method", choices=["incremental", "full"], default="incremental")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (0 = all cores)")
+    parser.add_argument("--chunksize", type=int, default=4, help="residues sent to a worker at a time")
+    parser.add_argument("-o", "--output", default="alanine_scanning_results.csv")
+    parser.add_argument("--telemetry", help="append JSON-lines stage timings and progress to this file")
+    parser.add_argument("--sasa", metavar="PDB",
+                        help="complex PDB for recomputing the ASA around each truncated residue (incremental method)")
+    args = parser.parse_args()
+    if args.telemetry:
+        telemetry.enable(args.telemetry)
+    if args.sasa and args.method == "full":
+        parser.error("--sasa applies to the incremental method only")
+
+    sasa = IncrementalSASA.from_pdb(args.sasa) if args.sasa else None
+    scan = AlanineScan(PDB_FILE, ASA_COMPLEX, ASA_CHAIN_A, ASA_CHAIN_E, sasa=sasa)
+    residues = interface_residues()
+    energies = map_residues(scan.table, residues, method=args.method,
+                            workers=args.workers or None, chunksize=args.chunksize, scan=scan)
+    rows = scan_rows(scan.wt[0], residues, [e[0] for e in energies])
+    write_rows(rows, args.output)
+    print(f"Scanned {len(rows)} residues, CSV saved to: {args.output}")
@@ -0,0 +1,69 @@
+import itertools
+
+import numpy as np
+
+
+def _cell_ids(cells, dims):
+    return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+
+def close_pairs(xyz_1, xyz_2=None, cutoff=8.0, groups_1=None, groups_2=None):
+    """Index pairs (i, j) of points within cutoff (inclusive, as Bio.PDB's NeighborSearch), found with a cell list.
+
+    Points are binned into cubic cells of side cutoff, so only the 27 cells
+    around each point of xyz_1 are searched in xyz_2. Without xyz_2 the pairs
+    are taken within xyz_1 (both orders, i != j). With group labels (e.g. the
+    chain of every point; groups_2 defaults to groups_1 without xyz_2) only
+    pairs between different groups are kept. Returns i, j and the squared
+    distances, sorted by i then j.
+    """
+    same = xyz_2 is None
+    if same:
+        xyz_2 = xyz_1
+        groups_2 = groups_1 if groups_2 is None else groups_2
+    empty = np.zeros(0, dtype=np.int64)
+    if len(xyz_1) == 0 or len(xyz_2) == 0:
+        return empty, empty, np.zeros(0)
+
+    origin = np.minimum(xyz_1.min(axis=0), xyz_2.min(axis=0))
+    cells_1 = np.floor((xyz_1 - origin) / cutoff).astype(np.int64) + 1
+    cells_2 = np.floor((xyz_2 - origin) / cutoff).astype(np.int64) + 1
+    # one empty layer of cells on every side, so neighbour offsets never wrap around
+    dims = np.maximum(cells_1.max(axis=0), cells_2.max(axis=0)) + 2
+    ids_1 = _cell_ids(cells_1, dims)
+    ids_2 = _cell_ids(cells_2, dims)
+
+    order = np.argsort(ids_2, kind="stable")
+    sorted_ids = ids_2[order]
+
+    # candidates are filtered per neighbour cell offset, so only the close pairs are ever held together
+    pairs_i, pairs_j, pairs_d2 = [], [], []
+    for dx, dy, dz in itertools.product((-1, 0, 1), repeat=3):
+        neighbour = ids_1 + (dx * dims[1] + dy) * dims[2] + dz
+        start = np.searchsorted(sorted_ids, neighbour, side="left")
+        count = np.searchsorted(sorted_ids, neighbour, side="right") - start
+        total = int(count.sum())
+        if total == 0:
+            continue
+        i = np.repeat(np.arange(len(xyz_1)), count)
+        # position of every candidate inside its cell's run of sorted_ids
+        offset = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+        j = order[np.repeat(start, count) + offset]
+        if groups_1 is not None:
+            keep = groups_1[i] != groups_2[j]
+            i, j = i[keep], j[keep]
+        d2 = np.sum((xyz_1[i] - xyz_2[j]) ** 2, axis=1)
+        keep = d2 <= cutoff * cutoff
+        if same:
+            keep &= i != j
+        pairs_i.append(i[keep])
+        pairs_j.append(j[keep])
+        pairs_d2.append(d2[keep])
+
+    if not pairs_i:
+        return empty, empty, np.zeros(0)
+    i = np.concatenate(pairs_i)
+    j = np.concatenate(pairs_j)
+    d2 = np.concatenate(pairs_d2)
+    order = np.lexsort((j, i))
+    return i[order], j[order], d2[order]
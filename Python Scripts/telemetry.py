@@ -0,0 +1,142 @@
+import atexit
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# ENERGY_TELEMETRY=1 (or "stderr") writes JSON-lines events to stderr,
+# any other value is used as the path of the file the events are appended to
+TELEMETRY_ENV = "ENERGY_TELEMETRY"
+
+_out = None
+_totals = {}
+
+
+def enabled():
+    return _out is not None
+
+
+def enable(target="stderr"):
+    """Starts writing events to stderr or appending them to the file `target`"""
+    global _out
+    disable()
+    if target in ("1", "stderr"):
+        _out = sys.stderr
+    else:
+        _out = open(target, "a")
+    _totals.clear()
+    emit("start", pid=os.getpid(), argv=sys.argv)
+
+
+def disable():
+    global _out
+    if _out is not None and _out is not sys.stderr:
+        _out.close()
+    _out = None
+
+
+def peak_memory_kb():
+    """Peak resident set size of this process (KiB), if the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def emit(event, **fields):
+    if _out is None:
+        return
+    record = {"event": event, "time": time.time(), "pid": os.getpid()}
+    record.update(fields)
+    _out.write(json.dumps(record) + "\n")
+    _out.flush()
+
+
+class _Stage():
+    def __init__(self, name, counts):
+        self.name = name
+        self.counts = counts
+
+    def count(self, **counts):
+        """Adds to the stage's counters (atoms, pairs, ...)"""
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + int(value)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.start_peak = peak_memory_kb()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        total = _totals.setdefault(self.name, {"calls": 0, "seconds": 0.0})
+        total["calls"] += 1
+        total["seconds"] += seconds
+        for key, value in self.counts.items():
+            total[key] = total.get(key, 0) + value
+        # the process peak only ever grows, so a stage's own share is how far it raised it
+        peak = peak_memory_kb()
+        growth = None if peak is None else peak - self.start_peak
+        emit("stage", stage=self.name, seconds=seconds, process_peak_kb=peak, peak_growth_kb=growth, **self.counts)
+        return False
+
+
+class _NullStage():
+    def count(self, **counts):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name, **counts):
+    """Context manager timing one pipeline stage; a shared no-op when telemetry is off"""
+    if _out is None:
+        return _NULL_STAGE
+    return _Stage(name, dict(counts))
+
+
+class Progress():
+    """Per-item progress events with an ETA extrapolated from the mean time per item"""
+
+    def __init__(self, label, total):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.start = time.perf_counter()
+
+    def step(self, item=None):
+        self.done += 1
+        if _out is None:
+            return
+        elapsed = time.perf_counter() - self.start
+        eta = elapsed / self.done * (self.total - self.done)
+        emit("progress", label=self.label, item=item, done=self.done, total=self.total,
+             elapsed=elapsed, eta=eta)
+
+
+def summary():
+    """Emits the per-stage totals (calls, seconds and counters) recorded so far"""
+    emit("summary", stages=_totals, process_peak_kb=peak_memory_kb())
+
+
+@atexit.register
+def _finish():
+    if _out is not None:
+        summary()
+        disable()
+
+
+if os.environ.get(TELEMETRY_ENV):
+    enable(os.environ[TELEMETRY_ENV])
@@ -0,0 +1,149 @@
+import argparse
+import csv
+import functools
+import os
+
+import numpy as np
+
+from interaction_energy import (
+    ASA_THRESHOLD,
+    PDB_FILE,
+    ASA_COMPLEX,
+    ASA_CHAIN_A,
+    ASA_CHAIN_E,
+    atom_arrays,
+    cached_atom_table,
+    pair_energies,
+    solvation_energy,
+)
+from pdb_io import model_ranges, read_model
+from scan_runner import map_tasks
+
+OUTPUT_CSV = "trajectory_energy.csv"
+CSV_FIELDS = ["Frame", "dG", "dG_vdw", "dG_elec", "dG_solv",
+              "avg_dG", "avg_dG_vdw", "avg_dG_elec", "avg_dG_solv"]
+MODEL_FORMATS = (".pdb", ".pdbqt")
+
+
+class Topology():
+    """Everything about the complex that does not change between frames.
+
+    Charges, types and the interface atoms come from the reference
+    structure; a frame only supplies new coordinates for the same atoms in
+    the same order. The solvation term uses the reference ASA, since the
+    .asa files describe a single conformation, so it is constant over frames.
+    """
+
+    def __init__(self, table, threshold=ASA_THRESHOLD):
+        self.table = table
+        atoms = table.atoms
+        interface = table.interface_mask(threshold)
+        is_A = np.isin(atoms["chain"], table.receptor)
+        self.idx_A = np.flatnonzero(interface & is_A)
+        self.idx_E = np.flatnonzero(interface & ~is_A)
+        _, self.q_A, self.type_A = atom_arrays(atoms[self.idx_A])
+        _, self.q_E, self.type_E = atom_arrays(atoms[self.idx_E])
+        self.E_solv = solvation_energy(atoms[interface])
+
+    def __len__(self):
+        return len(self.table)
+
+    def energy(self, xyz):
+        """(total, E_vdw, E_elec, E_solv) of one frame, xyz being (n_atoms, 3)"""
+        if len(xyz) != len(self):
+            raise ValueError(f"Frame has {len(xyz)} atoms, the topology has {len(self)}")
+        E_vdw, E_elec = pair_energies(xyz[self.idx_A], self.q_A, self.type_A,
+                                      xyz[self.idx_E], self.q_E, self.type_E, self.table.ff)
+        return E_vdw + E_elec + self.E_solv, E_vdw, E_elec, self.E_solv
+
+
+_topologies = {}
+
+
+def load_topology(files, threshold=ASA_THRESHOLD):
+    """Topology of (pdbqt, asa_complex, asa_A, asa_E), built once per process"""
+    key = (tuple(files), threshold)
+    if key not in _topologies:
+        _topologies[key] = Topology(cached_atom_table(*files), threshold)
+    return _topologies[key]
+
+
+def open_dump(filename, n_atoms):
+    """Memory-mapped (frames, n_atoms, 3) view of a raw float32 coordinate dump"""
+    size = os.path.getsize(filename)
+    if size % (n_atoms * 3 * 4):
+        raise ValueError(f"{filename}: {size} bytes is not a whole number of {n_atoms}-atom float32 frames")
+    return np.memmap(filename, dtype=np.float32, mode="r").reshape(-1, n_atoms, 3)
+
+
+def trajectory_frames(trajectory, n_atoms):
+    """Frame descriptors handed to the workers: byte ranges of the models, or dump frame indices"""
+    if os.path.splitext(trajectory)[1] in MODEL_FORMATS:
+        return model_ranges(trajectory)
+    return list(range(len(open_dump(trajectory, n_atoms))))
+
+
+def _frame_energy(files, trajectory, frame):
+    topology = load_topology(files)
+    if isinstance(frame, tuple):
+        records = read_model(trajectory, *frame)
+        xyz = np.column_stack((records["x"], records["y"], records["z"]))
+    else:
+        xyz = open_dump(trajectory, len(topology))[frame].astype(np.float64)
+    return topology.energy(xyz)
+
+
+def running_averages(energies):
+    """Cumulative mean of every component after each frame"""
+    energies = np.asarray(energies, dtype=np.float64).reshape(-1, 4)
+    return np.cumsum(energies, axis=0) / np.arange(1, len(energies) + 1)[:, None]
+
+
+def run_trajectory(trajectory, files=(PDB_FILE, ASA_COMPLEX, ASA_CHAIN_A, ASA_CHAIN_E),
+                   workers=1, chunksize=8):
+    """Per-frame energy rows with running averages, frames in trajectory order.
+
+    Only the frame descriptors are kept in memory; each worker reads its
+    frames from the file, so memory use does not grow with the trajectory.
+    """
+    topology = load_topology(files)
+    frames = trajectory_frames(trajectory, len(topology))
+    energies = map_tasks(functools.partial(_frame_energy, tuple(files), trajectory), frames,
+                         workers=workers, chunksize=chunksize)
+    rows = []
+    for i, (energy, average) in enumerate(zip(energies, running_averages(energies))):
+        row = {"Frame": i}
+        row.update(zip(CSV_FIELDS[1:5], energy))
+        row.update(zip(CSV_FIELDS[5:], average.tolist()))
+        rows.append(row)
+    return rows
+
+
+# score every frame of an MD trajectory against the reference complex, e.g.
+#   python trajectory_energy.py md.pdbqt --workers 8
+#   python trajectory_energy.py md_coords.f32      (raw float32 frames of the same atoms)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interaction energy time series over a trajectory")
+    parser.add_argument("trajectory", help="multi-MODEL .pdb/.pdbqt, or a raw float32 (frames x atoms x 3) dump")
+    parser.add_argument("--topology", nargs=4, default=[PDB_FILE, ASA_COMPLEX, ASA_CHAIN_A, ASA_CHAIN_E],
+                        metavar=("PDBQT", "ASA_COMPLEX", "ASA_A", "ASA_E"),
+                        help="reference structure providing charges, types, interface and ASA")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (0 = all cores)")
+    parser.add_argument("--chunksize", type=int, default=8, help="frames sent to a worker at a time")
+    parser.add_argument("-o", "--output", default=OUTPUT_CSV)
+    args = parser.parse_args()
+
+    rows = run_trajectory(args.trajectory, args.topology, workers=args.workers or None,
+                          chunksize=args.chunksize)
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"Frames: {len(rows)}")
+    if not rows:
+        parser.exit(1, f"No frames found in {args.trajectory}\n")
+    last = rows[-1]
+    print(f"Mean ΔG: {last['avg_dG']:.4f} kcal/mol (vdW {last['avg_dG_vdw']:.4f}, "
+          f"elec {last['avg_dG_elec']:.4f}, solv {last['avg_dG_solv']:.4f})")
+    print(f"CSV saved to: {args.output}")
@@ -0,0 +1,128 @@
+import argparse
+import csv
+import glob
+import os
+import re
+
+from interaction_energy import (
+    PDB_FILE,
+    ASA_COMPLEX,
+    ASA_CHAIN_A,
+    ASA_CHAIN_E,
+    cached_atom_table,
+    compute_interaction_energy,
+)
+import telemetry
+from scan_runner import map_tasks
+from result_cache import ResultCache, cache_key, cached_wt_energy
+
+OUTPUT_CSV = "variant_ddg.csv"
+CSV_FIELDS = ["Variant", "dG", "dG_vdw", "dG_elec", "dG_solv",
+              "ddG", "ddG_vdw", "ddG_elec", "ddG_solv"]
+# mut_<X>_complex.pdbqt + mut_<X>_complex.asa, mut_<X>_A.asa, mut_<X>_B.asa
+VARIANT_PATTERN = re.compile(r"^mut_(.+)_complex\.pdbqt$")
+
+
+def discover_variants(directory="."):
+    """Manifest {name: (pdbqt, asa_complex, asa_A, asa_B)} of the complete mut_<X> sets in directory"""
+    manifest = {}
+    for path in sorted(glob.glob(os.path.join(directory, "mut_*_complex.pdbqt"))):
+        match = VARIANT_PATTERN.match(os.path.basename(path))
+        if not match:
+            continue
+        name = match.group(1)
+        files = (path,) + tuple(os.path.join(directory, f"mut_{name}_{part}.asa")
+                                for part in ("complex", "A", "B"))
+        if all(os.path.exists(f) for f in files):
+            manifest[name] = files
+        else:
+            print(f"Skipping {name}: missing .asa files")
+    return manifest
+
+
+def read_manifest(filename):
+    """Manifest from a CSV with columns name, pdbqt, asa_complex, asa_A, asa_B"""
+    base = os.path.dirname(filename)
+    manifest = {}
+    with open(filename, newline="") as f:
+        for row in csv.DictReader(f):
+            manifest[row["name"]] = tuple(os.path.join(base, row[k])
+                                          for k in ("pdbqt", "asa_complex", "asa_A", "asa_B"))
+    return manifest
+
+
+def _variant_energy(files):
+    return compute_interaction_energy(cached_atom_table(*files), return_components=True)
+
+
+def run_variants(manifest, wt_files=(PDB_FILE, ASA_COMPLEX, ASA_CHAIN_A, ASA_CHAIN_E),
+                 workers=1, chunksize=1, cache=None):
+    """ΔΔG rows (one per variant, in manifest order) against a single WT evaluation.
+
+    Energies found in the result cache are reused; only the other variants
+    are sent to the workers.
+    """
+    cache = cache or ResultCache()
+    wt = cached_wt_energy(wt_files, cache)
+    names = list(manifest)
+
+    keys = {n: cache_key("variant", manifest[n]) for n in names}
+    energies = {n: cache.get(keys[n]) for n in names}
+    todo = [n for n in names if energies[n] is None]
+    for name, energy in zip(todo, map_tasks(_variant_energy, [manifest[n] for n in todo],
+                                            workers=workers, chunksize=chunksize)):
+        energies[name] = list(energy)
+        cache.put(keys[name], energies[name])
+    energies = [energies[n] for n in names]
+
+    rows = [{"Variant": "WT",
+             "dG": wt[0], "dG_vdw": wt[1], "dG_elec": wt[2], "dG_solv": wt[3],
+             "ddG": 0.0, "ddG_vdw": 0.0, "ddG_elec": 0.0, "ddG_solv": 0.0}]
+    for name, mut in zip(names, energies):
+        rows.append({
+            "Variant": name,
+            "dG": mut[0], "dG_vdw": mut[1], "dG_elec": mut[2], "dG_solv": mut[3],
+            "ddG": mut[0] - wt[0],
+            "ddG_vdw": mut[1] - wt[1],
+            "ddG_elec": mut[2] - wt[2],
+            "ddG_solv": mut[3] - wt[3],
+        })
+    return rows
+
+
+# Step 5 for every variant at once, e.g.
+#   python variant_energy.py                       (all mut_<X> sets in this folder)
+#   python variant_energy.py --variants E484K N501Y --workers 8
+#   python variant_energy.py --manifest variants.csv
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch ΔΔG of variant models against the WT complex")
+    parser.add_argument("--dir", default=".", help="folder searched for mut_<X>_complex/_A/_B files")
+    parser.add_argument("--manifest", help="CSV with columns name, pdbqt, asa_complex, asa_A, asa_B")
+    parser.add_argument("--variants", nargs="*", help="only run these variant names")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (0 = all cores)")
+    parser.add_argument("-o", "--output", default=OUTPUT_CSV)
+    parser.add_argument("--telemetry", help="append JSON-lines stage timings and progress to this file")
+    args = parser.parse_args()
+    if args.telemetry:
+        telemetry.enable(args.telemetry)
+
+    manifest = read_manifest(args.manifest) if args.manifest else discover_variants(args.dir)
+    if args.variants:
+        missing = [v for v in args.variants if v not in manifest]
+        if missing:
+            parser.error(f"variant(s) not found: {', '.join(missing)}")
+        manifest = {v: manifest[v] for v in args.variants}
+
+    print(f"Variants: {len(manifest)}")
+    rows = run_variants(manifest, workers=args.workers or None)
+
+    print(f"{'Variant':<10} {'ΔG':>10} {'ΔΔG':>10} {'vdW':>10} {'elec':>10} {'solv':>10}")
+    for row in rows:
+        print(f"{row['Variant']:<10} {row['dG']:10.3f} {row['ddG']:+10.3f} "
+              f"{row['ddG_vdw']:+10.3f} {row['ddG_elec']:+10.3f} {row['ddG_solv']:+10.3f}")
+
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"\nCSV saved to: {args.output}")
@@ -55,7 +55,13 @@ set orthoscopic, on
 
 """
 
-with open(filename, "w") as f:
-    f.write(content)
 
-print(f" Script '{filename}' created successfully.")
\ No newline at end of file
+def main():
+    with open(filename, "w") as f:
+        f.write(content)
+
+    print(f" Script '{filename}' created successfully.")
+
+
+if __name__ == "__main__":
+    main()
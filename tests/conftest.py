@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, "Data")
+sys.path.insert(0, os.path.join(ROOT, "Python Scripts"))
+
+
+@pytest.fixture(autouse=True)
+def data_dir(monkeypatch):
+    """The scripts open their inputs by name relative to Data/, as when run from there"""
+    monkeypatch.chdir(DATA_DIR)
+    return DATA_DIR
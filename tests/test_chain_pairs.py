@@ -0,0 +1,9 @@
+from chain_pairs import chain_pairs
+from contacts import distance_interface
+
+
+def test_distance_interface_matches_contacts():
+    pair, = chain_pairs("6m0j_fixed.pdbqt")
+    expected, _ = distance_interface("6m0j_fixed.pdbqt", chain_1=pair.chain_1, chains_2=(pair.chain_2,))
+    assert pair.distance == expected
+    assert pair.row()["Distance_1"] + pair.row()["Distance_2"] == 111
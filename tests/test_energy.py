@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from alanine_scan import AlanineScan, check_parity
+from decomposition import decompose_interaction
+from interaction_energy import (
+    ASA_CHAIN_A,
+    ASA_CHAIN_E,
+    ASA_COMPLEX,
+    PDB_FILE,
+    compute_interaction_energy,
+    load_atom_table,
+)
+from interface_store import interface_residues
+from sasa import IncrementalSASA, coordinates, shrake_rupley
+from scan_runner import map_residues
+from trajectory_energy import Topology
+
+# baseline values of the original per-pair loop, as listed in the README
+WT_TOTAL = -71.9468
+VARIANT_DDG = {"E484K": -3.951, "L452R": 2.139, "N501Y": 6.159}
+
+
+@pytest.fixture
+def wt_table():
+    return load_atom_table(PDB_FILE, ASA_COMPLEX, ASA_CHAIN_A, ASA_CHAIN_E)
+
+
+def variant_files(name):
+    return (f"mut_{name}_complex.pdbqt", f"mut_{name}_complex.asa", f"mut_{name}_A.asa", f"mut_{name}_B.asa")
+
+
+def test_wt_energy(wt_table):
+    total, E_vdw, E_elec, E_solv = compute_interaction_energy(wt_table)
+    assert total == pytest.approx(WT_TOTAL, abs=1e-4)
+    assert total == pytest.approx(E_vdw + E_elec + E_solv)
+
+
+@pytest.mark.parametrize("name", sorted(VARIANT_DDG))
+def test_variant_ddg(wt_table, name):
+    wt = compute_interaction_energy(wt_table, return_components=False)
+    mutant = compute_interaction_energy(load_atom_table(*variant_files(name)), return_components=False)
+    assert mutant - wt == pytest.approx(VARIANT_DDG[name], abs=1e-3)
+
+
+def test_receptor_side_is_not_tied_to_chain_a(wt_table):
+    # the same complex with chain E as the receptor, its free ASA file passed first
+    swapped = load_atom_table(PDB_FILE, ASA_COMPLEX, ASA_CHAIN_E, ASA_CHAIN_A, receptor=("E",))
+    np.testing.assert_array_equal(swapped.atoms["asa_free"], wt_table.atoms["asa_free"])
+    assert swapped.residue_asa == wt_table.residue_asa
+    assert compute_interaction_energy(swapped)[0] == pytest.approx(WT_TOTAL, abs=1e-4)
+    assert decompose_interaction(swapped).total.sum() == pytest.approx(decompose_interaction(wt_table).total.sum())
+    assert AlanineScan(swapped).ddg("E", 501) == pytest.approx(AlanineScan(wt_table).ddg("E", 501))
+    xyz = wt_table.atoms["xyz"]
+    assert Topology(swapped).energy(xyz)[0] == pytest.approx(Topology(wt_table).energy(xyz)[0])
+
+
+def test_incremental_scan_matches_full_recomputation(wt_table):
+    assert check_parity(AlanineScan(wt_table), interface_residues()) < 1e-6
+
+
+def test_scan_workers_give_identical_output(wt_table):
+    residues = interface_residues()
+    scan = AlanineScan(wt_table)
+    serial = map_residues(wt_table, residues, workers=1, scan=scan)
+    assert map_residues(wt_table, residues, workers=4, scan=scan) == serial
+
+
+@pytest.mark.parametrize("residue", [("E", 484), ("E", 501), ("A", 353)])
+def test_incremental_sasa_matches_full_pass(residue):
+    sasa = IncrementalSASA.from_pdb("6m0j_fixed.pdb")
+    records, radii, asa_bound, asa_free, _, recomputed = sasa.update(sasa.truncate(*residue))
+    assert 0 < len(recomputed) < len(records)
+    bound, free = shrake_rupley(coordinates(records), radii, records["chain"])
+    np.testing.assert_array_equal(asa_bound, bound)
+    np.testing.assert_array_equal(asa_free, free)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import pdb_io
+
+
+def line_read_pdbqt(filename):
+    """Reference line-by-line PDBQT reader (the original string slicing)"""
+    rows = []
+    with open(filename) as f:
+        for line in f:
+            if line.startswith(("ATOM", "HETATM")):
+                rows.append((line[21], int(line[22:26]), line[12:16].strip(),
+                             float(line[30:38]), float(line[38:46]), float(line[46:54]),
+                             float(line[70:76]) if len(line) > 76 else 0.0, line[77:].strip()))
+    return rows
+
+
+def line_read_asa(filename):
+    """Reference line-by-line .asa reader (the original read_atomic_asa)"""
+    data = {}
+    with open(filename) as f:
+        for line in f:
+            if line.startswith("ATOM"):
+                data[(line[21], int(line[22:26]), line[12:16].strip())] = float(line[54:62])
+    return data
+
+
+def asa_line(serial, name, resname, resnum, xyz, asa, radius):
+    name = name if len(name) == 4 else " " + name
+    return (f"ATOM  {serial:5d} {name:<4} {resname:>3} A{resnum:4d}    "
+            f"{xyz[0]:8.3f}{xyz[1]:8.3f}{xyz[2]:8.3f}{asa:8.3f}{radius:6.2f}")
+
+
+def test_short_last_line_keeps_its_columns(tmp_path):
+    # a last line that ends within a record width of the end of the file used to be read shifted
+    lines = [asa_line(k, "N", "SER", 18, (1.5, 2.5, 3.5), 10.0, 1.65) for k in range(1, 4)]
+    lines.append(asa_line(4, "CA", "THR", 19, (-1.111, 20.222, 36.333), 12.5, 1.87)[:66])
+    path = tmp_path / "short.asa"
+    path.write_text("\n".join(lines))
+
+    records = pdb_io.read_records(str(path), pdb_io.ASA_COLUMNS, ("ATOM",), compiled=False)
+    last = records[-1]
+    assert (last["name"], last["resname"], last["chain"], last["resnum"]) == ("CA", "THR", "A", 19)
+    assert (last["x"], last["y"], last["z"], last["asa"]) == (-1.111, 20.222, 36.333, 12.5)
+    # the radius column is cut to "  1."
+    assert last["radius"] == 1.0
+    assert records["resnum"][:3].tolist() == [18, 18, 18]
+
+
+@pytest.mark.parametrize("filename", ["6m0j_fixed.asa", "B.asa"])
+def test_bulk_asa_matches_line_reader(filename):
+    records = pdb_io.read_records(filename, pdb_io.ASA_COLUMNS, ("ATOM",), compiled=False)
+    reference = line_read_asa(filename)
+    assert len(records) == len(reference)
+    assert pdb_io.keyed(records, ("chain", "resnum", "name"), "asa") == reference
+
+
+def test_bulk_pdbqt_matches_line_reader():
+    records = pdb_io.read_records("6m0j_fixed.pdbqt", pdb_io.PDBQT_COLUMNS, compiled=False)
+    reference = line_read_pdbqt("6m0j_fixed.pdbqt")
+    assert len(records) == len(reference)
+    np.testing.assert_array_equal(np.column_stack((records["x"], records["y"], records["z"])),
+                                  np.array([r[3:6] for r in reference]))
@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+import pytest
+
+from pdb_io import read_pdbqt
+from saturation import CHI_ATOMS, THREE_LETTER, SaturationScan, backbone_frame, dihedral
+
+# the bundled "mut_*" complexes are one repaired background with a residue changed, not the one in
+# their names (mut_L452R keeps Leu 452 in another rotamer): (file, chain, residue, residue type in the file)
+BUNDLED = [("mut_N501Y_complex.pdbqt", "E", 501, "D"), ("mut_E484K_complex.pdbqt", "E", 484, "N")]
+BACKGROUND = "mut_L452R_complex.pdbqt"
+
+
+@pytest.fixture
+def wt_scan():
+    return SaturationScan()
+
+
+@pytest.fixture
+def background_scan():
+    return SaturationScan(BACKGROUND)
+
+
+def residue_chis(records, chain, res):
+    residue = records[(records["chain"] == chain) & (records["resnum"] == res)]
+    xyz = dict(zip(residue["name"].tolist(), np.column_stack((residue["x"], residue["y"], residue["z"]))))
+    return [math.degrees(dihedral(*(xyz[n] for n in chi))) for chi in CHI_ATOMS[residue["resname"][0]]]
+
+
+@pytest.mark.parametrize("aa", "KRYFDN")
+def test_rotamers_are_placed_at_the_chis_asked_for(wt_scan, aa):
+    start, stop = wt_scan.slices[("E", 501)]
+    frame = backbone_frame(wt_scan.records[start:stop])
+    template = wt_scan.templates[aa]
+    chis = wt_scan.rotamers[THREE_LETTER[aa]]
+    names = ["N", "CA", "C"] + template.records["name"].tolist()
+    for placed, asked in zip(template.place(frame, chis), chis):
+        xyz = np.vstack((frame, placed))
+        for chi, angle in zip(CHI_ATOMS[THREE_LETTER[aa]], asked):
+            got = math.degrees(dihedral(*(xyz[names.index(n)] for n in chi)))
+            assert (got - angle + 180) % 360 - 180 == pytest.approx(0, abs=1e-6)
+
+
+@pytest.mark.parametrize("filename, chain, res, aa", BUNDLED)
+def test_bundled_mutants_are_rebuilt_and_packed_no_worse(background_scan, filename, chain, res, aa):
+    bundled = read_pdbqt(filename)
+    in_file = bundled[(bundled["chain"] == chain) & (bundled["resnum"] == res)]["resname"][0]
+    assert in_file == THREE_LETTER[aa]
+    wt = background_scan.wt[0]
+
+    def ddg_of(records):
+        table = background_scan.table(records)
+        return background_scan.energy(table, background_scan.mutant_interface(chain, res, records))[0] - wt
+
+    reference = ddg_of(bundled)
+
+    # the same side chain at the same chis, built from the template
+    rebuilt = background_scan.mutant_records(chain, res, aa, chis=residue_chis(bundled, chain, res))
+    assert residue_chis(rebuilt, chain, res) == pytest.approx(residue_chis(bundled, chain, res))
+    assert ddg_of(rebuilt) == pytest.approx(reference, abs=1.5)
+    # packing finds a conformation at least as good as the bundled one
+    assert background_scan.ddg(chain, res, aa) < reference
+
+
+def test_unresolved_clash_is_scored_and_flagged(wt_scan):
+    energy, clashes = wt_scan.mutant_energy("E", 501, "Y")
+    assert clashes and all(c.startswith("E:TYR501 ") for c in clashes)
+    assert np.isfinite(energy[0])
+    assert wt_scan.ddg("E", 501, "Y") == pytest.approx(energy[0] - wt_scan.wt[0])
+
+
+def test_mutants_are_scored_over_the_wt_interface(wt_scan):
+    # side chains that leave the ΔASA interface used to drop the residue, giving one value for all of them
+    ddgs = [wt_scan.ddg("E", 484, aa) for aa in "AGPY"]
+    assert len(set(np.round(ddgs, 6))) == len(ddgs)
@@ -0,0 +1,24 @@
+import numpy as np
+
+from spatial import close_pairs
+
+
+def brute_force(xyz_1, xyz_2, cutoff):
+    d2 = np.sum((xyz_1[:, None] - xyz_2[None]) ** 2, axis=-1)
+    i, j = np.nonzero(d2 <= cutoff * cutoff)
+    return i, j, d2[i, j]
+
+
+def test_close_pairs_matches_brute_force():
+    rng = np.random.default_rng(0)
+    xyz_1, xyz_2 = rng.uniform(0, 30, (300, 3)), rng.uniform(5, 35, (200, 3))
+    for got, expected in zip(close_pairs(xyz_1, xyz_2, 4.5), brute_force(xyz_1, xyz_2, 4.5)):
+        np.testing.assert_array_equal(got, expected)
+
+
+def test_close_pairs_includes_the_cutoff_distance():
+    # grid points 2 A apart: the pairs at exactly the cutoff are kept, as NeighborSearch keeps them
+    xyz = np.array([[x, y, 0.0] for x in range(0, 8, 2) for y in range(0, 8, 2)])
+    i, j, d2 = close_pairs(xyz, None, 2.0)
+    assert len(i) == 2 * 24
+    assert np.all(d2 == 4.0)